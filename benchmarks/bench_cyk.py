@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los motores CYK sobre las gramáticas de examples/.
+
+Uso:
+    python benchmarks/bench_cyk.py                  # longitudes por defecto
+    python benchmarks/bench_cyk.py --lengths 100 500 --repeat 3
+
+Las entradas son cadenas aleatorias sobre los terminales de cada gramática
+(semilla fija). El motor "numpy" solo se mide si numpy está instalado.
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.grammar import Grammar
+from services.parser_cyk import cyk_parse, np
+
+
+def time_engine(grammar, w, engine, repeat):
+    best = None
+    acept = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        acept, _ = cyk_parse(grammar, w, engine=engine)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return acept, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de motores CYK")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--engines", nargs="+", default=["sets", "bitset", "numpy"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engines = [e for e in args.engines if e != "numpy" or np is not None]
+    rng = random.Random(args.seed)
+
+    print(f"{'gramática':<32} {'n':>6} " + " ".join(f"{e:>10}" for e in engines))
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.json"))):
+        grammar = Grammar.load(path)
+        if grammar.type != "type2" or not grammar.T:
+            continue
+        name = os.path.basename(path)
+        for n in args.lengths:
+            w = [rng.choice(grammar.T) for _ in range(n)]
+            results = [time_engine(grammar, w, e, args.repeat) for e in engines]
+            if len(set(r[0] for r in results)) > 1:
+                print(f"  ⚠ resultados distintos en {name} (n={n})")
+            print(f"{name:<32} {n:>6} " + " ".join(f"{t:>9.3f}s" for _, t in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark Earley vs CYK sobre examples/example_llc_json.json.
+
+Uso:
+    python benchmarks/bench_earley.py
+    python benchmarks/bench_earley.py --lengths 50 100 200 400 --repeat 3
+
+Para cada longitud se mide una cadena aceptada (A B A con A -> ab a^k, que
+ejercita la recursión izquierda A -> Aa) y una cadena aleatoria.
+CYK trabaja sobre la forma CNF; Earley sobre las producciones originales.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.grammar import Grammar
+from services.parser_cyk import cyk_parse
+from services.parser_earley import earley_parse
+
+
+def best_time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Earley vs CYK")
+    parser.add_argument("--grammar", default=os.path.join(ROOT, "examples", "example_llc_json.json"))
+    parser.add_argument("--lengths", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--engine", default="bitset", help="motor CYK (ver cyk_parse)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grammar = Grammar.load(args.grammar)
+    rng = random.Random(args.seed)
+
+    print(f"{'entrada':<10} {'n':>6} {'aceptada':>9} {'cyk':>10} {'earley':>10} {'earley+árbol':>13}")
+    for n in args.lengths:
+        accepted = list("ab" + "a" * max(0, n - 5) + "b" + "ab")
+        random_w = [rng.choice(grammar.T) for _ in range(n)]
+        for label, w in (("aceptada", accepted), ("aleatoria", random_w)):
+            (acept_cyk, _), t_cyk = best_time(lambda: cyk_parse(grammar, w, engine=args.engine), args.repeat)
+            (acept_e, _), t_rec = best_time(lambda: earley_parse(grammar, w, build_tree=False), args.repeat)
+            _, t_tree = best_time(lambda: earley_parse(grammar, w), args.repeat)
+            if acept_cyk != acept_e:
+                print(f"  ⚠ resultados distintos (n={len(w)})")
+            print(f"{label:<10} {len(w):>6} {str(acept_e):>9} {t_cyk:>9.4f}s {t_rec:>9.4f}s {t_tree:>12.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark del análisis CYK incremental frente a reanalizar desde cero.
+
+Uso:
+    python benchmarks/bench_incremental.py                 # n=500
+    python benchmarks/bench_incremental.py --length 300 --edits 20
+
+Para cada gramática tipo 2 de examples/ se analiza una cadena aleatoria de
+n tokens y luego se aplican ediciones de un token (reemplazar, insertar y
+borrar) en posiciones aleatorias. Se compara el tiempo medio de
+IncrementalCYK.edit con el de un análisis completo con el motor bitset, y
+se comprueba que borrar un token cuesta menos de la mitad que reanalizar.
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.grammar import Grammar
+from services.compiled_grammar import compile_grammar
+from services.incremental_cyk import IncrementalCYK
+from services.parser_cyk import cyk_parse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de CYK incremental")
+    parser.add_argument("--length", type=int, default=500)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'gramática':<32} {'edición':>10} {'completo':>10} {'incremental':>12} {'celdas':>8} {'x':>6}")
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.json"))):
+        grammar = Grammar.load(path)
+        if grammar.type != "type2" or not grammar.T:
+            continue
+        compiled = compile_grammar(grammar)
+        terminals = list(grammar.T)
+        tokens = [rng.choice(terminals) for _ in range(args.length)]
+
+        t0 = time.perf_counter()
+        cyk_parse(compiled, tokens, engine="bitset", acceptance_only=True)
+        full = time.perf_counter() - t0
+
+        inc = IncrementalCYK(compiled, tokens)
+        for kind in ("reemplazar", "insertar", "borrar"):
+            elapsed = 0.0
+            cells = 0
+            for _ in range(args.edits):
+                offset = rng.randrange(len(inc.tokens))
+                token = [rng.choice(terminals)]
+                t0 = time.perf_counter()
+                if kind == "reemplazar":
+                    inc.edit(offset, 1, token)
+                elif kind == "insertar":
+                    inc.edit(offset, 0, token)
+                else:
+                    inc.edit(offset, 1, [])
+                elapsed += time.perf_counter() - t0
+                cells += inc.recomputed
+            elapsed /= args.edits
+            name = os.path.basename(path)
+            print(f"{name:<32} {kind:>10} {full:>9.4f}s {elapsed:>11.4f}s "
+                  f"{cells // args.edits:>8} {full / elapsed:>5.1f}x")
+            if kind == "borrar":
+                # Los borrados también reutilizan las celdas que cubren la
+                # edición: deben costar bastante menos que reanalizar
+                assert elapsed * 2 < full, f"{name}: borrar un token no aprovecha la tabla"
+
+
+if __name__ == "__main__":
+    main()
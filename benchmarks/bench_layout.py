@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la distribución de árboles (services/tree_layout.py).
+
+Uso:
+    python benchmarks/bench_layout.py
+    python benchmarks/bench_layout.py --sizes 1000 10000 100000 --repeat 3
+
+No necesita Tk. Para árboles CYK balanceados, árboles de derivación en
+cadena (profundidad n) y árboles aleatorios se mide layout_tree y se
+compara el ancho obtenido con el de la distribución anterior del
+visualizador, que reservaba a cada subárbol la suma de los anchos de sus
+hijos (al menos 1.5 por hijo). Los anchos se expresan en nodos.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.tree import TreeNode
+from services.tree_layout import layout_tree
+
+
+def balanced(n):
+    """Árbol S -> S S partido por la mitad, con n hojas."""
+    root = TreeNode("S")
+    stack = [(root, n)]
+    while stack:
+        node, leaves = stack.pop()
+        if leaves == 1:
+            node.children.append(TreeNode("a"))
+            continue
+        left, right = TreeNode("S"), TreeNode("S")
+        node.children += [left, right]
+        stack.append((left, leaves // 2))
+        stack.append((right, leaves - leaves // 2))
+    return root
+
+
+def chain(n):
+    """Derivación S -> A S en cada posición (profundidad n)."""
+    node = TreeNode("S", [TreeNode("a")])
+    for _ in range(n - 1):
+        node = TreeNode("S", [TreeNode("A", [TreeNode("a")]), node])
+    return node
+
+
+def random_tree(n, seed=0):
+    """Árbol con n nodos, cada uno colgado de un nodo anterior al azar."""
+    rng = random.Random(seed)
+    root = TreeNode("S")
+    nodes = [root]
+    for _ in range(n - 1):
+        child = TreeNode("X")
+        rng.choice(nodes).children.append(child)
+        nodes.append(child)
+    return root
+
+
+def subtree_width(root):
+    """Ancho de la distribución por anchos de subárbol (la anterior)."""
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node.children)
+    width = {}
+    for node in reversed(order):
+        if node.children:
+            width[node] = max(sum(width[c] for c in node.children), len(node.children) * 1.5)
+        else:
+            width[node] = 1
+    return width[root]
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la distribución de árboles")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'árbol':<12} {'nodos':>8} {'tiempo':>9} {'nodos/s':>12} {'ancho':>10} {'ancho anterior':>15}")
+    for size in args.sizes:
+        for label, make in (("balanceado", balanced), ("cadena", chain), ("aleatorio", random_tree)):
+            # balanceado y cadena tienen unos 3 nodos por parámetro
+            tree = make(size if label == "aleatorio" else size // 3)
+            layout = layout_tree(tree)
+            elapsed = best_time(lambda: layout_tree(tree), args.repeat)
+            print(f"{label:<12} {len(layout):>8} {elapsed:>8.3f}s {len(layout) / elapsed:>12,.0f} "
+                  f"{layout.width + 1:>10,.0f} {subtree_width(tree):>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark de búsqueda de coincidencias en textos grandes (Scanner).
+
+Uso:
+    python benchmarks/bench_scan.py                 # 5 MB
+    python benchmarks/bench_scan.py --size 20 --terminals 0.9
+
+Se genera un "log" sintético con líneas de ruido y, con la densidad pedida,
+líneas que contienen palabras de las gramáticas regulares de examples/.
+El ruido usa los terminales de las gramáticas (con la fracción pedida) y
+separadores, de modo que casi cada posición es un inicio candidato; cada
+bloque incluye además una línea larga con un solo terminal y sin ninguna
+coincidencia, el peor caso de un recorrido que reinicia el autómata desde
+cada inicio. Se mide el rendimiento en MB/s sobre bytes en memoria y sobre
+el mismo contenido leído con mmap desde un archivo temporal.
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.automaton import EPSILON_SYMBOLS
+from services.grammar import Grammar
+from services.generator import generate_shortest
+from services.scanner import Scanner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del Scanner")
+    parser.add_argument("--size", type=int, default=5, help="tamaño del texto en MB")
+    parser.add_argument("--density", type=float, default=0.001,
+                        help="fracción de líneas con una coincidencia")
+    parser.add_argument("--terminals", type=float, default=0.5,
+                        help="fracción de caracteres del ruido que son terminales")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grammars = [Grammar.load(path) for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.json")))]
+    grammars = [g for g in grammars if g.type == "type3"]
+    words = [w for g in grammars for w in generate_shortest(g, limit=5)]
+
+    rng = random.Random(args.seed)
+    terminals = sorted({t for g in grammars for t in g.T if len(t) == 1 and t not in EPSILON_SYMBOLS})
+    scanner = Scanner(grammars)
+    noise = "".join(rng.choice(terminals) if rng.random() < args.terminals else rng.choice(" :-_0123")
+                    for _ in range(120))
+    lines = [noise if rng.random() >= args.density else f"{noise[:40]} {rng.choice(words)} {noise[40:]}"
+             for _ in range(1000)]
+    run = next((t for t in terminals if not any(scanner.scan(t * 100))), None)
+    if run is not None:
+        lines.append(run * 20_000)
+    block = ("\n".join(lines) + "\n").encode()
+    data = block * max(1, args.size * 1_000_000 // len(block))
+    size_mb = len(data) / 1e6
+
+    for mode in ("longest", "all"):
+        t0 = time.perf_counter()
+        count = sum(1 for _ in scanner.scan(data, mode=mode))
+        elapsed = time.perf_counter() - t0
+        print(f"bytes {mode:<8} {size_mb:8.1f} MB {count:>9} coincidencias {size_mb / elapsed:9.1f} MB/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.txt")
+        with open(path, "wb") as f:
+            f.write(data)
+        t0 = time.perf_counter()
+        count = sum(1 for _ in scanner.scan_file(path))
+        elapsed = time.perf_counter() - t0
+        print(f"mmap  {'longest':<8} {size_mb:8.1f} MB {count:>9} coincidencias {size_mb / elapsed:9.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
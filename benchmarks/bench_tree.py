@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark de reconstrucción de árboles CYK desde los backpointers.
+
+Uso:
+    python benchmarks/bench_tree.py
+    python benchmarks/bench_tree.py --lengths 1000 10000 --repeat 3
+
+CYK sobre 10k tokens es cúbico, así que los backpointers se generan
+directamente con la forma de dos derivaciones extremas:
+  - "derecha": S -> A S en cada posición (profundidad n, el peor caso para
+    la recursión)
+  - "balanceada": S -> S S partiendo por la mitad (profundidad log n)
+Se compara reconstruct_tree + TreeNode.from_tuple contra build_tree.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.parser_cyk import reconstruct_tree, build_tree
+from services.tree import TreeNode
+
+
+def right_branching(n):
+    back = {}
+    for i in range(n - 1):
+        back[(i, n - i, "S")] = (1, "A", "S")
+        back[(i, 1, "A")] = ("term", "a")
+    back[(n - 1, 1, "S")] = ("term", "a")
+    return back
+
+
+def balanced(n):
+    back = {}
+    stack = [(0, n)]
+    while stack:
+        i, l = stack.pop()
+        if l == 1:
+            back[(i, 1, "S")] = ("term", "a")
+            continue
+        s = l // 2
+        back[(i, l, "S")] = (s, "S", "S")
+        stack.append((i, s))
+        stack.append((i + s, l - s))
+    return back
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reconstrucción de árboles CYK")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'derivación':<12} {'n':>7} {'tuplas+from_tuple':>18} {'build_tree':>11} {'nodos/s':>12}")
+    for n in args.lengths:
+        for label, make in (("derecha", right_branching), ("balanceada", balanced)):
+            back = make(n)
+            t_old = best_time(lambda: TreeNode.from_tuple(reconstruct_tree(back, 0, n, "S")), args.repeat)
+            t_new = best_time(lambda: build_tree(back, 0, n, "S"), args.repeat)
+            nodes = 3 * n - 1  # en ambas formas: n terminales y 2n-1 no terminales
+            print(f"{label:<12} {n:>7} {t_old:>17.4f}s {t_new:>10.4f}s {nodes / t_new:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,19 @@ Uso:
     python run.py test      # Ejecuta los tests unitarios (47 tests)
     python run.py check     # Verifica el entorno
     python run.py help      # Muestra ayuda
+
+Uso sin interfaz gráfica (no importa tkinter; resultados en JSON lines):
+    python run.py parse GRAMATICA [ENTRADAS] [--jobs N] [--acceptance-only]
+    python run.py generate GRAMATICA [--limit N] [--max-depth D]
+    python run.py validate GRAMATICA [ENTRADAS] [--jobs N]
 """
 
 import sys
 import os
+import json
+
+# Subcomandos de línea de comandos (sin interfaz gráfica)
+CLI_COMMANDS = ("parse", "generate", "validate")
 
 def check_environment():
     """Verifica que el entorno esté correctamente configurado."""
@@ -126,6 +135,155 @@ def run_tests():
             traceback.print_exc()
             sys.exit(1)
 
+def build_cli_parser():
+    """Parser de argumentos de los subcomandos parse, generate y validate."""
+    import argparse
+    from services.parser_cyk import ENGINES
+    from services.generator import ORDERS
+
+    parser = argparse.ArgumentParser(
+        prog="run.py",
+        description="Análisis sin interfaz gráfica: un resultado JSON por línea en stdout."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_inputs(p, default):
+        p.add_argument("input", nargs="?", default=default,
+                       help="archivo con una cadena por línea ('-' para stdin)")
+        p.add_argument("--sep", default=None,
+                       help="separador de tokens (por defecto cada carácter es un token)")
+        p.add_argument("--jobs", type=int, default=1,
+                       help="procesos trabajadores (0 = todos los núcleos)")
+        p.add_argument("--engine", choices=ENGINES, default="auto", help="motor CYK")
+
+    p = sub.add_parser("parse", help="analiza cadenas y reporta aceptación y árbol")
+    p.add_argument("grammar", help="gramática en JSON")
+    add_inputs(p, "-")
+    p.add_argument("--acceptance-only", action="store_true",
+                   help="solo calcula la aceptación, sin construir árboles")
+
+    p = sub.add_parser("generate", help="genera cadenas del lenguaje")
+    p.add_argument("grammar", help="gramática en JSON")
+    p.add_argument("--limit", type=int, default=10, help="cantidad de cadenas")
+    p.add_argument("--max-depth", type=int, default=12, help="longitud máxima de la sentencial")
+    p.add_argument("--order", choices=ORDERS, default="length", help="orden de generación")
+
+    p = sub.add_parser("validate", help="valida la gramática y, si se dan, las cadenas")
+    p.add_argument("grammar", help="gramática en JSON")
+    add_inputs(p, None)
+    return parser
+
+
+def _read_lines(path, stdin):
+    """Líneas de un archivo o de stdin, sin el salto de línea."""
+    if path == "-":
+        for line in stdin:
+            yield line.rstrip("\r\n")
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def _tokenize(line, sep):
+    if sep is None:
+        return list(line)
+    return [t for t in line.split(sep) if t]
+
+
+def _json_line(record, tree_json=None):
+    """Serializa un resultado; el árbol ya viene como JSON (TreeNode.to_json)."""
+    text = json.dumps(record, ensure_ascii=False)
+    if tree_json is not None:
+        text = text[:-1] + ', "tree": ' + tree_json + "}"
+    return text + "\n"
+
+
+def _batch_results(grammar, args, stdin, build_trees):
+    """(índice, aceptada, resultado, línea) de cada entrada, en orden."""
+    from itertools import tee
+    from services.batch import parse_many
+
+    lines, inputs = tee(_read_lines(args.input, stdin))
+    results = parse_many(grammar, (_tokenize(line, args.sep) for line in inputs),
+                         jobs=args.jobs or None, build_trees=build_trees, engine=args.engine)
+    for (index, accepted, result), line in zip(results, lines):
+        yield index, accepted, result, line
+
+
+def cli_parse(args, stdin, stdout):
+    from services.grammar import Grammar
+    from services.tree import TreeNode
+
+    grammar = Grammar.load(args.grammar)
+    for index, accepted, result, line in _batch_results(grammar, args, stdin, not args.acceptance_only):
+        record = {"index": index, "input": line, "accepted": accepted}
+        tree_json = None
+        if isinstance(result, TreeNode):
+            tree_json = result.to_json()
+        elif result and accepted:
+            record["derivation"] = result
+        stdout.write(_json_line(record, tree_json))
+    return 0
+
+
+def cli_generate(args, stdin, stdout):
+    from itertools import islice
+    from services.grammar import Grammar
+    from services.generator import iter_strings
+
+    grammar = Grammar.load(args.grammar)
+    strings = iter_strings(grammar, max_depth=args.max_depth, order=args.order)
+    for index, s in enumerate(islice(strings, args.limit)):
+        stdout.write(_json_line({"index": index, "string": s, "length": len(s)}))
+    return 0
+
+
+def cli_validate(args, stdin, stdout):
+    """Valida la gramática y luego cada cadena; retorna 1 si algo no es válido."""
+    from services.grammar import Grammar
+    from services.cnf import is_cnf
+    from services.parser_regular import validate_regular_grammar
+
+    grammar = Grammar.load(args.grammar)
+    valid = grammar.validate()
+    record = {"grammar": args.grammar, "valid": valid, "type": grammar.type}
+    if valid and grammar.type == "type3":
+        record["regular"] = validate_regular_grammar(grammar)
+        valid = record["valid"] = record["regular"]
+    elif valid:
+        record["cnf"] = is_cnf(grammar)
+    stdout.write(_json_line(record))
+    if not valid:
+        return 1
+    if args.input is None:
+        return 0
+
+    rejected = 0
+    for index, accepted, _, line in _batch_results(grammar, args, stdin, False):
+        stdout.write(_json_line({"index": index, "input": line, "accepted": accepted}))
+        rejected += not accepted
+    return 1 if rejected else 0
+
+
+def run_cli(argv, stdin=None, stdout=None):
+    """Ejecuta un subcomando de línea de comandos y retorna el código de salida.
+
+    Solo importa los servicios, nunca tkinter ni ttkbootstrap, así que
+    funciona sin pantalla.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    args = build_cli_parser().parse_args(argv)
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    commands = {"parse": cli_parse, "generate": cli_generate, "validate": cli_validate}
+    try:
+        return commands[args.command](args, stdin, stdout)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ ERROR: {e}", file=sys.stderr)
+        return 2
+
+
 def show_help():
     """Muestra información de ayuda."""
     print("""
@@ -137,6 +295,17 @@ USO:
     python run.py check     Verifica el entorno y dependencias
     python run.py help      Muestra esta ayuda
 
+SIN INTERFAZ GRÁFICA (JSON lines por stdout, no requiere pantalla):
+    python run.py parse GRAMATICA [ENTRADAS]      Analiza una cadena por línea
+        --jobs N             procesos trabajadores (0 = todos los núcleos)
+        --acceptance-only    solo aceptación, sin árboles
+        --sep SEP            separador de tokens (por defecto, caracteres)
+    python run.py generate GRAMATICA              Genera cadenas
+        --limit N  --max-depth D  --order length|bfs
+    python run.py validate GRAMATICA [ENTRADAS]   Valida la gramática y las cadenas
+                                                  (código de salida 1 si algo falla)
+    ENTRADAS es un archivo o '-' para stdin (parse lee stdin por defecto).
+
 INSTALACIÓN:
     1. Crear entorno virtual (recomendado):
        Windows:    python -m venv venv && venv\\Scripts\\activate
@@ -174,7 +343,10 @@ def main():
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
-        if command == "test":
+        if command in CLI_COMMANDS:
+            sys.exit(run_cli(sys.argv[1:]))
+        
+        elif command == "test":
             if not check_environment():
                 sys.exit(1)
             run_tests()
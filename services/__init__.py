@@ -3,25 +3,72 @@ Módulo de servicios para análisis de gramáticas formales.
 
 Incluye:
 - grammar: Modelo de gramática y persistencia
+- productions: Almacenamiento compacto de producciones
+- cnf: Verificación y conversión a Forma Normal de Chomsky
+- compiled_grammar: Gramática compilada para CYK y caché LRU
 - parser_cyk: Parser CYK para Gramáticas Libres de Contexto
+- incremental_cyk: Reanálisis CYK incremental al editar la entrada
+- sppf: Bosque compartido con todas las derivaciones de una cadena
+- parser_earley: Parser de Earley para GLC arbitrarias
 - parser_regular: Parser para Gramáticas Regulares
-- generator: Generador de cadenas por BFS
+- automaton: Compilación de gramáticas regulares a AFD
+- scanner: Búsqueda de coincidencias de gramáticas regulares en textos
+- generator: Generación, conteo y muestreo de cadenas
+- batch: Análisis por lotes de muchas cadenas
+- cancellation: Cancelación cooperativa y progreso de trabajos largos
 - tree: Estructura de árbol de derivación
+- tree_layout: Distribución de árboles para dibujarlos (Reingold–Tilford/Walker)
 """
 
 from .grammar import Grammar
-from .parser_cyk import cyk_parse, is_cnf, reconstruct_tree
+from .productions import Production, ProductionTable
+from .cnf import is_cnf, convert_to_cnf
+from .compiled_grammar import CompiledGrammar, compile_grammar
+from .parser_cyk import cyk_parse, reconstruct_tree, build_tree
+from .incremental_cyk import IncrementalCYK
+from .sppf import SPPF, parse_forest
+from .parser_earley import earley_parse
 from .parser_regular import parse_regular, validate_regular_grammar
-from .generator import generate_shortest
+from .automaton import DFA, compile_regular, minimize, save_dfa, load_dfa, StreamMatcher
+from .scanner import Scanner, scan
+from .generator import generate_shortest, iter_strings, LanguageCounter, sample_strings
+from .batch import parse_many
+from .cancellation import Cancelled
 from .tree import TreeNode
+from .tree_layout import TreeLayout, layout_tree
 
 __all__ = [
     "Grammar",
+    "Production",
+    "ProductionTable",
     "cyk_parse",
     "is_cnf",
+    "convert_to_cnf",
+    "CompiledGrammar",
+    "compile_grammar",
     "reconstruct_tree",
+    "build_tree",
+    "IncrementalCYK",
+    "SPPF",
+    "parse_forest",
+    "earley_parse",
     "parse_regular",
     "validate_regular_grammar",
+    "DFA",
+    "compile_regular",
+    "minimize",
+    "save_dfa",
+    "load_dfa",
+    "StreamMatcher",
+    "Scanner",
+    "scan",
     "generate_shortest",
-    "TreeNode"
+    "iter_strings",
+    "LanguageCounter",
+    "sample_strings",
+    "parse_many",
+    "Cancelled",
+    "TreeNode",
+    "TreeLayout",
+    "layout_tree"
 ]
\ No newline at end of file
@@ -0,0 +1,500 @@
+"""
+Compilación de gramáticas regulares (Tipo 3) a autómatas finitos.
+
+La gramática se traduce a un AFN y, por construcción de subconjuntos, a un
+AFD cuya tabla de transiciones es densa: un arreglo plano de enteros donde
+la fila de cada estado está indexada por el id del terminal (-1 = sin
+transición). Reconocer una cadena es entonces un único ciclo sobre los tokens.
+
+El AFD se minimiza con el algoritmo de Hopcroft y puede guardarse en un
+formato binario compacto que se carga con mmap, de modo que varios procesos
+compartan una única copia de solo lectura. StreamMatcher recorre el AFD de
+forma incremental para validar flujos sin tenerlos completos en memoria.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple, Union
+
+from services.grammar import Grammar
+from services.compiled_grammar import GrammarCache
+from services.parser_regular import detect_grammar_direction
+
+# Símbolos que representan la cadena vacía en el lado derecho
+EPSILON_SYMBOLS = ("ε", "epsilon")
+
+# Número máximo de autómatas compilados que se conservan
+CACHE_MAXSIZE = 32
+
+# Formato binario (little-endian):
+#   cabecera: magic, versión, flags, estados, símbolos, inicial, bytes del alfabeto
+#   alfabeto: por símbolo, longitud u32 + UTF-8; relleno hasta múltiplo de 4
+#   transiciones: int32 x (estados * símbolos)
+#   aceptación: mapa de bits de ceil(estados / 8) bytes
+_MAGIC = b"GDFA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIiI")
+
+
+class DFA:
+    """Autómata finito determinista con tabla de transiciones densa.
+
+    Atributos:
+        alphabet: terminales, en el orden de sus ids
+        symbol_ids: terminal -> id
+        transitions: arreglo plano; transitions[estado * |alfabeto| + id]
+                     es el estado destino o -1
+        accepting: por estado, 1 si es de aceptación
+        start: estado inicial
+    """
+
+    def __init__(self, alphabet: List[str], transitions: Sequence[int],
+                 accepting: Sequence[int], start: int = 0):
+        self.alphabet = list(alphabet)
+        self.symbol_ids = {a: i for i, a in enumerate(self.alphabet)}
+        self.transitions = transitions
+        self.accepting = accepting
+        self.start = start
+        # Mantiene vivo el mapeo de memoria cuando el AFD se carga con load_dfa
+        self._mmap = None
+
+    @property
+    def num_states(self) -> int:
+        return len(self.accepting)
+
+    @property
+    def table(self) -> List[Sequence[int]]:
+        """Filas de la tabla de transiciones (una por estado)."""
+        k = len(self.alphabet)
+        return [self.transitions[q * k:(q + 1) * k] for q in range(self.num_states)]
+
+    def next_state(self, state: int, token: str) -> int:
+        """Estado destino desde state con token (-1 si no hay transición)."""
+        sym = self.symbol_ids.get(token)
+        if sym is None or state < 0:
+            return -1
+        return self.transitions[state * len(self.alphabet) + sym]
+
+    def accepts(self, tokens: List[str]) -> bool:
+        """Indica si la cadena de tokens pertenece al lenguaje."""
+        ids = self.symbol_ids
+        trans = self.transitions
+        k = len(self.alphabet)
+        state = self.start
+        for token in tokens:
+            sym = ids.get(token)
+            if sym is None:
+                return False
+            state = trans[state * k + sym]
+            if state < 0:
+                return False
+        return bool(self.accepting[state])
+
+    def to_bytes(self) -> bytes:
+        """Serializa el AFD en el formato binario de save_dfa."""
+        alphabet = b"".join(struct.pack("<I", len(b)) + b
+                            for b in (a.encode("utf-8") for a in self.alphabet))
+        header = _HEADER.pack(_MAGIC, _VERSION, 0, self.num_states,
+                              len(self.alphabet), self.start, len(alphabet))
+        padding = b"\0" * (-(len(header) + len(alphabet)) % 4)
+
+        trans = array("i", self.transitions)
+        if sys.byteorder != "little":
+            trans.byteswap()
+        bitmap = bytearray((self.num_states + 7) // 8)
+        for q in range(self.num_states):
+            if self.accepting[q]:
+                bitmap[q >> 3] |= 1 << (q & 7)
+        return header + alphabet + padding + trans.tobytes() + bytes(bitmap)
+
+    def __repr__(self):
+        return f"DFA(states={self.num_states}, alphabet={self.alphabet})"
+
+
+class _Bitmap:
+    """Vista de solo lectura de un mapa de bits como secuencia de 0/1."""
+
+    __slots__ = ("_buf", "_size")
+
+    def __init__(self, buf, size: int):
+        self._buf = buf
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return self._buf[i >> 3] >> (i & 7) & 1
+
+
+def _is_epsilon(right: List[str]) -> bool:
+    # Igual que detect_grammar_direction: "ε"/"epsilon" siempre denotan la
+    # cadena vacía, aunque aparezcan en T
+    return len(right) == 0 or (len(right) == 1 and right[0] in EPSILON_SYMBOLS)
+
+
+def build_nfa(grammar: Grammar) -> Tuple[int, Dict, Dict, Set[int], Set[int]]:
+    """Construye el AFN de una gramática lineal derecha o izquierda.
+
+    Retorna (num_estados, trans, eps, iniciales, finales) donde
+    trans[(q, terminal)] y eps[q] son conjuntos de estados destino.
+
+    - Lineal derecha: un estado por no terminal más un estado final F.
+      A -> aB: A --a--> B;  A -> a: A --a--> F;  A -> B: A --ε--> B;
+      A -> ε: A es final. Estado inicial: S.
+    - Lineal izquierda: un estado por no terminal más un estado inicial I
+      (se lee la gramática "al revés"). A -> Ba: B --a--> A;
+      A -> a: I --a--> A;  A -> B: B --ε--> A;  A -> ε: I --ε--> A.
+      Estado final: S.
+    """
+    direction = detect_grammar_direction(grammar)
+    if direction == "invalid":
+        raise ValueError("Gramática no es regular")
+    if direction == "mixed":
+        raise ValueError("Gramática mixta (izquierda + derecha) no soportada")
+
+    ids = {A: i for i, A in enumerate(grammar.N)}
+    for p in grammar.P:
+        ids.setdefault(p["left"], len(ids))
+    extra = len(ids)  # F (derecha) o I (izquierda)
+
+    trans: Dict[Tuple[int, str], Set[int]] = {}
+    eps: Dict[int, Set[int]] = {}
+    starts: Set[int] = set()
+    finals: Set[int] = set()
+
+    def add(q, a, r):
+        trans.setdefault((q, a), set()).add(r)
+
+    left_linear = direction == "left"
+    for p in grammar.P:
+        A = ids[p["left"]]
+        right = p["right"]
+        if _is_epsilon(right):
+            if left_linear:
+                eps.setdefault(extra, set()).add(A)
+            else:
+                finals.add(A)
+        elif len(right) == 1 and right[0] in grammar.terminal_set:
+            if left_linear:
+                add(extra, right[0], A)
+            else:
+                add(A, right[0], extra)
+        elif len(right) == 1:
+            B = ids.get(right[0])
+            if B is None:
+                continue
+            if left_linear:
+                eps.setdefault(B, set()).add(A)
+            else:
+                eps.setdefault(A, set()).add(B)
+        elif left_linear:
+            add(ids[right[0]], right[1], A)
+        else:
+            add(A, right[0], ids[right[1]])
+
+    S = ids.get(grammar.S)
+    if left_linear:
+        starts.add(extra)
+        if S is not None:
+            finals.add(S)
+    else:
+        finals.add(extra)
+        if S is not None:
+            starts.add(S)
+    return extra + 1, trans, eps, starts, finals
+
+
+def _closure(states, eps: Dict[int, Set[int]]) -> FrozenSet[int]:
+    result = set(states)
+    stack = list(states)
+    while stack:
+        q = stack.pop()
+        for r in eps.get(q, ()):
+            if r not in result:
+                result.add(r)
+                stack.append(r)
+    return frozenset(result)
+
+
+def build_dfa(grammar: Grammar) -> DFA:
+    """Convierte la gramática regular en un AFD por construcción de subconjuntos.
+
+    Solo se crean los estados alcanzables; el conjunto vacío no se
+    materializa y se representa con -1 en la tabla.
+    """
+    _, trans, eps, starts, finals = build_nfa(grammar)
+    alphabet = [a for a in grammar.T if a not in EPSILON_SYMBOLS]
+
+    # Transiciones del AFN agrupadas por estado: q -> [(id terminal, destinos)]
+    sym_ids = {a: i for i, a in enumerate(alphabet)}
+    moves: Dict[int, List[Tuple[int, Set[int]]]] = {}
+    for (q, a), targets in trans.items():
+        moves.setdefault(q, []).append((sym_ids[a], targets))
+
+    start = _closure(starts, eps)
+    index = {start: 0}
+    subsets = [start]
+    transitions = array("i")
+    accepting = bytearray()
+
+    k = len(alphabet)
+    i = 0
+    while i < len(subsets):
+        subset = subsets[i]
+        i += 1
+        targets: Dict[int, Set[int]] = {}
+        for q in subset:
+            for sym, dest in moves.get(q, ()):
+                targets.setdefault(sym, set()).update(dest)
+
+        row = array("i", [-1]) * k
+        for sym, dest in targets.items():
+            closed = _closure(dest, eps)
+            state = index.get(closed)
+            if state is None:
+                state = len(subsets)
+                index[closed] = state
+                subsets.append(closed)
+            row[sym] = state
+        transitions.extend(row)
+        accepting.append(1 if subset & finals else 0)
+
+    return DFA(alphabet, transitions, bytes(accepting), 0)
+
+
+def minimize(dfa: DFA) -> DFA:
+    """Minimiza el AFD con el algoritmo de Hopcroft.
+
+    Se agrega un estado muerto implícito para completar la función de
+    transición; los estados equivalentes a él (desde los que no se alcanza
+    la aceptación) se eliminan y sus transiciones quedan en -1. Los estados
+    del resultado se numeran en orden BFS desde el inicial, así que dos
+    AFD del mismo lenguaje producen la misma tabla.
+    """
+    k = len(dfa.alphabet)
+    n = dfa.num_states
+    dead = n
+    trans = dfa.transitions
+
+    # Transiciones inversas: inv[c][q] = estados p con δ(p, c) = q
+    inv = [[[] for _ in range(n + 1)] for _ in range(k)]
+    for p in range(n):
+        base = p * k
+        for c in range(k):
+            q = trans[base + c]
+            inv[c][dead if q < 0 else q].append(p)
+    for c in range(k):
+        inv[c][dead].append(dead)
+
+    finals = {q for q in range(n) if dfa.accepting[q]}
+    others = set(range(n + 1)) - finals
+    # Copias: los bloques se modifican al refinar la partición
+    partition = [set(block) for block in (finals, others) if block]
+    block_of = [0] * (n + 1)
+    for b, block in enumerate(partition):
+        for q in block:
+            block_of[q] = b
+    waiting = set(range(len(partition)))
+
+    while waiting:
+        splitter = set(partition[waiting.pop()])
+        for c in range(k):
+            inv_c = inv[c]
+            touched: Dict[int, List[int]] = {}
+            for q in splitter:
+                for p in inv_c[q]:
+                    touched.setdefault(block_of[p], []).append(p)
+            for b, members in touched.items():
+                block = partition[b]
+                if len(members) == len(block):
+                    continue
+                new_block = set(members)
+                block.difference_update(new_block)
+                nb = len(partition)
+                partition.append(new_block)
+                for p in new_block:
+                    block_of[p] = nb
+                if b in waiting or len(new_block) <= len(block):
+                    waiting.add(nb)
+                else:
+                    waiting.add(b)
+
+    # Renumerar en BFS desde el inicial, descartando el bloque muerto
+    dead_block = block_of[dead]
+    start_block = block_of[dfa.start]
+    if start_block == dead_block:
+        return DFA(dfa.alphabet, array("i", [-1]) * k, bytes(1), 0)
+
+    order = {start_block: 0}
+    queue = [start_block]
+    transitions = array("i")
+    accepting = bytearray()
+    i = 0
+    while i < len(queue):
+        b = queue[i]
+        i += 1
+        rep = next(iter(partition[b]))
+        accepting.append(dfa.accepting[rep])
+        base = rep * k
+        for c in range(k):
+            q = trans[base + c]
+            target = dead_block if q < 0 else block_of[q]
+            if target == dead_block:
+                transitions.append(-1)
+                continue
+            if target not in order:
+                order[target] = len(queue)
+                queue.append(target)
+            transitions.append(order[target])
+    return DFA(dfa.alphabet, transitions, bytes(accepting), 0)
+
+
+def save_dfa(dfa: DFA, path: str):
+    """Guarda el AFD en formato binario compacto."""
+    with open(path, "wb") as f:
+        f.write(dfa.to_bytes())
+
+
+def load_dfa(path: str, use_mmap: bool = True) -> DFA:
+    """Carga un AFD guardado con save_dfa.
+
+    Con use_mmap=True la tabla de transiciones y el mapa de aceptación se
+    leen directamente del archivo mapeado en memoria (sin copiarlos), de
+    modo que los procesos que cargan el mismo archivo comparten sus páginas.
+    """
+    with open(path, "rb") as f:
+        if use_mmap:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buf = f.read()
+    return _dfa_from_buffer(buf)
+
+
+def _dfa_from_buffer(buf) -> DFA:
+    if len(buf) < _HEADER.size:
+        raise ValueError("Archivo de autómata inválido o truncado")
+    magic, version, _, num_states, num_symbols, start, alpha_len = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC:
+        raise ValueError("Archivo de autómata inválido (firma incorrecta)")
+    if version != _VERSION:
+        raise ValueError(f"Versión de autómata no soportada: {version}")
+
+    offset = _HEADER.size
+    alphabet = []
+    end = offset + alpha_len
+    while offset < end:
+        (size,) = struct.unpack_from("<I", buf, offset)
+        offset += 4
+        alphabet.append(bytes(buf[offset:offset + size]).decode("utf-8"))
+        offset += size
+    if len(alphabet) != num_symbols:
+        raise ValueError("Archivo de autómata inválido (alfabeto)")
+    offset += -offset % 4
+
+    trans_size = 4 * num_states * num_symbols
+    bitmap_size = (num_states + 7) // 8
+    if len(buf) < offset + trans_size + bitmap_size:
+        raise ValueError("Archivo de autómata inválido o truncado")
+
+    view = memoryview(buf)
+    if sys.byteorder == "little":
+        transitions = view[offset:offset + trans_size].cast("i")
+    else:
+        transitions = array("i", bytes(view[offset:offset + trans_size]))
+        transitions.byteswap()
+    offset += trans_size
+    accepting = _Bitmap(view[offset:offset + bitmap_size], num_states)
+
+    dfa = DFA(alphabet, transitions, accepting, start)
+    if isinstance(buf, mmap.mmap):
+        dfa._mmap = buf
+    return dfa
+
+
+_cache = GrammarCache(lambda grammar, key: minimize(build_dfa(grammar)), CACHE_MAXSIZE)
+
+
+def compile_regular(grammar: Grammar) -> DFA:
+    """Devuelve el AFD mínimo de la gramática regular, reutilizando la caché.
+
+    Lanza ValueError si la gramática no es lineal derecha o izquierda.
+    """
+    return _cache.get(grammar)
+
+
+class StreamMatcher:
+    """Reconocedor incremental (push) de una gramática regular.
+
+    Los tokens se entregan por partes con feed(); entre llamadas solo se
+    conserva el estado actual del AFD mínimo de la gramática (que representa
+    el conjunto de estados del AFN alcanzados), así que la memoria es
+    constante aunque el flujo no tenga fin. Como el AFD mínimo no tiene
+    estados desde los que sea imposible aceptar, el rechazo se detecta en el
+    primer token que no puede continuar ningún prefijo del lenguaje.
+
+    Acepta las formas lineal derecha e izquierda (ver build_nfa). Con una
+    cadena como chunk cada carácter es un token, igual que en la interfaz.
+
+    Atributos:
+        dfa: AFD usado (el de compile_regular si se pasó una gramática)
+        state: estado actual (-1 = muerto)
+        position: tokens consumidos; si el matcher murió, es la posición
+                  del token que provocó el rechazo
+    """
+
+    def __init__(self, grammar: Union[Grammar, DFA]):
+        self.dfa = grammar if isinstance(grammar, DFA) else compile_regular(grammar)
+        self.reset()
+
+    def reset(self):
+        """Vuelve al estado inicial para reconocer un flujo nuevo."""
+        dfa = self.dfa
+        k = len(dfa.alphabet)
+        start = dfa.start
+        # Solo el AFD del lenguaje vacío tiene un inicial que no acepta ni avanza
+        if not dfa.accepting[start] and all(t < 0 for t in dfa.transitions[start * k:(start + 1) * k]):
+            start = -1
+        self.state = start
+        self.position = 0
+
+    def feed(self, chunk: Iterable[str]) -> bool:
+        """Consume los tokens de chunk.
+
+        Se detiene en el primer token que deja al matcher sin estado; el
+        resto del chunk no se lee.
+
+        Returns:
+            False si el flujo ya fue rechazado (is_dead), True si sigue vivo
+        """
+        state = self.state
+        if state < 0:
+            return False
+        ids = self.dfa.symbol_ids
+        trans = self.dfa.transitions
+        k = len(self.dfa.alphabet)
+        position = self.position
+        for token in chunk:
+            sym = ids.get(token)
+            state = -1 if sym is None else trans[state * k + sym]
+            if state < 0:
+                break
+            position += 1
+        self.state = state
+        self.position = position
+        return state >= 0
+
+    def is_accepting(self) -> bool:
+        """Indica si los tokens consumidos hasta ahora forman una cadena del lenguaje."""
+        return self.state >= 0 and bool(self.dfa.accepting[self.state])
+
+    def is_dead(self) -> bool:
+        """Indica si ninguna continuación del flujo puede ser aceptada."""
+        return self.state < 0
+
+    def __repr__(self):
+        return f"StreamMatcher(state={self.state}, position={self.position})"
@@ -0,0 +1,116 @@
+"""
+Análisis por lotes: muchas cadenas contra una misma gramática.
+
+La gramática se compila una sola vez (por proceso) y los resultados se
+devuelven como un generador de tuplas (índice, aceptada, resultado), donde
+resultado es el TreeNode de la derivación (CYK) o la lista de derivación
+(gramáticas regulares). Opcionalmente el trabajo se reparte en bloques
+entre los procesos de un ProcessPoolExecutor.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.grammar import Grammar
+from services.compiled_grammar import compile_grammar
+from services.automaton import compile_regular
+from services.parser_cyk import cyk_parse, build_tree
+from services.parser_regular import parse_regular
+
+
+class _BatchParser:
+    """Estado compilado que se reutiliza para todas las cadenas de un lote."""
+
+    def __init__(self, grammar: Grammar, build_trees: bool = True, engine: str = "auto"):
+        self.grammar = grammar
+        self.build_trees = build_trees
+        self.engine = engine
+        self.regular = grammar.type == "type3"
+        self.compiled = None if self.regular else compile_grammar(grammar)
+        self.dfa = compile_regular(grammar) if self.regular else None
+
+    def parse(self, tokens: List[str]) -> Tuple[bool, object]:
+        if self.regular:
+            # La aceptación siempre la decide el AFD, con o sin derivación
+            acept = self.dfa.accepts(tokens)
+            if not acept or not self.build_trees:
+                return acept, None
+            return acept, parse_regular(self.grammar, tokens)[1]
+
+        if not self.build_trees:
+            return cyk_parse(self.compiled, tokens, engine=self.engine, acceptance_only=True)
+        acept, back = cyk_parse(self.compiled, tokens, engine=self.engine)
+        if not acept:
+            return acept, None
+        tree = build_tree(back, 0, len(tokens), self.compiled.start)
+        return acept, tree
+
+    def parse_chunk(self, chunk: List[Tuple[int, List[str]]]) -> List[Tuple[int, bool, object]]:
+        return [(index, *self.parse(tokens)) for index, tokens in chunk]
+
+
+# Estado de cada proceso trabajador (se inicializa una vez por proceso)
+_worker: Optional[_BatchParser] = None
+
+
+def _init_worker(grammar_dict: Dict, build_trees: bool, engine: str):
+    global _worker
+    _worker = _BatchParser(Grammar.from_dict(grammar_dict), build_trees, engine)
+
+
+def _run_chunk(chunk: List[Tuple[int, List[str]]]) -> List[Tuple[int, bool, object]]:
+    return _worker.parse_chunk(chunk)
+
+
+def _chunks(inputs: Iterable[List[str]], size: int) -> Iterator[List[Tuple[int, List[str]]]]:
+    it = enumerate(inputs)
+    while True:
+        chunk = [(index, list(tokens)) for index, tokens in islice(it, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_many(grammar: Grammar, inputs: Iterable[List[str]], jobs: Optional[int] = 1,
+               chunksize: int = 256, build_trees: bool = True,
+               engine: str = "auto") -> Iterator[Tuple[int, bool, object]]:
+    """Analiza muchas cadenas con la misma gramática.
+
+    Args:
+        grammar: Gramática tipo 2 (CYK) o tipo 3 (parser regular)
+        inputs: iterable de listas de tokens (se consume de forma perezosa)
+        jobs: procesos trabajadores; 1 analiza en este proceso y None usa
+              todos los núcleos
+        chunksize: cadenas por bloque enviado a cada trabajador
+        build_trees: si es False solo se calcula la aceptación
+        engine: motor CYK (ver cyk_parse)
+
+    Yields:
+        (índice, aceptada, árbol o derivación) en el orden de la entrada
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize debe ser al menos 1")
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    if jobs <= 1:
+        parser = _BatchParser(grammar, build_trees, engine)
+        for index, tokens in enumerate(inputs):
+            yield (index, *parser.parse(list(tokens)))
+        return
+
+    # Se mantienen como máximo 2 bloques pendientes por trabajador para no
+    # materializar toda la entrada en memoria.
+    max_pending = 2 * jobs
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(grammar.to_dict(), build_trees, engine)) as executor:
+        pending = deque()
+        for chunk in _chunks(inputs, chunksize):
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,42 @@
+"""
+Cancelación cooperativa y progreso de trabajos largos.
+
+Las funciones costosas (cyk_parse, earley_parse, IncrementalCYK,
+iter_strings) aceptan un threading.Event opcional `cancel`: en sus ciclos
+principales lo consultan y, si está activado, abandonan el trabajo lanzando
+Cancelled. Las que pueden
+estimar su avance aceptan además `progress`, una función que recibe la
+fracción completada (entre 0 y 1).
+"""
+
+import threading
+from typing import Callable, Optional
+
+# Función que recibe la fracción completada de un trabajo
+ProgressCallback = Callable[[float], None]
+
+
+class Cancelled(Exception):
+    """El trabajo se abandonó porque se activó su evento de cancelación."""
+
+
+def check_cancelled(cancel: Optional[threading.Event]):
+    """Lanza Cancelled si `cancel` está activado."""
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
+def span_progress(n: int, l: int) -> float:
+    """Fracción del trabajo CYK hecha al terminar las celdas de longitud l.
+
+    Las celdas de longitud j son n-j+1 y cada una prueba j-1 splits.
+    """
+    if n < 2:
+        return 1.0
+
+    def work(l):
+        # suma de (n - m) * m para m = 1 .. l-1
+        m = l - 1
+        return n * m * (m + 1) // 2 - m * (m + 1) * (2 * m + 1) // 6
+
+    return work(l) / work(n)
@@ -0,0 +1,369 @@
+"""
+Forma Normal de Chomsky: verificación y conversión.
+
+convert_to_cnf aplica los pasos clásicos sobre una copia de las reglas:
+
+    TERM   terminales dentro de reglas largas -> no terminales @T
+    BIN    reglas de más de dos símbolos -> cadenas de reglas binarias @X
+    START  nuevo inicial @S si S es anulable y aparece en un lado derecho
+    DEL    eliminación de reglas ε (solo el inicial puede derivar ε)
+    UNIT   eliminación de reglas unitarias A -> B
+
+y descarta, antes y después, los no terminales que no generan ninguna
+cadena o no son alcanzables desde el inicial. Anulables, generadores y
+alcanzables se calculan con listas de trabajo e índices inversos, en tiempo
+lineal en el tamaño de la gramática; la clausura unitaria usa las
+componentes fuertemente conexas del grafo A -> B.
+
+"ε"/"epsilon" en un lado derecho siempre denotan la cadena vacía.
+"""
+
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+from services.grammar import Grammar
+
+EPSILON_SYMBOLS = ("ε", "epsilon")
+
+# (izquierda, lado derecho, índices de las producciones originales)
+_Rule = Tuple[str, Tuple[str, ...], Tuple[int, ...]]
+
+
+def is_cnf(grammar: Grammar) -> bool:
+    """Verifica estructuras básicas de CNF: cada producción es A->BC o A->a.
+    Se admite S -> ε si S no aparece en ningún lado derecho.
+    No comprueba unit rules exhaustivamente.
+    """
+    N, T = grammar.nonterminal_set, grammar.terminal_set
+    for p in grammar.P:
+        left = p.get("left")
+        right = p.get("right", [])
+        if len(right) == 1:
+            # debe ser terminal
+            if right[0] not in T:
+                return False
+        elif len(right) == 2:
+            if right[0] not in N or right[1] not in N:
+                return False
+        elif len(right) == 0:
+            # en CNF los no terminales del lado derecho van en reglas binarias
+            S = grammar.S
+            if left != S or grammar.productions_by_first(S) or grammar.productions_by_last(S):
+                return False
+        else:
+            return False
+    return True
+
+
+def convert_to_cnf(grammar: Grammar) -> Grammar:
+    """
+    Conversión completa a CNF (ver el docstring del módulo).
+
+    El resultado genera el mismo lenguaje; si la cadena vacía pertenece al
+    lenguaje, el símbolo inicial tiene la regla S -> ε (con lado derecho
+    vacío) y no aparece en ningún lado derecho. El orden de N y P es
+    determinista.
+    """
+    return convert_to_cnf_with_origins(grammar)[0]
+
+
+def convert_to_cnf_with_origins(grammar: Grammar) -> Tuple[Grammar, List[Tuple[int, ...]]]:
+    """Como convert_to_cnf, pero también devuelve el origen de cada regla.
+
+    Retorna (cnf, origins) donde origins[k] es la tupla ordenada de índices
+    de grammar.P de los que proviene la regla cnf.P[k] (puede haber varios
+    si la misma regla CNF surge de producciones distintas).
+    """
+    # Orden determinista de no terminales: N, izquierdas no declaradas y nuevos
+    order: List[str] = []
+    newN: Set[str] = set()
+
+    def declare(A: str, first: bool = False):
+        if A not in newN:
+            newN.add(A)
+            if first:
+                order.insert(0, A)
+            else:
+                order.append(A)
+
+    for A in grammar.N:
+        declare(A)
+    for p in grammar.P:
+        declare(p["left"])
+
+    counters: Dict[str, int] = defaultdict(int)
+
+    def fresh(prefix: str) -> str:
+        nt = f"{prefix}{counters[prefix]}"
+        counters[prefix] += 1
+        while nt in newN:
+            nt = f"{prefix}{counters[prefix]}"
+            counters[prefix] += 1
+        return nt
+
+    start = grammar.S
+    rules: List[_Rule] = []
+    for k, p in enumerate(grammar.P):
+        rhs = tuple(sym for sym in p["right"] if sym not in EPSILON_SYMBOLS)
+        rules.append((p["left"], rhs, (k,)))
+    rules = _prune(rules, start, newN)
+
+    # 1) TERM: reemplazar terminales en reglas de longitud >=2 por nuevas variables
+    term_map: Dict[str, str] = {}
+    term_origins: Dict[str, Set[int]] = {}
+    replaced: List[_Rule] = []
+    for left, rhs, origins in rules:
+        if len(rhs) >= 2 and any(sym not in newN for sym in rhs):
+            new_rhs = []
+            for sym in rhs:
+                if sym not in newN:
+                    if sym not in term_map:
+                        # crear nuevo no-terminal para este terminal
+                        term_map[sym] = fresh("@T")
+                        declare(term_map[sym])
+                        term_origins[sym] = set()
+                    term_origins[sym].update(origins)
+                    new_rhs.append(term_map[sym])
+                else:
+                    new_rhs.append(sym)
+            rhs = tuple(new_rhs)
+        replaced.append((left, rhs, origins))
+    for sym, nt in term_map.items():
+        replaced.append((nt, (sym,), tuple(sorted(term_origins[sym]))))
+
+    # 2) BIN: descomponer producciones largas (>2) en binarias
+    binary: List[_Rule] = []
+    for left, rhs, origins in replaced:
+        if len(rhs) <= 2:
+            binary.append((left, rhs, origins))
+            continue
+        cur_left = left
+        for i in range(len(rhs) - 2):
+            new_nt = fresh("@X")
+            declare(new_nt)
+            binary.append((cur_left, (rhs[i], new_nt), origins))
+            cur_left = new_nt
+        binary.append((cur_left, (rhs[-2], rhs[-1]), origins))
+
+    # 3) START: solo hace falta un inicial nuevo si S deriva ε y aparece a la derecha
+    nullable = _nullable(binary, newN)
+    if start in nullable and any(start in rhs for _, rhs, _ in binary):
+        new_start = fresh("@S")
+        declare(new_start, first=True)
+        binary.insert(0, (new_start, (start,), ()))
+        nullable.add(new_start)
+        start = new_start
+
+    # 4) DEL: eliminar reglas ε agregando las variantes sin los anulables
+    empty_origins: Set[int] = set()
+    expanded: List[_Rule] = []
+    for left, rhs, origins in binary:
+        if not rhs:
+            empty_origins.update(origins)
+            continue
+        expanded.append((left, rhs, origins))
+        if len(rhs) == 2:
+            B, C = rhs
+            if C in nullable:
+                expanded.append((left, (B,), origins))
+            if B in nullable:
+                expanded.append((left, (C,), origins))
+
+    # 5) UNIT: eliminar unit-productions (A -> B) propagando RHS de B a A
+    final = _unit_closure(expanded, order, newN)
+    if start in nullable:
+        final.insert(0, (start, (), tuple(sorted(empty_origins))))
+
+    # 6) Descartar lo que dejó de ser generador o alcanzable
+    final = _prune(final, start, newN)
+
+    used = {start}
+    used.update(left for left, _, _ in final)
+    N = [A for A in order if A in used]
+    T = [t for t in grammar.T if t not in EPSILON_SYMBOLS]
+    P = [{"left": left, "right": list(rhs)} for left, rhs, _ in final]
+    return Grammar(N, T, P, start, grammar.type), [origins for _, _, origins in final]
+
+
+def _unit_closure(rules: List[_Rule], order: List[str], nonterminals: Set[str]) -> List[_Rule]:
+    """Reemplaza las reglas unitarias por las no unitarias que alcanzan.
+
+    Para cada A (en el orden dado) se emiten las reglas no unitarias de todos
+    los B con A =>* B por reglas unitarias, ordenadas por su posición en
+    `rules`, sin repetir lados derechos (se unen sus orígenes).
+
+    Los no terminales de una misma componente fuertemente conexa del grafo
+    unitario alcanzan exactamente los mismos B, así que comparten un único
+    conjunto de reglas fuente. Las componentes se recorren en orden
+    topológico inverso y cada una une sus reglas propias con los conjuntos
+    ya calculados de sus sucesoras.
+    """
+    unit_succ: Dict[str, List[str]] = defaultdict(list)
+    own: Dict[str, List[int]] = defaultdict(list)
+    for idx, (left, rhs, _) in enumerate(rules):
+        if len(rhs) == 1 and rhs[0] in nonterminals:
+            unit_succ[left].append(rhs[0])
+        else:
+            own[left].append(idx)
+
+    components = _sccs(order, unit_succ)
+    comp_of: Dict[str, int] = {}
+    for c, members in enumerate(components):
+        for A in members:
+            comp_of[A] = c
+
+    # Tarjan entrega las componentes con sus sucesoras antes que ellas
+    sources: List[Set[int]] = []
+    for c, members in enumerate(components):
+        reached: Set[int] = set()
+        for A in members:
+            reached.update(own.get(A, ()))
+            for B in unit_succ.get(A, ()):
+                d = comp_of[B]
+                if d != c:
+                    reached |= sources[d]
+        sources.append(reached)
+
+    final: List[_Rule] = []
+    for A in order:
+        _emit(A, sorted(sources[comp_of[A]]), rules, final)
+    return final
+
+
+def _sccs(nodes: List[str], succ: Dict[str, List[str]]) -> List[List[str]]:
+    """Componentes fuertemente conexas (Tarjan iterativo, sin recursión).
+
+    Las componentes salen en orden topológico inverso: cada una aparece
+    después de todas las que alcanza.
+    """
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+
+    def visit(v: str):
+        index[v] = low[v] = len(index)
+        stack.append(v)
+        on_stack.add(v)
+
+    for root in nodes:
+        if root in index:
+            continue
+        visit(root)
+        work = [(root, iter(succ.get(root, ())))]
+        while work:
+            v, edges = work[-1]
+            for w in edges:
+                if w not in index:
+                    visit(w)
+                    work.append((w, iter(succ.get(w, ()))))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+    return components
+
+
+def _emit(A: str, sources: Iterable[int], rules: List[_Rule], out: List[_Rule]):
+    """Agrega A -> rhs por cada regla fuente, uniendo orígenes de lados derechos repetidos."""
+    positions: Dict[Tuple[str, ...], int] = {}
+    for idx in sources:
+        _, rhs, origins = rules[idx]
+        pos = positions.get(rhs)
+        if pos is None:
+            positions[rhs] = len(out)
+            out.append((A, rhs, origins))
+        elif origins:
+            merged = tuple(sorted(set(out[pos][2]).union(origins)))
+            out[pos] = (A, rhs, merged)
+
+
+def _nullable(rules: List[_Rule], nonterminals: Set[str]) -> Set[str]:
+    """No terminales que derivan ε (lista de trabajo con contadores por regla)."""
+    pending: List[int] = []
+    users: Dict[str, List[int]] = defaultdict(list)
+    nullable: Set[str] = set()
+    work: List[str] = []
+    for i, (left, rhs, _) in enumerate(rules):
+        if any(sym not in nonterminals for sym in rhs):
+            pending.append(-1)  # contiene un terminal: nunca anulable
+            continue
+        pending.append(len(rhs))
+        for sym in rhs:
+            users[sym].append(i)
+        if not rhs and left not in nullable:
+            nullable.add(left)
+            work.append(left)
+    while work:
+        B = work.pop()
+        for i in users.get(B, ()):
+            pending[i] -= 1
+            if pending[i] == 0:
+                A = rules[i][0]
+                if A not in nullable:
+                    nullable.add(A)
+                    work.append(A)
+    return nullable
+
+
+def _prune(rules: List[_Rule], start: str, nonterminals: Set[str]) -> List[_Rule]:
+    """Descarta las reglas con símbolos no generadores o inalcanzables.
+
+    Un no terminal es generador si deriva alguna cadena de terminales
+    (incluida ε). Se conservan las reglas de los no terminales alcanzables
+    desde `start` cuyos símbolos son todos generadores, en su orden original.
+    """
+    pending: List[int] = []
+    users: Dict[str, List[int]] = defaultdict(list)
+    generating: Set[str] = set()
+    work: List[str] = []
+    for i, (left, rhs, _) in enumerate(rules):
+        count = 0
+        for sym in rhs:
+            if sym in nonterminals:
+                count += 1
+                users[sym].append(i)
+        pending.append(count)
+        if count == 0 and left not in generating:
+            generating.add(left)
+            work.append(left)
+    while work:
+        B = work.pop()
+        for i in users.get(B, ()):
+            pending[i] -= 1
+            if pending[i] == 0:
+                A = rules[i][0]
+                if A not in generating:
+                    generating.add(A)
+                    work.append(A)
+
+    by_left: Dict[str, List[int]] = defaultdict(list)
+    for i, (left, rhs, _) in enumerate(rules):
+        if left in generating and all(sym in generating or sym not in nonterminals for sym in rhs):
+            by_left[left].append(i)
+
+    reachable = {start} if start in generating else set()
+    queue = deque(reachable)
+    while queue:
+        A = queue.popleft()
+        for i in by_left.get(A, ()):
+            for sym in rules[i][1]:
+                if sym in nonterminals and sym not in reachable:
+                    reachable.add(sym)
+                    queue.append(sym)
+
+    return [rules[i] for i in sorted(i for A in reachable for i in by_left.get(A, ()))]
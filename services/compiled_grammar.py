@@ -0,0 +1,162 @@
+"""
+Gramática compilada para CYK y caché LRU de compilaciones.
+
+Compilar una gramática implica verificar CNF, convertirla si hace falta e
+indexar sus reglas. El resultado depende solo del contenido de la gramática,
+así que se guarda en una caché indexada por Grammar.fingerprint().
+"""
+
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+from typing import Dict, List, Set, Tuple
+
+from services.grammar import Grammar
+from services.cnf import is_cnf, convert_to_cnf
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: solo lo usa el motor vectorizado
+    np = None
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Número máximo de gramáticas compiladas que se conservan
+CACHE_MAXSIZE = 32
+
+
+class CompiledGrammar:
+    """Forma CNF de una gramática junto con sus índices para CYK.
+
+    Atributos:
+        key: huella de la gramática original
+        cnf: gramática en CNF (la original si ya lo estaba)
+        start: símbolo inicial
+        accepts_empty: si la cadena vacía pertenece al lenguaje (S -> ε)
+        names / ids: no terminal <-> id entero (posición de bit)
+        prods_term: terminal -> {A} con A -> terminal
+        prods_bin: (B, C) -> {A} con A -> BC
+        term_mask: terminal -> máscara de los A con A -> terminal
+        right_mask: por id de B, máscara de los C con alguna regla A -> BC
+        parents: por id de B, dict id de C -> máscara de los A con A -> BC
+    """
+
+    def __init__(self, grammar: Grammar, key: str = None):
+        self.key = key if key is not None else grammar.fingerprint()
+
+        # Si no está en CNF, convertir automáticamente
+        if not is_cnf(grammar):
+            grammar = convert_to_cnf(grammar)
+        self.cnf = grammar
+        self.start = grammar.S
+        self.accepts_empty = any(not p["right"] for p in grammar.productions_by_left(grammar.S))
+
+        self.prods_term: Dict[str, Set[str]] = defaultdict(set)
+        self.prods_bin: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        for p in grammar.P:
+            left = p["left"]
+            right = tuple(p["right"])
+            if len(right) == 1 and right[0] in grammar.terminal_set:
+                self.prods_term[right[0]].add(left)
+            elif len(right) == 2:
+                self.prods_bin[(right[0], right[1])].add(left)
+
+        # Asignar un id a cada no terminal (orden de N, luego los que aparezcan en P)
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for A in list(grammar.N) + [p["left"] for p in grammar.P]:
+            if A not in self.ids:
+                self.ids[A] = len(self.names)
+                self.names.append(A)
+
+        self.term_mask: Dict[str, int] = {}
+        for a, lefts in self.prods_term.items():
+            self.term_mask[a] = self.mask_of(lefts)
+
+        self.right_mask = [0] * len(self.names)
+        self.parents: List[Dict[int, int]] = [dict() for _ in self.names]
+        for (B, C), lefts in self.prods_bin.items():
+            b, c = self.ids[B], self.ids[C]
+            self.right_mask[b] |= 1 << c
+            self.parents[b][c] = self.parents[b].get(c, 0) | self.mask_of(lefts)
+
+        self._numpy_rules = None
+
+    def mask_of(self, symbols) -> int:
+        """Máscara de bits de un conjunto de no terminales."""
+        mask = 0
+        for A in symbols:
+            mask |= 1 << self.ids[A]
+        return mask
+
+    def numpy_rules(self):
+        """Tensor booleano rules[A, B, C] de las reglas binarias (se construye una vez)."""
+        if self._numpy_rules is None:
+            k = len(self.names)
+            rules = np.zeros((k, k, k), dtype=bool)
+            for (B, C), lefts in self.prods_bin.items():
+                for A in lefts:
+                    rules[self.ids[A], self.ids[B], self.ids[C]] = True
+            self._numpy_rules = rules
+        return self._numpy_rules
+
+
+class GrammarCache:
+    """Caché LRU de objetos derivados de una gramática, indexada por su huella.
+
+    factory(grammar, key) construye el objeto cuando no está en la caché.
+    """
+
+    def __init__(self, factory, maxsize: int):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, grammar: Grammar):
+        key = grammar.fingerprint()
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = self.factory(grammar, key)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = GrammarCache(CompiledGrammar, CACHE_MAXSIZE)
+
+
+def compile_grammar(grammar: Grammar) -> CompiledGrammar:
+    """Devuelve la gramática compilada, reutilizando la caché si es posible."""
+    return _cache.get(grammar)
+
+
+def cache_info() -> CacheInfo:
+    """Contadores de la caché (aciertos, fallos, tamaño máximo y actual)."""
+    return _cache.info()
+
+
+def clear_cache():
+    """Vacía la caché y reinicia los contadores."""
+    _cache.clear()
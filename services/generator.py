@@ -1,54 +1,571 @@
+import heapq
+import random
+import threading
+from bisect import bisect_right
 from collections import deque
+from itertools import count, islice
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from services.grammar import Grammar
+from services.compiled_grammar import GrammarCache, compile_grammar
+from services.cancellation import check_cancelled
+from services.automaton import DFA, compile_regular
 
-def generate_shortest(grammar: Grammar, limit: int = 10, max_depth: int = 12):
+# Símbolos que representan la cadena vacía
+EPSILON_SYMBOLS = ('ε', 'epsilon')
+
+ORDERS = ("length", "bfs")
+
+# Número máximo de tablas de conteo que se conservan en caché
+CACHE_MAXSIZE = 32
+
+# Intentos máximos del muestreo por rechazo uniforme sobre cadenas
+SAMPLE_MAX_ATTEMPTS = 10_000
+
+
+def generate_shortest(grammar: Grammar, limit: int = 10, max_depth: int = 12,
+                      cancel: Optional[threading.Event] = None):
     """Genera cadenas terminales por BFS en el espacio de derivaciones.
     
     Args:
         grammar: Gramática a usar
         limit: cuántas cadenas terminales devolver
         max_depth: longitud máxima de la sentencial (cantidad de símbolos)
+        cancel: evento que interrumpe la búsqueda con Cancelled
     
     Returns:
         Lista de cadenas generadas (strings)
     """
-    results = []
-    start = [grammar.S]
-    q = deque()
-    q.append(start)
-    visited = set()
-    visited.add(tuple(start))  # Marcar el inicio como visitado
-
-    while q and len(results) < limit:
-        sent = q.popleft()
-        
-        # Filtrar símbolos epsilon antes de procesar
-        sent_filtered = [sym for sym in sent if sym not in ['ε', 'epsilon']]
-        
-        # Verificar si toda la sentencial es terminal
-        # Consideramos terminal todo símbolo que NO sea un no terminal (más robusto)
-        # También tratamos la sentencial vacía como cadena terminal
-        if len(sent_filtered) == 0 or all(sym not in grammar.N for sym in sent_filtered):
+    return list(islice(iter_strings(grammar, max_depth=max_depth, order="bfs", cancel=cancel), limit))
+
+
+def iter_strings(grammar: Grammar, max_depth: int = 12, order: str = "length",
+                 cancel: Optional[threading.Event] = None) -> Iterator[str]:
+    """Generador perezoso de las cadenas terminales del lenguaje.
+    
+    Cada cadena se produce en cuanto se descubre (sin repetirse), así que
+    el consumidor puede detenerse en cualquier momento sin trabajo extra.
+    
+    Args:
+        grammar: Gramática a usar
+        max_depth: longitud máxima de la sentencial que se sigue expandiendo
+        order: "length" produce las cadenas en orden no decreciente de
+               cantidad de terminales; "bfs" sigue el orden por niveles de
+               derivación de generate_shortest
+        cancel: evento que, al activarse, interrumpe la búsqueda con
+                Cancelled (se consulta en cada sentencial expandida)
+    
+    Yields:
+        Cadenas generadas (strings)
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Orden desconocido: {order!r} (opciones: {', '.join(ORDERS)})")
+
+    if order == "bfs":
+        return _iter_bfs(grammar, max_depth, cancel)
+    return _iter_by_length(grammar, max_depth, cancel)
+
+
+def _iter_bfs(grammar: Grammar, max_depth: int,
+              cancel: Optional[threading.Event] = None) -> Iterator[str]:
+    """Búsqueda por niveles de derivación (derivaciones leftmost).
+
+    Las sentenciales repetidas se descartan solo dentro de cada nivel, así
+    que la memoria depende del tamaño de la frontera y no de todo lo
+    visitado. Una sentencial que reaparece en un nivel posterior solo
+    produce cadenas ya entregadas. Para que los ciclos (A -> B -> A,
+    A -> A A | ε) no se repitan sin fin, se recuerdan además las
+    sentenciales obtenidas con reglas unitarias o ε, las únicas que no
+    alargan la sentencial ni agregan terminales. Las sentenciales con no
+    terminales que no generan cadenas se descartan.
+    """
+    start = grammar.S
+    nonterminals = grammar.nonterminal_set
+    minlen = _min_lengths(grammar)
+    if start in nonterminals and start not in minlen:
+        return
+    # no terminal -> [(lado derecho, si el paso no crece)], sin las reglas
+    # que usan no terminales improductivos
+    rules: Dict[str, List[Tuple[List[str], bool]]] = {}
+    for p in grammar.P:
+        right = p["right"]
+        if any(r in nonterminals and r not in minlen for r in right):
+            continue
+        body = [r for r in right if r not in EPSILON_SYMBOLS]
+        flat = not body or (len(body) == 1 and body[0] in nonterminals)
+        rules.setdefault(p["left"], []).append((right, flat))
+    seen = set()
+    # Sentenciales obtenidas con pasos que no crecen (ver docstring)
+    shrinking = {(start,)}
+    frontier = [[start]]
+
+    while frontier:
+        level = set()
+        next_frontier = []
+        for sent in frontier:
+            check_cancelled(cancel)
+
+            # Filtrar símbolos epsilon antes de procesar
+            sent_filtered = [sym for sym in sent if sym not in EPSILON_SYMBOLS]
+
+            # Verificar si toda la sentencial es terminal
+            # Consideramos terminal todo símbolo que NO sea un no terminal (más robusto)
+            # También tratamos la sentencial vacía como cadena terminal
+            if all(sym not in nonterminals for sym in sent_filtered):
+                s = "".join(sent_filtered)
+                if s not in seen:
+                    seen.add(s)
+                    yield s
+                continue  # No expandir cadenas terminales
+
+            # Evitar sentencias demasiado largas
+            if len(sent_filtered) > max_depth:
+                continue
+
+            # Expandir el PRIMER no terminal (derivación leftmost)
+            for i, sym in enumerate(sent):
+                if sym in nonterminals:
+                    # Aplicar todas las producciones posibles para este no terminal
+                    for right, flat in rules.get(sym, ()):
+                        new_sent = sent[:i] + right + sent[i+1:]
+                        key = tuple(new_sent)
+                        if key in level:
+                            continue
+                        level.add(key)
+                        if flat:
+                            if key in shrinking:
+                                continue
+                            shrinking.add(key)
+                        next_frontier.append(new_sent)
+                    break  # Solo expandir el primer no terminal
+        frontier = next_frontier
+
+
+def _min_lengths(grammar: Grammar) -> Dict[str, int]:
+    """Longitud mínima (en terminales) de las cadenas que deriva cada no terminal.
+
+    Los no terminales que no derivan ninguna cadena terminal no aparecen.
+    """
+    nonterminals = grammar.nonterminal_set
+    minlen: Dict[str, int] = {}
+    changed = True
+    while changed:
+        changed = False
+        for p in grammar.P:
+            A = p["left"]
+            total = 0
+            for sym in p["right"]:
+                if sym in EPSILON_SYMBOLS:
+                    continue
+                if sym in nonterminals:
+                    if sym not in minlen:
+                        break
+                    total += minlen[sym]
+                else:
+                    total += 1
+            else:
+                if total < minlen.get(A, total + 1):
+                    minlen[A] = total
+                    changed = True
+    return minlen
+
+
+def _iter_by_length(grammar: Grammar, max_depth: int,
+                    cancel: Optional[threading.Event] = None) -> Iterator[str]:
+    """Búsqueda de costo uniforme sobre sentenciales.
+
+    La prioridad de una sentencial es la cantidad de terminales que ya
+    contiene más la longitud mínima de lo que deriva cada no terminal, una
+    cota inferior exacta para las sentenciales terminales. Por eso las
+    cadenas salen en orden no decreciente de longitud. Las sentenciales con
+    no terminales que no generan cadenas se descartan.
+
+    Aplicar una regla nunca baja la cota, así que las sentenciales se
+    procesan por capas de igual cota y las repetidas se descartan solo
+    dentro de su capa: la capa se olvida al terminarla y un ciclo de
+    derivaciones (que no cambia la cota) no sale de su capa.
+    """
+    start = grammar.S
+    nonterminals = grammar.nonterminal_set
+    minlen = _min_lengths(grammar)
+    if start not in minlen:
+        return
+
+    def bound(sent):
+        total = 0
+        for sym in sent:
+            if sym in EPSILON_SYMBOLS:
+                continue
+            if sym in nonterminals:
+                if sym not in minlen:
+                    return None
+                total += minlen[sym]
+            else:
+                total += 1
+        return total
+
+    seen = set()
+    tie = count()
+    layer = minlen[start]
+    heap = [(layer, next(tie), [start])]
+    # cota -> sentenciales ya encoladas con esa cota (capas no terminadas)
+    visited = {layer: {(start,)}}
+
+    while heap:
+        check_cancelled(cancel)
+        priority, _, sent = heapq.heappop(heap)
+        if priority > layer:
+            # Ya no se encolan sentenciales con cota menor a la actual
+            visited.pop(layer, None)
+            layer = priority
+        sent_filtered = [sym for sym in sent if sym not in EPSILON_SYMBOLS]
+
+        if all(sym not in nonterminals for sym in sent_filtered):
             s = "".join(sent_filtered)
-            if s not in results:
-                results.append(s)
-            continue  # No expandir cadenas terminales
+            if s not in seen:
+                seen.add(s)
+                yield s
+            continue
 
-        # Evitar sentencias demasiado largas
         if len(sent_filtered) > max_depth:
             continue
 
-        # Expandir el PRIMER no terminal (derivación leftmost)
         for i, sym in enumerate(sent):
-            if sym in grammar.N:
-                # Aplicar todas las producciones posibles para este no terminal
-                for p in grammar.P:
-                    if p["left"] == sym:
-                        new_sent = sent[:i] + p["right"] + sent[i+1:]
-                        key = tuple(new_sent)
-                        if key not in visited:
-                            visited.add(key)
-                            q.append(new_sent)
-                break  # Solo expandir el primer no terminal
-    
-    return results
\ No newline at end of file
+            if sym in nonterminals:
+                for p in grammar.productions_by_left(sym):
+                    new_sent = sent[:i] + p["right"] + sent[i+1:]
+                    b = bound(new_sent)
+                    if b is None:
+                        continue
+                    key = tuple(new_sent)
+                    queued = visited.setdefault(b, set())
+                    if key in queued:
+                        continue
+                    queued.add(key)
+                    heapq.heappush(heap, (b, next(tie), new_sent))
+                break
+
+
+class LanguageCounter:
+    """Conteo y desranqueo de las cadenas de cada longitud.
+
+    Trabaja sobre la forma CNF de la gramática (la misma que usa CYK) y
+    calcula por programación dinámica cuántas derivaciones tiene cada
+    (no terminal, longitud):
+
+        count[A][1] = |{A -> a}|
+        count[A][L] = sum_{A -> BC} sum_{s=1}^{L-1} count[B][s] * count[C][L-s]
+
+    Con enteros de Python los conteos son exactos aunque sean enormes. Las
+    derivaciones tienen un orden total fijo (reglas ordenadas, luego el
+    punto de corte, luego los índices izquierdo y derecho), así que cada
+    índice k en [0, count(L)) identifica una única derivación y unrank(L, k)
+    la reconstruye sin enumerar las anteriores.
+
+    La longitud se mide en tokens; la longitud 0 tiene una derivación si
+    la forma CNF tiene S -> ε. En gramáticas ambiguas se cuentan
+    derivaciones, no cadenas distintas: una misma cadena aparece en tantos
+    índices como árboles de derivación tenga en la forma CNF (ver
+    derivations).
+    """
+
+    def __init__(self, grammar: Grammar):
+        compiled = compile_grammar(grammar)
+        self.start = compiled.start
+        self.accepts_empty = compiled.accepts_empty
+
+        term_rules: Dict[str, List[str]] = {}
+        for a, lefts in compiled.prods_term.items():
+            for A in lefts:
+                term_rules.setdefault(A, []).append(a)
+        bin_rules: Dict[str, List[Tuple[str, str]]] = {}
+        for (B, C), lefts in compiled.prods_bin.items():
+            for A in lefts:
+                bin_rules.setdefault(A, []).append((B, C))
+
+        names = compiled.names
+        self._term = [sorted(term_rules.get(A, ())) for A in names]
+        self._bin = [sorted((compiled.ids[B], compiled.ids[C]) for B, C in bin_rules.get(A, ()))
+                     for A in names]
+        self._start = compiled.ids.get(self.start)
+        # terminal -> [A] y (B, C) -> [A], para contar derivaciones de una cadena
+        ids = compiled.ids
+        self._leaf = {a: [ids[A] for A in lefts] for a, lefts in compiled.prods_term.items()}
+        self._pairs = {(ids[B], ids[C]): [ids[A] for A in lefts]
+                       for (B, C), lefts in compiled.prods_bin.items()}
+        # _counts[A][L]; la longitud 0 no tiene derivaciones en CNF
+        self._counts: List[List[int]] = [[0, len(terms)] for terms in self._term]
+        # (A, L) -> (acumulados, [(B, C, s)]) para elegir el bloque con bisect
+        self._blocks: Dict[Tuple[int, int], Tuple[List[int], List[Tuple[int, int, int]]]] = {}
+        # El contador se comparte desde la caché: las tablas crecen bajo lock
+        self._lock = threading.Lock()
+
+    def _extend(self, length: int):
+        """Completa las tablas de conteo hasta la longitud indicada."""
+        counts = self._counts
+        if not counts or len(counts[0]) > length:
+            return
+        with self._lock:
+            for L in range(len(counts[0]), length + 1):
+                row = []
+                for rules in self._bin:
+                    total = 0
+                    for B, C in rules:
+                        cb, cc = counts[B], counts[C]
+                        for s in range(1, L):
+                            left = cb[s]
+                            if left:
+                                total += left * cc[L - s]
+                    row.append(total)
+                # Se agrega la fila completa al final para que los lectores
+                # nunca vean una longitud a medio calcular
+                for A, total in enumerate(row):
+                    counts[A].append(total)
+
+    def count(self, length: int) -> int:
+        """Cantidad de derivaciones de longitud `length` desde el símbolo inicial."""
+        if length == 0:
+            return int(self.accepts_empty)
+        if self._start is None or length < 1:
+            return 0
+        self._extend(length)
+        return self._counts[self._start][length]
+
+    def _block(self, A: int, L: int):
+        key = (A, L)
+        entry = self._blocks.get(key)
+        if entry is None:
+            counts = self._counts
+            cumulative, parts = [], []
+            total = 0
+            for B, C in self._bin[A]:
+                for s in range(1, L):
+                    size = counts[B][s] * counts[C][L - s]
+                    if size:
+                        total += size
+                        cumulative.append(total)
+                        parts.append((B, C, s))
+            entry = self._blocks[key] = (cumulative, parts)
+        return entry
+
+    def unrank_tokens(self, length: int, k: int) -> List[str]:
+        """Tokens de la derivación con índice k entre las de longitud `length`."""
+        total = self.count(length)
+        if not 0 <= k < total:
+            raise IndexError(f"Índice {k} fuera de rango para longitud {length} ({total} derivaciones)")
+
+        if length == 0:
+            return []
+        counts = self._counts
+        tokens: List[str] = []
+        # Pila de (no terminal, longitud, índice); se procesa de izquierda a derecha
+        stack = [(self._start, length, k)]
+        while stack:
+            A, L, k = stack.pop()
+            if L == 1:
+                tokens.append(self._term[A][k])
+                continue
+            cumulative, parts = self._block(A, L)
+            pos = bisect_right(cumulative, k)
+            B, C, s = parts[pos]
+            if pos:
+                k -= cumulative[pos - 1]
+            left, right = divmod(k, counts[C][L - s])
+            stack.append((C, L - s, right))
+            stack.append((B, s, left))
+        return tokens
+
+    def derivations(self, tokens: Sequence[str]) -> int:
+        """Cantidad de derivaciones de `tokens` en la forma CNF (0 si no pertenece).
+
+        Es CYK con conteos en lugar de booleanos: O(n³·|G|) para n tokens.
+        Cada celda guarda solo los no terminales con conteo distinto de cero.
+        """
+        n = len(tokens)
+        if n == 0:
+            return int(self.accepts_empty)
+        if self._start is None:
+            return 0
+        pairs = self._pairs
+        # table[i][l]: id de no terminal -> derivaciones de tokens[i:i+l]
+        table: List[List[Dict[int, int]]] = []
+        for tok in tokens:
+            table.append([{}, {A: 1 for A in self._leaf.get(tok, ())}])
+        for l in range(2, n + 1):
+            for i in range(n - l + 1):
+                cell: Dict[int, int] = {}
+                row = table[i]
+                for s in range(1, l):
+                    left, right = row[s], table[i + s][l - s]
+                    if not left or not right:
+                        continue
+                    for B, cb in left.items():
+                        for C, cc in right.items():
+                            for A in pairs.get((B, C), ()):
+                                cell[A] = cell.get(A, 0) + cb * cc
+                row.append(cell)
+        return table[0][n].get(self._start, 0)
+
+    def unrank(self, length: int, k: int) -> str:
+        """Cadena de la derivación con índice k entre las de longitud `length`."""
+        return "".join(self.unrank_tokens(length, k))
+
+    def enumerate(self, length: int, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        """Cadenas de longitud `length` con índices en [offset, offset + limit).
+
+        Cada página se calcula de forma independiente, así que distintos
+        procesos pueden repartirse rangos de índices sin coordinarse.
+        """
+        total = self.count(length)
+        stop = total if limit is None else min(total, offset + limit)
+        for k in range(max(0, offset), stop):
+            yield self.unrank(length, k)
+
+
+_counters = GrammarCache(lambda grammar, key: LanguageCounter(grammar), CACHE_MAXSIZE)
+
+
+def language_counter(grammar: Grammar) -> LanguageCounter:
+    """Devuelve el LanguageCounter de la gramática, reutilizando la caché."""
+    return _counters.get(grammar)
+
+
+class _RegularCounter:
+    """Conteo y muestreo de cadenas por longitud sobre un AFD.
+
+    ways[L][q] es la cantidad de cadenas de longitud L que el AFD acepta
+    desde el estado q. Como el AFD es determinista, cada cadena tiene un
+    único camino: se cuentan cadenas distintas y no derivaciones.
+    """
+
+    def __init__(self, dfa: DFA):
+        self.dfa = dfa
+        self._ways: List[List[int]] = [[int(bool(f)) for f in dfa.accepting]]
+        self._lock = threading.Lock()
+
+    def _extend(self, length: int):
+        ways = self._ways
+        if len(ways) > length:
+            return
+        dfa = self.dfa
+        k = len(dfa.alphabet)
+        trans = dfa.transitions
+        with self._lock:
+            for _ in range(len(ways), length + 1):
+                prev = ways[-1]
+                row = []
+                for q in range(dfa.num_states):
+                    total = 0
+                    for t in trans[q * k:(q + 1) * k]:
+                        if t >= 0:
+                            total += prev[t]
+                    row.append(total)
+                ways.append(row)
+
+    def count(self, length: int) -> int:
+        """Cantidad de cadenas de longitud `length` del lenguaje."""
+        if length < 0:
+            return 0
+        self._extend(length)
+        return self._ways[length][self.dfa.start]
+
+    def sample(self, length: int, rng: random.Random) -> str:
+        """Cadena uniforme entre las de longitud `length` (count(length) > 0)."""
+        dfa = self.dfa
+        k = len(dfa.alphabet)
+        trans = dfa.transitions
+        ways = self._ways
+        q = dfa.start
+        tokens = []
+        for remaining in range(length, 0, -1):
+            r = rng.randrange(ways[remaining][q])
+            below = ways[remaining - 1]
+            for sym in range(k):
+                t = trans[q * k + sym]
+                if t < 0:
+                    continue
+                if r < below[t]:
+                    break
+                r -= below[t]
+            tokens.append(dfa.alphabet[sym])
+            q = t
+        return "".join(tokens)
+
+
+_regular_counters = GrammarCache(lambda grammar, key: _RegularCounter(compile_regular(grammar)),
+                                 CACHE_MAXSIZE)
+
+
+def sample_strings(grammar: Grammar, length: int, n: int = 1,
+                   seed: Optional[int] = None, over_strings: bool = False,
+                   max_attempts: int = SAMPLE_MAX_ATTEMPTS) -> List[str]:
+    """Muestrea n cadenas de longitud `length` al azar.
+
+    - Gramáticas regulares (type3): se cuentan las cadenas por longitud
+      sobre el AFD mínimo y se recorre eligiendo cada transición según
+      cuántas cadenas quedan por debajo. Uniforme sobre cadenas distintas;
+      tablas en O(L·|Q|·|Σ|) y cada muestra en O(L·|Σ|).
+    - Resto: se desranquea una derivación uniforme de LanguageCounter, en
+      O(L·|G|) por muestra tras la primera llamada. Es uniforme sobre
+      derivaciones, así que solo lo es sobre cadenas si la gramática no es
+      ambigua: una cadena con d árboles sale d veces más seguido.
+
+    Con over_strings=True el segundo caso también es uniforme sobre
+    cadenas: cada derivación se acepta con probabilidad 1/d, contando sus d
+    derivaciones en O(L³·|G|) (ver LanguageCounter.derivations). El número
+    esperado de intentos es el promedio de derivaciones por cadena, que en
+    gramáticas ambiguas crece exponencialmente con L; por eso se corta tras
+    max_attempts intentos.
+
+    Args:
+        grammar: Gramática a usar
+        length: longitud de las cadenas (en tokens)
+        n: cantidad de muestras (independientes, pueden repetirse)
+        seed: semilla para obtener resultados reproducibles
+        over_strings: muestrear uniformemente sobre cadenas en gramáticas
+            no regulares (por rechazo)
+        max_attempts: intentos máximos del muestreo por rechazo
+
+    Returns:
+        Lista con las n cadenas muestreadas
+
+    Raises:
+        ValueError: si no hay cadenas de esa longitud
+        RuntimeError: si el muestreo por rechazo agota max_attempts
+    """
+    if n < 0:
+        raise ValueError("n debe ser >= 0")
+    rng = random.Random(seed)
+    regular = None
+    if grammar.type == "type3":
+        try:
+            regular = _regular_counters.get(grammar)
+        except ValueError:
+            # No es lineal: se muestrea sobre la forma CNF
+            regular = None
+    if regular is not None:
+        if regular.count(length) == 0:
+            raise ValueError(f"La gramática no genera cadenas de longitud {length}")
+        return [regular.sample(length, rng) for _ in range(n)]
+
+    counter = language_counter(grammar)
+    total = counter.count(length)
+    if total == 0:
+        raise ValueError(f"La gramática no genera cadenas de longitud {length}")
+    if not over_strings:
+        return [counter.unrank(length, rng.randrange(total)) for _ in range(n)]
+
+    samples: List[str] = []
+    attempts = 0
+    while len(samples) < n:
+        if attempts == max_attempts:
+            raise RuntimeError(
+                f"Muestreo uniforme sobre cadenas: {max_attempts} intentos sin completar "
+                f"{n} muestras (la gramática es muy ambigua en longitud {length})")
+        attempts += 1
+        tokens = counter.unrank_tokens(length, rng.randrange(total))
+        # Una cadena con d derivaciones sale d veces más seguido: se
+        # compensa aceptándola con probabilidad 1/d
+        d = counter.derivations(tokens)
+        if d == 1 or rng.randrange(d) == 0:
+            samples.append("".join(tokens))
+    return samples
@@ -1,5 +1,110 @@
+import hashlib
 import json
-from typing import List, Dict
+from array import array
+from typing import List, Dict, FrozenSet, Sequence, Tuple
+
+from services.productions import Production, ProductionTable
+
+
+class _TrackedList(list):
+    """Lista que cuenta sus modificaciones.
+
+    Grammar la usa para N y T (P es una ProductionTable, que lleva su propio
+    contador): cada cambio incrementa `version` y así los índices de
+    producciones se reconstruyen solo cuando hace falta.
+    """
+
+    __slots__ = ("version",)
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self.version = 0
+
+    def __reduce__(self):
+        # pickle/copy reconstruyen la lista con su contenido, sin pasar por
+        # los métodos contados
+        return self.__class__, (list(self),)
+
+
+def _tracked(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(_TrackedList, _name, _tracked(_name))
+
+
+class _Indexes:
+    """Índices de producciones de una gramática (ver Grammar._index).
+
+    Cada índice guarda, por clave, un array('i') con las posiciones de las
+    reglas en P; las claves son ids de símbolos de la ProductionTable (una
+    tupla de ids para el lado derecho completo). Las vistas Production se
+    crean recién al consultar, así el índice ocupa unos pocos enteros por
+    regla en vez de un objeto por regla y por índice.
+    """
+
+    __slots__ = ("key", "N", "T", "table", "by_left", "by_rhs", "by_first", "by_last")
+
+    def __init__(self, grammar: "Grammar", key: Tuple[int, int, int]):
+        self.key = key
+        self.N: FrozenSet[str] = frozenset(grammar.N)
+        self.T: FrozenSet[str] = frozenset(grammar.T)
+        table = self.table = grammar.P
+        lefts, offsets, rhs = table.lefts, table.offsets, table.rhs
+        by_left: Dict[int, array] = {}
+        by_rhs: Dict[Tuple[int, ...], array] = {}
+        by_first: Dict[int, array] = {}
+        by_last: Dict[int, array] = {}
+        for k in range(len(lefts)):
+            lo, hi = offsets[k], offsets[k + 1]
+            _bucket(by_left, lefts[k]).append(k)
+            _bucket(by_rhs, tuple(rhs[lo:hi])).append(k)
+            if hi > lo:
+                _bucket(by_first, rhs[lo]).append(k)
+                _bucket(by_last, rhs[hi - 1]).append(k)
+        self.by_left = by_left
+        self.by_rhs = by_rhs
+        self.by_first = by_first
+        self.by_last = by_last
+
+    def views(self, index: Dict, symbol: str) -> Tuple[Production, ...]:
+        """Vistas de las reglas de `index` bajo el símbolo `symbol`."""
+        sid = self.table._ids.get(symbol)
+        if sid is None:
+            return ()
+        return self._views(index.get(sid))
+
+    def views_by_rhs(self, right: Sequence[str]) -> Tuple[Production, ...]:
+        """Vistas de las reglas cuyo lado derecho es exactamente `right`."""
+        ids = self.table._ids
+        try:
+            key = tuple(ids[s] for s in right)
+        except KeyError:
+            return ()
+        return self._views(self.by_rhs.get(key))
+
+    def _views(self, rules) -> Tuple[Production, ...]:
+        if not rules:
+            return ()
+        table = self.table
+        return tuple(Production(table, k) for k in rules)
+
+
+def _bucket(index: Dict, key) -> array:
+    rules = index.get(key)
+    if rules is None:
+        rules = index[key] = array("i")
+    return rules
 
 
 class Grammar:
@@ -11,16 +116,87 @@ class Grammar:
             N: No terminales (variables)
             T: Terminales (alfabeto)
             P: Producciones [{"left": "A", "right": ["a", "B"]}, ...]
+               (se guardan en una ProductionTable compacta)
             S: Símbolo inicial
             gtype: "type2" (GLC) o "type3" (Regular)
         """
         self.N = list(N)
         # Filtrar terminales que coincidan con no terminales
         self.T = [t for t in T if t not in self.N]
-        self.P = list(P)
+        self.P = P
         self.S = S
         self.type = gtype
 
+    def __setattr__(self, name, value):
+        # N y T se guardan como listas que registran sus cambios y P como
+        # ProductionTable; al reasignarlas se descartan los índices construidos
+        # y la huella memorizada
+        if name in ("N", "T"):
+            value = _TrackedList(value)
+            object.__setattr__(self, "_indexes", None)
+            object.__setattr__(self, "_fingerprint", None)
+        elif name == "P":
+            value = ProductionTable(value)
+            object.__setattr__(self, "_indexes", None)
+            object.__setattr__(self, "_fingerprint", None)
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        # Los índices y la huella se reconstruyen al usarlos; no se copian
+        # ni serializan
+        state = self.__dict__.copy()
+        state["_indexes"] = None
+        state["_fingerprint"] = None
+        return state
+
+    def _index(self) -> _Indexes:
+        """Índices de producciones, construidos la primera vez que se piden.
+
+        Se reconstruyen si N, T o P cambiaron desde la última vez (agregar,
+        quitar o reemplazar elementos, o reasignar la lista). Las
+        producciones de P son vistas de solo lectura: para cambiar una regla
+        se reemplaza su posición en P.
+        """
+        key = (self.N.version, self.T.version, self.P.version)
+        indexes = self._indexes
+        if indexes is None or indexes.key != key:
+            indexes = _Indexes(self, key)
+            object.__setattr__(self, "_indexes", indexes)
+        return indexes
+
+    @property
+    def nonterminal_set(self) -> FrozenSet[str]:
+        """Vista inmutable de N para pruebas de pertenencia en O(1)."""
+        return self._index().N
+
+    @property
+    def terminal_set(self) -> FrozenSet[str]:
+        """Vista inmutable de T para pruebas de pertenencia en O(1)."""
+        return self._index().T
+
+    def productions_by_left(self, left: str) -> Tuple[Production, ...]:
+        """Producciones con lado izquierdo `left`, en el orden de P."""
+        indexes = self._index()
+        return indexes.views(indexes.by_left, left)
+
+    def productions_by_rhs(self, right: Sequence[str]) -> Tuple[Production, ...]:
+        """Producciones cuyo lado derecho es exactamente `right`."""
+        return self._index().views_by_rhs(right)
+
+    def productions_by_pair(self, B: str, C: str) -> Tuple[Production, ...]:
+        """Producciones A -> B C."""
+        return self._index().views_by_rhs((B, C))
+
+    def productions_by_first(self, symbol: str) -> Tuple[Production, ...]:
+        """Producciones cuyo lado derecho empieza con `symbol`."""
+        indexes = self._index()
+        return indexes.views(indexes.by_first, symbol)
+
+    def productions_by_last(self, symbol: str) -> Tuple[Production, ...]:
+        """Producciones cuyo lado derecho termina con `symbol`."""
+        indexes = self._index()
+        return indexes.views(indexes.by_last, symbol)
+
     @classmethod
     def from_dict(cls, d: Dict):
         """Crea una gramática desde un diccionario."""
@@ -38,7 +214,7 @@ class Grammar:
             "type": self.type, 
             "N": self.N, 
             "T": self.T, 
-            "P": self.P, 
+            "P": self.P.to_list(), 
             "S": self.S
         }
 
@@ -53,6 +229,23 @@ class Grammar:
         with open(path, "r", encoding="utf-8") as f:
             return cls.from_dict(json.load(f))
 
+    def fingerprint(self) -> str:
+        """Hash del contenido de la gramática (tipo, N, T, P y S).
+
+        Dos gramáticas con el mismo contenido tienen la misma huella, lo que
+        permite reutilizar resultados precalculados como la forma CNF.
+        La huella se memoriza y solo se recalcula si N, T, P, S o el tipo
+        cambiaron desde la última vez.
+        """
+        key = (self.N.version, self.T.version, self.P.version, self.S, self.type)
+        memo = self._fingerprint
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        data = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False)
+        value = hashlib.sha1(data.encode("utf-8")).hexdigest()
+        object.__setattr__(self, "_fingerprint", (key, value))
+        return value
+
     def validate(self) -> bool:
         """Validaciones básicas de la gramática.
         
@@ -61,22 +254,23 @@ class Grammar:
         - Lado izquierdo de producciones pertenece a N
         - Lado derecho solo contiene símbolos de N o T
         """
-        if self.S not in self.N:
+        N, T = self.nonterminal_set, self.terminal_set
+        if self.S not in N:
             return False
 
         # N y T deben ser disjuntos (por si acaso)
-        if set(self.N) & set(self.T):
+        if N & T:
             return False
         
         for p in self.P:
             left = p.get("left")
             right = p.get("right", [])
             
-            if left not in self.N:
+            if left not in N:
                 return False
             
             for sym in right:
-                if sym not in self.N and sym not in self.T:
+                if sym not in N and sym not in T:
                     return False
         
         return True
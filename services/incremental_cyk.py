@@ -0,0 +1,224 @@
+"""
+Análisis CYK incremental para entradas que se editan.
+
+IncrementalCYK conserva la tabla de pertenencia del motor bitset (una
+máscara de no terminales por celda) y, ante una edición (offset, borrados,
+insertados), recalcula solo las celdas cuyo segmento se superpone con la
+edición. Las celdas a la izquierda se conservan tal cual y las de la derecha
+se reutilizan desplazadas: cada fila de la tabla que empieza después de la
+edición se traslada completa, sin copiarla.
+
+También se aprovechan las celdas que cubren la edición: si ninguno de sus
+hijos cambió respecto al análisis anterior, los splits que no cruzan la
+edición siguen dando lo mismo, así que solo se combinan los splits nuevos
+(dentro de lo insertado, o en la unión si fue un borrado puro) y los que
+desaparecieron (dentro de lo borrado). Si lo que aportaban los splits
+desaparecidos también lo aportan los nuevos, la celda es su valor anterior
+más lo nuevo; si no, se recombina entera. Así los cambios dejan de
+propagarse en cuanto la tabla vuelve a coincidir con la anterior.
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+from services.grammar import Grammar
+from services.compiled_grammar import CompiledGrammar, compile_grammar
+from services.parser_cyk import LazyBackpointers, cyk_parse
+from services.cancellation import ProgressCallback, check_cancelled
+
+
+class IncrementalCYK:
+    """Parser CYK que reutiliza la tabla anterior al editar la entrada.
+
+    Uso:
+        parser = IncrementalCYK(grammar, tokens)
+        parser.edit(offset, deleted, inserted)   # o parser.reparse(nuevos)
+        parser.accepted, parser.backpointers()
+
+    parse, edit y reparse aceptan `cancel` y `progress` como cyk_parse. Si
+    se cancelan lanzan Cancelled y el parser conserva el análisis anterior.
+
+    Atributos:
+        compiled: gramática compilada usada
+        tokens: tokens analizados actualmente
+        chart: chart[i][l] = máscara de los no terminales que derivan
+               tokens[i:i+l] (las filas pueden tener posiciones de sobra)
+        accepted: si tokens pertenece al lenguaje
+        recomputed: celdas cuyos splits se recombinaron en la última operación
+    """
+
+    def __init__(self, grammar: Union[Grammar, CompiledGrammar], tokens: Sequence[str] = ()):
+        self.compiled = grammar if isinstance(grammar, CompiledGrammar) else compile_grammar(grammar)
+        self.parse(tokens)
+
+    def parse(self, tokens: Sequence[str], cancel: Optional[threading.Event] = None,
+              progress: Optional[ProgressCallback] = None) -> bool:
+        """Analiza `tokens` desde cero y retorna si la cadena es aceptada."""
+        tokens = list(tokens)
+        n = len(tokens)
+        if n == 0:
+            chart: List[List[int]] = []
+            accepted = self.compiled.accepts_empty
+        else:
+            accepted, lazy = cyk_parse(self.compiled, tokens, engine="bitset", backpointers="lazy",
+                                       cancel=cancel, progress=progress)
+            chart = lazy.chart
+        self.tokens: List[str] = tokens
+        self.chart = chart
+        self.accepted = accepted
+        self.recomputed = n * (n - 1) // 2
+        return accepted
+
+    def _combine(self, chart: List[List[int]], i: int, l: int, s_lo: int, s_hi: int) -> int:
+        """Máscara de los A -> BC con B en (i, s) y C en (i+s, l-s), s en [s_lo, s_hi)."""
+        right_mask = self.compiled.right_mask
+        parents = self.compiled.parents
+        row = chart[i]
+        cell = 0
+        for s in range(s_lo, s_hi):
+            left = row[s]
+            if not left:
+                continue
+            right = chart[i + s][l - s]
+            if not right:
+                continue
+            while left:
+                low = left & -left
+                left ^= low
+                b = low.bit_length() - 1
+                hits = right & right_mask[b]
+                if not hits:
+                    continue
+                pb = parents[b]
+                while hits:
+                    low_c = hits & -hits
+                    hits ^= low_c
+                    cell |= pb[low_c.bit_length() - 1]
+        return cell
+
+    def edit(self, offset: int, deleted: int, inserted: Sequence[str],
+             cancel: Optional[threading.Event] = None,
+             progress: Optional[ProgressCallback] = None) -> bool:
+        """Reemplaza tokens[offset:offset+deleted] por `inserted` y reanaliza.
+
+        Solo se recalculan las celdas (i, l) cuyo segmento se superpone con
+        la zona editada; el resto de la tabla se reutiliza.
+
+        Returns:
+            Si la nueva cadena es aceptada
+        """
+        n = len(self.tokens)
+        if not 0 <= offset <= n or deleted < 0 or offset + deleted > n:
+            raise ValueError(f"Edición fuera de rango: offset={offset}, borrados={deleted}, longitud={n}")
+        inserted = list(inserted)
+        o, d, m = offset, deleted, len(inserted)
+        tokens = self.tokens[:o] + inserted + self.tokens[o + d:]
+        n2 = len(tokens)
+        old = self.chart
+
+        # Filas de la nueva tabla: a la izquierda se copian las celdas que
+        # terminan antes de la edición, a la derecha se trasladan las filas
+        # completas y las que empiezan dentro de lo insertado se recalculan.
+        shift = d - m
+        chart: List[List[int]] = []
+        for i in range(n2):
+            if i < o:
+                row = old[i][:o - i + 1]
+                row.extend([0] * (n2 - o))
+            elif i >= o + m:
+                row = old[i + shift]
+            else:
+                row = [0] * (n2 - i + 1)
+            chart.append(row)
+
+        # Una celda que cubre toda la edición tiene su equivalente (i, l - m + d)
+        # en la tabla anterior. Los splits del equivalente que no caen dentro
+        # de lo borrado corresponden a splits de la celda nueva con hijos
+        # equivalentes; los que caen dentro desaparecen y los que caen dentro
+        # de lo insertado son nuevos. En un borrado puro, los dos splits en los
+        # bordes de lo borrado desaparecen y el split en la unión es nuevo.
+        # fin -> mayor inicio, e inicio -> menor fin, de las celdas que cubren
+        # la edición y cambiaron respecto a su equivalente
+        changed_start: Dict[int, int] = {}
+        changed_end: Dict[int, int] = {}
+
+        def mark_changed(i, e):
+            if changed_start.get(e, -1) < i:
+                changed_start[e] = i
+            if changed_end.get(i, n2 + 1) > e:
+                changed_end[i] = e
+
+        term_mask = self.compiled.term_mask
+        for i in range(o, o + m):
+            chart[i][1] = term_mask.get(tokens[i], 0)
+        if m == 1 and not (d == 1 and chart[o][1] == old[o][1]):
+            mark_changed(o, o + 1)
+
+        recomputed = 0
+        for l in range(2, n2 + 1):
+            # celdas con i < o + m e i + l > o
+            for i in range(max(0, o - l + 1), min(o + m, n2 - l + 1)):
+                check_cancelled(cancel)
+                e = i + l
+                if i <= o and e >= o + m:
+                    old_l = l - m + d
+                    # el equivalente debe ser una celda binaria, no la de un terminal
+                    has_old = old_l >= 2
+                    cell = None
+                    if has_old and changed_start.get(e, -1) <= i and changed_end.get(i, n2 + 1) >= e:
+                        # ningún hijo cambió: solo se combinan los splits
+                        # nuevos y los que desaparecieron
+                        if m:
+                            added = self._combine(chart, i, l, o - i + 1, o + m - i)
+                            lost = self._combine(old, i, old_l, o - i + 1, o + d - i)
+                        else:
+                            added = self._combine(chart, i, l, o - i, o - i + 1)
+                            lost = self._combine(old, i, old_l, o - i, o + d - i + 1)
+                        if not lost & ~added:
+                            cell = old[i][old_l] | added
+                    if cell is None:
+                        cell = self._combine(chart, i, l, 1, l)
+                        recomputed += 1
+                    if not has_old or cell != old[i][old_l]:
+                        mark_changed(i, e)
+                else:
+                    cell = self._combine(chart, i, l, 1, l)
+                    recomputed += 1
+                chart[i][l] = cell
+            if progress is not None:
+                progress(l / n2)
+
+        # Solo se escribió en filas nuevas o copiadas: si el trabajo se
+        # cancela antes de este punto, la tabla anterior sigue intacta
+        self.tokens = tokens
+        self.chart = chart
+        self.recomputed = recomputed
+        if n2 == 0:
+            self.accepted = self.compiled.accepts_empty
+        else:
+            start = self.compiled.ids.get(self.compiled.start)
+            self.accepted = start is not None and bool(chart[0][n2] >> start & 1)
+        return self.accepted
+
+    def reparse(self, tokens: Sequence[str], cancel: Optional[threading.Event] = None,
+                progress: Optional[ProgressCallback] = None) -> bool:
+        """Analiza `tokens` reutilizando el análisis anterior.
+
+        La edición se deduce quitando el prefijo y el sufijo comunes con los
+        tokens actuales.
+        """
+        tokens = list(tokens)
+        old = self.tokens
+        limit = min(len(old), len(tokens))
+        prefix = 0
+        while prefix < limit and old[prefix] == tokens[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == tokens[-1 - suffix]:
+            suffix += 1
+        return self.edit(prefix, len(old) - prefix - suffix, tokens[prefix:len(tokens) - suffix],
+                         cancel=cancel, progress=progress)
+
+    def backpointers(self) -> LazyBackpointers:
+        """Backpointers perezosos sobre la tabla actual (ver LazyBackpointers)."""
+        return LazyBackpointers(self.compiled, self.tokens, self.chart)
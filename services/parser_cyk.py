@@ -1,148 +1,100 @@
-from collections import defaultdict, deque
-from typing import List, Dict, Tuple
+from array import array
+from collections.abc import Mapping
+import threading
+from typing import List, Dict, Tuple, Optional, Union
 from services.grammar import Grammar
+from services.cnf import is_cnf, convert_to_cnf  # reexportadas por compatibilidad
+from services.compiled_grammar import CompiledGrammar, compile_grammar, np
+from services.tree import TreeNode
+from services.cancellation import ProgressCallback, check_cancelled, span_progress
 
-def is_cnf(grammar: Grammar) -> bool:
-    """Verifica estructuras básicas de CNF: cada producción es A->BC o A->a.
-    No comprueba epsilons ni unit rules exhaustivamente.
-    """
-    for p in grammar.P:
-        left = p.get("left")
-        right = p.get("right", [])
-        if len(right) == 1:
-            # debe ser terminal
-            if right[0] not in grammar.T:
-                return False
-        elif len(right) == 2:
-            if right[0] not in grammar.N or right[1] not in grammar.N:
-                return False
-        else:
-            return False
-    return True
+ENGINES = ("auto", "sets", "bitset", "numpy")
 
-def convert_to_cnf(grammar: Grammar) -> Grammar:
-    """
-    Conversión mínima a CNF:
-    - Reemplaza terminales en RHS de longitud>1 por variables nuevas.
-    - Descompone producciones largas en binarias.
-    - Elimina unit-productions (A -> B) propagando las producciones de B en A.
-    Nota: no implementa eliminación completa de epsilons generales; si hay epsilons se lanza NotImplementedError.
-    """
-    # Rechazar epsilons globales (simplificación)
-    for p in grammar.P:
-        if len(p.get("right", [])) == 0:
-            raise NotImplementedError("Conversión a CNF no soporta epsilons en esta implementación.")
-
-    newN = set(grammar.N)
-    newP = [ {"left": p["left"], "right": list(p["right"])} for p in grammar.P ]
-
-    # 1) Reemplazar terminales en reglas de longitud >=2 por nuevas variables
-    term_map = {}
-    term_counter = 0
-    for p in list(newP):
-        if len(p["right"]) >= 2:
-            new_right = []
-            for sym in p["right"]:
-                if sym in grammar.T:
-                    if sym not in term_map:
-                        # crear nuevo no-terminal para este terminal
-                        nt = f"@T{term_counter}"
-                        term_counter += 1
-                        while nt in newN:
-                            nt = f"@T{term_counter}"
-                            term_counter += 1
-                        term_map[sym] = nt
-                        newN.add(nt)
-                        newP.append({"left": nt, "right": [sym]})
-                    new_right.append(term_map[sym])
-                else:
-                    new_right.append(sym)
-            p["right"] = new_right
-
-    # 2) Descomponer producciones largas (>2) en binarias
-    bin_counter = 0
-    updatedP = []
-    for p in newP:
-        left = p["left"]
-        right = p["right"]
-        if len(right) <= 2:
-            updatedP.append({"left": left, "right": right})
-        else:
-            cur_left = left
-            for i in range(len(right) - 2):
-                new_nt = f"@X{bin_counter}"
-                bin_counter += 1
-                while new_nt in newN:
-                    new_nt = f"@X{bin_counter}"
-                    bin_counter += 1
-                newN.add(new_nt)
-                updatedP.append({"left": cur_left, "right": [right[i], new_nt]})
-                cur_left = new_nt
-            updatedP.append({"left": cur_left, "right": [right[-2], right[-1]]})
-
-    # 3) Eliminar unit-productions (A -> B) propagando RHS de B a A
-    prods_by_left = defaultdict(list)
-    for p in updatedP:
-        prods_by_left[p["left"]].append(p["right"])
-
-    finalP = []
-    for A in list(newN):
-        # recorrido BFS de unit-links desde A
-        queue = deque([A])
-        seen = set([A])
-        while queue:
-            B = queue.popleft()
-            for rhs in prods_by_left.get(B, []):
-                # unit production
-                if len(rhs) == 1 and rhs[0] in newN:
-                    C = rhs[0]
-                    if C not in seen:
-                        seen.add(C)
-                        queue.append(C)
-                else:
-                    # no-unit production -> A -> rhs
-                    finalP.append({"left": A, "right": rhs})
-
-    # eliminar duplicados
-    unique = []
-    seen_set = set()
-    for p in finalP:
-        tup = (p["left"], tuple(p["right"]))
-        if tup not in seen_set:
-            seen_set.add(tup)
-            unique.append(p)
-
-    return Grammar(list(newN), grammar.T, unique, grammar.S, grammar.type)
-
-
-def cyk_parse(grammar: Grammar, w: List[str]) -> Tuple[bool, Dict]:
+BACKPOINTER_MODES = ("dict", "array", "lazy")
+
+# Longitud de entrada a partir de la cual engine="auto" usa el motor numpy
+NUMPY_THRESHOLD = 200
+
+# Máximo de no terminales (en CNF) con el que engine="auto" usa el motor
+# numpy: cada split le cuesta |N|² operaciones aunque la tabla esté casi
+# vacía, mientras que el motor bitset solo recorre los no terminales presentes
+NUMPY_MAX_NONTERMINALS = 16
+
+# Máximo de elementos (inicio x split x no terminal) por bloque vectorizado
+_NUMPY_BLOCK = 1 << 22
+
+
+def cyk_parse(grammar: Union[Grammar, CompiledGrammar], w: List[str], engine: str = "auto",
+              numpy_threshold: Optional[int] = None, backpointers: str = "dict",
+              acceptance_only: bool = False, cancel: Optional[threading.Event] = None,
+              progress: Optional[ProgressCallback] = None) -> Tuple[bool, Optional[Mapping]]:
     """CYK parse.
     Retorna: (aceptada_bool, backpointer_dict)
     backpointer_dict contiene claves (i,len,A) -> ('term', token) o (split, B, C)
+
+    grammar puede ser una Grammar (se compila usando la caché de
+    compile_grammar) o una CompiledGrammar ya construida.
+
+    engine:
+        "auto": "numpy" si está instalado, len(w) >= numpy_threshold y la forma
+                CNF tiene a lo sumo NUMPY_MAX_NONTERMINALS no terminales; si
+                no "bitset"
+        "sets": tabla de conjuntos de no terminales (implementación original)
+        "bitset": cada celda es un entero usado como máscara de bits
+        "numpy": tabla booleana (n, n+1, |N|) procesada con operaciones vectorizadas;
+                 solo devuelve los backpointers de una derivación desde S
+    numpy_threshold: umbral para "auto" (por defecto NUMPY_THRESHOLD)
+
+    backpointers: cómo se guardan los backpointers (mismo formato de acceso):
+        "dict": dict de tuplas (i, len, A), como siempre
+        "array": ArrayBackpointers, un entero de 64 bits por celda y no
+                 terminal en un array('q') (motor bitset)
+        "lazy": LazyBackpointers, solo la tabla de pertenencia en máscaras de
+                bits; cada backpointer se recalcula al pedirlo buscando un
+                split válido (motor bitset)
+    acceptance_only: si es True no se construye ningún backpointer y se
+        retorna (aceptada, None)
+    cancel: evento que, al activarse, interrumpe el análisis con Cancelled
+        (se consulta en cada celda de la tabla)
+    progress: recibe la fracción del trabajo completada tras cada longitud
     """
-    # Si no está en CNF, intentar convertir automáticamente
-    if not is_cnf(grammar):
-        try:
-            grammar = convert_to_cnf(grammar)
-        except NotImplementedError as e:
-            raise NotImplementedError("La gramática debe estar en CNF o convertible (sin epsilons). " + str(e))
-
-    prods_term = defaultdict(set)
-    prods_bin = defaultdict(set)
-
-    for p in grammar.P:
-        left = p["left"]
-        right = tuple(p["right"])
-        if len(right) == 1 and right[0] in grammar.T:
-            prods_term[right[0]].add(left)
-        elif len(right) == 2:
-            prods_bin[(right[0], right[1])].add(left)
+    if engine not in ENGINES:
+        raise ValueError(f"Motor CYK desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+    if backpointers not in BACKPOINTER_MODES:
+        raise ValueError(f"Modo de backpointers desconocido: {backpointers!r} "
+                         f"(opciones: {', '.join(BACKPOINTER_MODES)})")
+    if acceptance_only:
+        backpointers = None
+    if engine == "numpy" and np is None:
+        raise ImportError("El motor CYK 'numpy' requiere numpy: pip install numpy")
+    if engine in ("sets", "numpy") and backpointers in ("array", "lazy"):
+        raise ValueError(f"El modo de backpointers {backpointers!r} requiere el motor 'bitset'")
+
+    # Si no está en CNF, se convierte una sola vez y se reutiliza desde la caché
+    compiled = grammar if isinstance(grammar, CompiledGrammar) else compile_grammar(grammar)
+
+    if engine == "auto":
+        threshold = NUMPY_THRESHOLD if numpy_threshold is None else numpy_threshold
+        if (np is not None and len(w) >= threshold and backpointers in ("dict", None)
+                and len(compiled.names) <= NUMPY_MAX_NONTERMINALS):
+            engine = "numpy"
+        else:
+            engine = "bitset"
 
     n = len(w)
     if n == 0:
-        # no tratamos epsilon aquí
-        return False, {}
+        # en CNF solo el inicial puede derivar ε (regla S -> ε)
+        return compiled.accepts_empty, (None if backpointers is None else {})
 
+    if engine == "numpy":
+        return _cyk_numpy(compiled, w, build_back=backpointers is not None,
+                          cancel=cancel, progress=progress)
+    if engine == "bitset" or backpointers is None:
+        # sin backpointers el motor bitset es siempre el más barato
+        return _cyk_bitset(compiled, w, backpointers, cancel=cancel, progress=progress)
+
+    prods_term = compiled.prods_term
+    prods_bin = compiled.prods_bin
     T = [[set() for _ in range(n+1)] for __ in range(n)]
     back = {}
 
@@ -154,6 +106,7 @@ def cyk_parse(grammar: Grammar, w: List[str]) -> Tuple[bool, Dict]:
 
     for l in range(2, n+1):
         for i in range(0, n-l+1):
+            check_cancelled(cancel)
             for s in range(1, l):
                 left_set = T[i][s]
                 right_set = T[i+s][l-s]
@@ -163,22 +116,349 @@ def cyk_parse(grammar: Grammar, w: List[str]) -> Tuple[bool, Dict]:
                             if A not in T[i][l]:
                                 T[i][l].add(A)
                                 back[(i,l,A)] = (s, B, C)
+        if progress is not None:
+            progress(span_progress(n, l))
+
+    aceptada = compiled.start in T[0][n] if n > 0 else False
+    return aceptada, back
+
+
+def _cyk_bitset(compiled: CompiledGrammar, w: List[str], mode: Optional[str] = "dict",
+                cancel: Optional[threading.Event] = None,
+                progress: Optional[ProgressCallback] = None) -> Tuple[bool, Optional[Mapping]]:
+    """Motor CYK con celdas codificadas como máscaras de bits.
+
+    Cada no terminal recibe una posición de bit. Para cada no terminal B se
+    precalcula la máscara de los C que pueden acompañarlo a la derecha
+    (right_mask[B]) y, para cada par (B, C), la máscara de los padres A con
+    A -> BC. Combinar dos celdas se reduce a operaciones AND/OR sobre enteros.
+    Produce backpointers con el mismo formato que el motor de conjuntos
+    (mode="dict"), en un ArrayBackpointers ("array"), perezosos ("lazy") o
+    ninguno (None).
+    """
+    names = compiled.names
+    term_mask = compiled.term_mask
+    right_mask = compiled.right_mask
+    parents = compiled.parents
+
+    n = len(w)
+    T = [[0] * (n + 1) for _ in range(n)]
+    back = {} if mode == "dict" else None
+    packed = ArrayBackpointers(compiled, w) if mode == "array" else None
+
+    for i in range(n):
+        token = w[i]
+        mask = term_mask.get(token, 0)
+        T[i][1] = mask
+        if back is not None:
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                back[(i, 1, names[low.bit_length() - 1])] = ("term", token)
+        elif packed is not None:
+            packed.set_terminals(i, mask)
+
+    for l in range(2, n + 1):
+        for i in range(0, n - l + 1):
+            check_cancelled(cancel)
+            cell = 0
+            base = packed.base(i, l) if packed is not None else 0
+            for s in range(1, l):
+                left = T[i][s]
+                if not left:
+                    continue
+                right = T[i + s][l - s]
+                if not right:
+                    continue
+                while left:
+                    low = left & -left
+                    left ^= low
+                    b = low.bit_length() - 1
+                    hits = right & right_mask[b]
+                    if not hits:
+                        continue
+                    pb = parents[b]
+                    while hits:
+                        low_c = hits & -hits
+                        hits ^= low_c
+                        c = low_c.bit_length() - 1
+                        new = pb[c] & ~cell
+                        if not new:
+                            continue
+                        cell |= new
+                        if back is not None:
+                            while new:
+                                low_a = new & -new
+                                new ^= low_a
+                                back[(i, l, names[low_a.bit_length() - 1])] = (s, names[b], names[c])
+                        elif packed is not None:
+                            code = (s << 40) | (b << 20) | c
+                            data = packed.data
+                            while new:
+                                low_a = new & -new
+                                new ^= low_a
+                                data[base + low_a.bit_length() - 1] = code
+            T[i][l] = cell
+        if progress is not None:
+            progress(span_progress(n, l))
 
-    aceptada = grammar.S in T[0][n] if n > 0 else False
+    start = compiled.ids.get(compiled.start)
+    aceptada = start is not None and bool(T[0][n] >> start & 1)
+    if mode == "lazy":
+        return aceptada, LazyBackpointers(compiled, w, T)
+    if mode == "array":
+        return aceptada, packed
     return aceptada, back
 
-def reconstruct_tree(back: Dict, i: int, l: int, A: str) -> Tuple:
+
+def _cyk_numpy(compiled: CompiledGrammar, w: List[str], build_back: bool = True,
+               cancel: Optional[threading.Event] = None,
+               progress: Optional[ProgressCallback] = None) -> Tuple[bool, Optional[Dict]]:
+    """Motor CYK vectorizado con numpy.
+
+    La tabla es un arreglo booleano chart[i, l, A] de forma (n, n+1, |N|) y las
+    reglas binarias forman un tensor rules[A, B, C]. Para cada longitud l se
+    procesan todas las posiciones de inicio a la vez: los pares (B, C)
+    presentes en algún split se obtienen con un producto matricial por lotes y
+    se proyectan sobre los padres A con un segundo producto contra el tensor
+    de reglas.
+
+    Solo se almacena la tabla de pertenencia; si la cadena es aceptada se
+    reconstruyen los backpointers de una única derivación desde S.
+    """
+    names, ids = compiled.names, compiled.ids
+    k = len(names)
+    n = len(w)
+
+    chart = np.zeros((n, n + 1, k), dtype=bool)
+    for i, token in enumerate(w):
+        for A in compiled.prods_term.get(token, ()):
+            chart[i, 1, ids[A]] = True
+
+    rules = compiled.numpy_rules()
+    # (B*k + C) -> A, en float32 para que el producto use BLAS
+    rules_flat = rules.reshape(k, k * k).T.astype(np.float32)
+
+    for l in range(2, n + 1):
+        m = n - l + 1
+        splits = np.arange(1, l)
+        block = max(1, _NUMPY_BLOCK // max(1, (l - 1) * k))
+        for lo in range(0, m, block):
+            check_cancelled(cancel)
+            hi = min(m, lo + block)
+            starts = np.arange(lo, hi)[:, None]
+            left = chart[starts, splits[None, :]]                  # (b, l-1, k)
+            right = chart[starts + splits[None, :], l - splits]    # (b, l-1, k)
+            pairs = np.matmul(left.transpose(0, 2, 1).astype(np.float32),
+                              right.astype(np.float32))            # (b, k, k)
+            chart[lo:hi, l] = pairs.reshape(hi - lo, k * k) @ rules_flat > 0
+        if progress is not None:
+            progress(span_progress(n, l))
+
+    start = ids.get(compiled.start)
+    aceptada = start is not None and bool(chart[0, n, start])
+    if not build_back:
+        return aceptada, None
+    back = {}
+    if not aceptada:
+        return False, back
+
+    # Backpointers de una derivación, de arriba hacia abajo
+    stack = [(0, n, start)]
+    while stack:
+        i, l, a = stack.pop()
+        key = (i, l, names[a])
+        if key in back:
+            continue
+        if l == 1:
+            back[key] = ("term", w[i])
+            continue
+        for s in range(1, l):
+            candidates = rules[a] & np.outer(chart[i, s], chart[i + s, l - s])
+            if candidates.any():
+                b, c = np.argwhere(candidates)[0]
+                back[key] = (s, names[b], names[c])
+                stack.append((i, s, int(b)))
+                stack.append((i + s, l - s, int(c)))
+                break
+    return True, back
+
+
+class ArrayBackpointers(Mapping):
+    """Backpointers guardados en un array('q') indexado por celda y no terminal.
+
+    Las celdas (i, l) se numeran por longitud (fila l con n-l+1 celdas) y
+    cada una reserva |N| enteros de 64 bits: 0 = ausente, 1 = terminal y
+    (split << 40) | (id B << 20) | id C para A -> BC. Se accede como el dict
+    de backpointers: back[(i, l, A)] -> ("term", token) o (split, B, C).
+    """
+
+    def __init__(self, compiled: CompiledGrammar, w: List[str]):
+        self.names = compiled.names
+        self.ids = compiled.ids
+        self.w = w
+        self.k = max(1, len(self.names))
+        n = len(w)
+        # row_start[l] = primera celda de longitud l
+        self.row_start = [0] * (n + 2)
+        for l in range(1, n + 1):
+            self.row_start[l + 1] = self.row_start[l] + (n - l + 1)
+        self.data = array("q", bytes(8 * self.row_start[n + 1] * self.k))
+
+    def base(self, i: int, l: int) -> int:
+        """Posición de la primera entrada de la celda (i, l)."""
+        return (self.row_start[l] + i) * self.k
+
+    def set_terminals(self, i: int, mask: int):
+        base = self.base(i, 1)
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            self.data[base + low.bit_length() - 1] = 1
+
+    def _code(self, key) -> int:
+        i, l, A = key
+        a = self.ids.get(A)
+        if a is None or l < 1 or i < 0 or i + l > len(self.w):
+            return 0
+        return self.data[self.base(i, l) + a]
+
+    def __contains__(self, key) -> bool:
+        return self._code(key) != 0
+
+    def __getitem__(self, key):
+        code = self._code(key)
+        if code == 0:
+            raise KeyError(key)
+        if code == 1:
+            return ("term", self.w[key[0]])
+        return (code >> 40, self.names[(code >> 20) & 0xFFFFF], self.names[code & 0xFFFFF])
+
+    def __iter__(self):
+        n = len(self.w)
+        for l in range(1, n + 1):
+            for i in range(n - l + 1):
+                base = self.base(i, l)
+                for a, name in enumerate(self.names):
+                    if self.data[base + a]:
+                        yield (i, l, name)
+
+    def __len__(self) -> int:
+        return sum(1 for code in self.data if code)
+
+
+class LazyBackpointers(Mapping):
+    """Backpointers calculados a demanda sobre la tabla de pertenencia.
+
+    Solo se conserva la tabla de máscaras de bits del motor bitset. Al pedir
+    back[(i, l, A)] se busca el primer split s y par (B, C) con A -> BC,
+    B en la celda (i, s) y C en (i+s, l-s); cualquiera de ellos da una
+    derivación válida. Costo por consulta: O(l · |N|).
+    """
+
+    def __init__(self, compiled: CompiledGrammar, w: List[str], chart: List[List[int]]):
+        self.compiled = compiled
+        self.w = w
+        self.chart = chart
+
+    def _bit(self, key) -> int:
+        i, l, A = key
+        a = self.compiled.ids.get(A)
+        if a is None or l < 1 or i < 0 or i + l > len(self.w):
+            return 0
+        return self.chart[i][l] >> a & 1
+
+    def __contains__(self, key) -> bool:
+        return bool(self._bit(key))
+
+    def __getitem__(self, key):
+        if not self._bit(key):
+            raise KeyError(key)
+        i, l, A = key
+        if l == 1:
+            return ("term", self.w[i])
+        compiled = self.compiled
+        chart = self.chart
+        bit_a = 1 << compiled.ids[A]
+        right_mask, parents, names = compiled.right_mask, compiled.parents, compiled.names
+        for s in range(1, l):
+            left = chart[i][s]
+            right = chart[i + s][l - s]
+            while left:
+                low = left & -left
+                left ^= low
+                b = low.bit_length() - 1
+                hits = right & right_mask[b]
+                pb = parents[b]
+                while hits:
+                    low_c = hits & -hits
+                    hits ^= low_c
+                    c = low_c.bit_length() - 1
+                    if pb[c] & bit_a:
+                        return (s, names[b], names[c])
+        raise KeyError(key)  # no debería ocurrir si la tabla es consistente
+
+    def __iter__(self):
+        names = self.compiled.names
+        for i, row in enumerate(self.chart):
+            for l in range(1, len(row)):
+                mask = row[l]
+                while mask:
+                    low = mask & -mask
+                    mask ^= low
+                    yield (i, l, names[low.bit_length() - 1])
+
+    def __len__(self) -> int:
+        return sum(bin(mask).count("1") for row in self.chart for mask in row)
+
+
+def reconstruct_tree(back: Mapping, i: int, l: int, A: str) -> Tuple:
     """Reconstruye árbol en estructura recursiva (tupla) usando backpointers.
     Devuelve (A, children)
+
+    Se recorre con una pila explícita, así que no depende del límite de
+    recursión aunque la derivación sea muy profunda.
     """
-    key = (i,l,A)
-    if key not in back:
-        return (A, [])
-    val = back[key]
-    if val[0] == 'term':
-        return (A, [val[1]])
-    else:
-        s, B, C = val
-        left = reconstruct_tree(back, i, s, B)
-        right = reconstruct_tree(back, i+s, l-s, C)
-        return (A, [left, right])
\ No newline at end of file
+    root = (A, [])
+    stack = [(root, i, l)]
+    while stack:
+        (A, children), i, l = stack.pop()
+        key = (i, l, A)
+        if key not in back:
+            continue
+        val = back[key]
+        if val[0] == 'term':
+            children.append(val[1])
+        else:
+            s, B, C = val
+            left, right = (B, []), (C, [])
+            children.append(left)
+            children.append(right)
+            stack.append((right, i + s, l - s))
+            stack.append((left, i, s))
+    return root
+
+
+def build_tree(back: Mapping, i: int, l: int, A: str) -> TreeNode:
+    """Construye directamente el TreeNode de la derivación desde los backpointers.
+
+    Equivale a TreeNode.from_tuple(reconstruct_tree(...)) pero en una sola
+    pasada iterativa, sin el árbol intermedio de tuplas.
+    """
+    root = TreeNode(A)
+    stack = [(root, i, l)]
+    while stack:
+        node, i, l = stack.pop()
+        val = back.get((i, l, node.symbol))
+        if val is None:
+            continue
+        if val[0] == 'term':
+            node.children.append(TreeNode(val[1]))
+        else:
+            s, B, C = val
+            left, right = TreeNode(B), TreeNode(C)
+            node.children.append(left)
+            node.children.append(right)
+            stack.append((right, i + s, l - s))
+            stack.append((left, i, s))
+    return root
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Parser de Earley para gramáticas libres de contexto arbitrarias.
+
+Trabaja directamente sobre las producciones de la gramática, sin pasar a
+CNF: admite reglas largas, unitarias y epsilon, y el árbol resultante usa
+los no terminales originales (sin los auxiliares @T/@X de convert_to_cnf).
+
+Cada conjunto de Earley se indexa por el siguiente símbolo esperado, de modo
+que la fase de completado solo visita los ítems que esperan al no terminal
+recién reconocido. Los no terminales anulables se saltan al predecirlos
+(Aycock y Horspool), lo que evita reprocesar completados vacíos.
+"""
+
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.grammar import Grammar
+from services.compiled_grammar import GrammarCache
+from services.tree import TreeNode
+from services.cancellation import ProgressCallback, check_cancelled
+
+# Símbolos que representan la cadena vacía en el lado derecho
+EPSILON_SYMBOLS = ("ε", "epsilon")
+
+# Número máximo de gramáticas preparadas que se conservan
+CACHE_MAXSIZE = 32
+
+
+class EarleyGrammar:
+    """Reglas de la gramática preparadas para el parser de Earley.
+
+    Atributos:
+        start: símbolo inicial
+        rules: lista de (izquierda, tupla de símbolos derechos sin epsilon)
+        by_left: no terminal -> índices de sus reglas
+        nonterminals: conjunto de no terminales
+        nullable: no terminales que derivan la cadena vacía (-> regla que lo prueba)
+    """
+
+    def __init__(self, grammar: Grammar):
+        self.start = grammar.S
+        self.nonterminals: Set[str] = set(grammar.nonterminal_set)
+        for p in grammar.P:
+            self.nonterminals.add(p["left"])
+
+        self.rules: List[Tuple[str, Tuple[str, ...]]] = []
+        self.by_left: Dict[str, List[int]] = {}
+        for p in grammar.P:
+            rhs = tuple(sym for sym in p["right"] if sym not in EPSILON_SYMBOLS)
+            self.by_left.setdefault(p["left"], []).append(len(self.rules))
+            self.rules.append((p["left"], rhs))
+
+        self.nullable = self._nullable()
+
+    def _nullable(self) -> Dict[str, int]:
+        """Calcula los anulables con una lista de trabajo (tiempo lineal).
+
+        Retorna no terminal -> regla que lo hizo anulable; esa regla solo
+        usa símbolos anulables descubiertos antes, así que sirve para
+        construir su árbol de ε-derivación sin ciclos.
+        """
+        nullable: Dict[str, int] = {}
+        # por regla: cuántos símbolos del lado derecho faltan por ser anulables
+        pending = []
+        occurs: Dict[str, List[int]] = {}
+        work = []
+        for r, (left, rhs) in enumerate(self.rules):
+            pending.append(len(rhs))
+            for sym in rhs:
+                occurs.setdefault(sym, []).append(r)
+            if not rhs and left not in nullable:
+                nullable[left] = r
+                work.append(left)
+        while work:
+            sym = work.pop()
+            for r in occurs.get(sym, ()):
+                pending[r] -= 1
+                left = self.rules[r][0]
+                if pending[r] == 0 and left not in nullable:
+                    nullable[left] = r
+                    work.append(left)
+        return nullable
+
+
+class EarleyChart:
+    """Resultado del reconocimiento: conjuntos de ítems por posición.
+
+    Un ítem es (regla, punto, origen). sets[k] asocia cada ítem del
+    conjunto k con el enlace que lo creó por primera vez:
+        (conjunto_previo, ítem_previo, hijo)
+    donde hijo es ("t", token), ("c", k, ítem_completo) o ("n", símbolo
+    anulable saltado). Los ítems predichos tienen enlace None. Como cada
+    enlace apunta a ítems creados antes, seguirlos nunca produce ciclos.
+    """
+
+    def __init__(self, eg: EarleyGrammar, w: List[str],
+                 cancel: Optional[threading.Event] = None,
+                 progress: Optional[ProgressCallback] = None):
+        self.grammar = eg
+        self.tokens = list(w)
+        n = len(self.tokens)
+        self.sets: List[Dict[Tuple[int, int, int], Optional[Tuple]]] = [dict() for _ in range(n + 1)]
+        self._recognize(cancel, progress)
+
+    def _recognize(self, cancel: Optional[threading.Event], progress: Optional[ProgressCallback]):
+        eg = self.grammar
+        rules = eg.rules
+        by_left = eg.by_left
+        nonterminals = eg.nonterminals
+        nullable = eg.nullable
+        w = self.tokens
+        n = len(w)
+        # waiting[k]: símbolo esperado -> ítems del conjunto k que lo esperan
+        waiting: List[Dict[str, List[Tuple[int, int, int]]]] = [dict() for _ in range(n + 1)]
+
+        for r in by_left.get(eg.start, ()):
+            self.sets[0][(r, 0, 0)] = None
+
+        for k in range(n + 1):
+            check_cancelled(cancel)
+            current = self.sets[k]
+            agenda = list(current)
+            predicted: Set[str] = set()
+            waiting_k = waiting[k]
+            token = w[k] if k < n else None
+
+            while agenda:
+                item = agenda.pop()
+                r, dot, origin = item
+                left, rhs = rules[r]
+                if dot == len(rhs):
+                    # Completar: avanzar los ítems del origen que esperaban a left
+                    for prev in waiting[origin].get(left, ()):
+                        new = (prev[0], prev[1] + 1, prev[2])
+                        if new not in current:
+                            current[new] = (origin, prev, ("c", k, item))
+                            agenda.append(new)
+                    continue
+
+                sym = rhs[dot]
+                if sym in nonterminals:
+                    waiting_k.setdefault(sym, []).append(item)
+                    if sym not in predicted:
+                        predicted.add(sym)
+                        for r2 in by_left.get(sym, ()):
+                            new = (r2, 0, k)
+                            if new not in current:
+                                current[new] = None
+                                agenda.append(new)
+                    if sym in nullable:
+                        new = (r, dot + 1, origin)
+                        if new not in current:
+                            current[new] = (k, item, ("n", sym))
+                            agenda.append(new)
+                elif sym == token:
+                    # Escanear: el ítem avanza al conjunto siguiente
+                    nxt = self.sets[k + 1]
+                    new = (r, dot + 1, origin)
+                    if new not in nxt:
+                        nxt[new] = (k, item, ("t", token))
+            if progress is not None:
+                progress((k + 1) / (n + 1))
+
+    def _final_item(self) -> Optional[Tuple[int, int, int]]:
+        eg = self.grammar
+        last = self.sets[len(self.tokens)]
+        for r in eg.by_left.get(eg.start, ()):
+            item = (r, len(eg.rules[r][1]), 0)
+            if item in last:
+                return item
+        return None
+
+    def accepted(self) -> bool:
+        return self._final_item() is not None
+
+    def build_tree(self) -> Optional[TreeNode]:
+        """Construye un árbol de derivación desde el símbolo inicial.
+
+        Se recorren los enlaces con una pila explícita, así que la
+        profundidad del árbol no está limitada por la recursión de Python.
+        """
+        final = self._final_item()
+        if final is None:
+            return None
+        rules = self.grammar.rules
+        nullable = self.grammar.nullable
+
+        root = TreeNode(self.grammar.start)
+        stack = [(root, ("c", len(self.tokens), final))]
+        while stack:
+            node, ref = stack.pop()
+            if ref[0] == "c":
+                # Recorrer hacia atrás los enlaces del ítem completo
+                _, k, item = ref
+                refs = []
+                while item[1] > 0:
+                    k, item, child = self.sets[k][item]
+                    refs.append(child)
+                refs.reverse()
+            else:
+                # Símbolo anulable: usar la regla que lo hizo anulable
+                refs = [("n", sym) for sym in rules[nullable[ref[1]]][1]]
+
+            if not refs:
+                node.children = [TreeNode("ε")]
+                continue
+            for child in refs:
+                if child[0] == "t":
+                    node.children.append(TreeNode(child[1]))
+                    continue
+                symbol = rules[child[2][0]][0] if child[0] == "c" else child[1]
+                child_node = TreeNode(symbol)
+                node.children.append(child_node)
+                stack.append((child_node, child))
+        return root
+
+
+_cache = GrammarCache(lambda grammar, key: EarleyGrammar(grammar), CACHE_MAXSIZE)
+
+
+def earley_parse(grammar: Grammar, w: List[str], build_tree: bool = True,
+                 cancel: Optional[threading.Event] = None,
+                 progress: Optional[ProgressCallback] = None) -> Tuple[bool, Optional[TreeNode]]:
+    """Analiza w con el algoritmo de Earley.
+
+    cancel y progress funcionan como en cyk_parse: el evento se consulta
+    antes de cada conjunto de Earley y el avance se informa al cerrar cada
+    conjunto.
+
+    Retorna: (aceptada, árbol) donde árbol es un TreeNode con los no
+    terminales originales de la gramática, o None si la cadena se rechaza
+    o build_tree es False.
+    """
+    chart = EarleyChart(_cache.get(grammar), w, cancel=cancel, progress=progress)
+    if not chart.accepted():
+        return False, None
+    return True, chart.build_tree() if build_tree else None
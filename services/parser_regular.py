@@ -1,4 +1,5 @@
-from typing import List, Dict, Tuple
+from collections import deque
+from typing import List, Dict, Optional, Tuple
 from services.grammar import Grammar
 
 def detect_grammar_direction(grammar: Grammar) -> str:
@@ -13,6 +14,7 @@ def detect_grammar_direction(grammar: Grammar) -> str:
     """
     has_right = False
     has_left = False
+    N, T = grammar.nonterminal_set, grammar.terminal_set
     
     for p in grammar.P:
         right = p["right"]
@@ -23,20 +25,20 @@ def detect_grammar_direction(grammar: Grammar) -> str:
         
         if len(right) == 1:
             # A → a (terminal) o A → ε (epsilon representado como string)
-            if right[0] in grammar.T or right[0] == 'ε' or right[0] == 'epsilon':
+            if right[0] in T or right[0] == 'ε' or right[0] == 'epsilon':
                 continue
             # A → B (unit production, válida para regulares)
-            elif right[0] in grammar.N:
+            elif right[0] in N:
                 continue
             else:
                 return 'invalid'
         
         if len(right) == 2:
             # Lineal derecha: A → aB (terminal, no terminal)
-            if right[0] in grammar.T and right[1] in grammar.N:
+            if right[0] in T and right[1] in N:
                 has_right = True
             # Lineal izquierda: A → Ba (no terminal, terminal)
-            elif right[0] in grammar.N and right[1] in grammar.T:
+            elif right[0] in N and right[1] in T:
                 has_left = True
             else:
                 return 'invalid'
@@ -52,7 +54,7 @@ def detect_grammar_direction(grammar: Grammar) -> str:
     else:
         return 'right'  # Default si solo tiene A → a
 
-def parse_regular(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
+def parse_regular(grammar: Grammar, w: List[str], trace: bool = True) -> Tuple[bool, List]:
     """
     Parser universal para Gramáticas Regulares (Tipo 3).
     Auto-detecta dirección y procesa apropiadamente.
@@ -61,16 +63,31 @@ def parse_regular(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
     - Gramáticas lineales derechas: A → aB, A → a, A → ε
     - Gramáticas lineales izquierdas: A → Ba, A → a, A → ε
     
+    Con trace=False no se construye la derivación: la cadena se reconoce con
+    el AFD compilado (y cacheado) de la gramática, en O(n) y correctamente
+    aunque la gramática sea no determinista.
+    
     Retorna: (aceptada, derivación)
     derivación es una lista de tuplas (símbolo_actual, producción_usada)
     """
+    if not trace:
+        from services.automaton import compile_regular
+        try:
+            dfa = compile_regular(grammar)
+        except ValueError as e:
+            return False, [("Error", str(e))]
+        return dfa.accepts(w), []
+
     # Caso especial: cadena vacía
     if not w:
-        for p in grammar.P:
-            if p["left"] == grammar.S:
-                if len(p["right"]) == 0 or (len(p["right"]) == 1 and p["right"][0] in ['ε', 'epsilon']):
-                    epsilon_symbol = 'ε' if len(p["right"]) == 0 else p["right"][0]
-                    return True, [(grammar.S, f"S → {epsilon_symbol}")]
+        for p in grammar.productions_by_left(grammar.S):
+            if len(p["right"]) == 0 or (len(p["right"]) == 1 and p["right"][0] in ['ε', 'epsilon']):
+                epsilon_symbol = 'ε' if len(p["right"]) == 0 else p["right"][0]
+                return True, [(grammar.S, f"S → {epsilon_symbol}")]
+        # ε también puede alcanzarse por producciones unitarias (S → A, A → ε)
+        full = trace_regular(grammar, w)
+        if full is not None:
+            return True, full
         return False, []
     
     direction = detect_grammar_direction(grammar)
@@ -82,9 +99,87 @@ def parse_regular(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
         return False, [("Error", "Gramática mixta (izquierda + derecha) no soportada")]
     
     if direction == 'left':
-        return parse_left_linear(grammar, w)
+        acept, derivation = parse_left_linear(grammar, w)
     else:
-        return parse_right_linear(grammar, w)
+        acept, derivation = parse_right_linear(grammar, w)
+    if acept:
+        return acept, derivation
+
+    # El recorrido voraz elige una sola producción por paso y puede
+    # rechazar cadenas válidas si la gramática es no determinista
+    full = trace_regular(grammar, w)
+    if full is not None:
+        return True, full
+    return False, derivation
+
+def _step_text(p) -> str:
+    right = p["right"]
+    return f"{p['left']} → {''.join(right) if right else 'ε'}"
+
+
+def trace_regular(grammar: Grammar, w: List[str]) -> Optional[List]:
+    """
+    Busca una derivación de w explorando todas las producciones aplicables.
+    
+    Es una búsqueda en anchura sobre los pares (no terminal, posición), a lo
+    sumo |N|·(n+1) estados, así que es correcta aunque la gramática sea no
+    determinista. Las gramáticas lineales derechas se recorren de izquierda
+    a derecha y las izquierdas de derecha a izquierda.
+    
+    Retorna la derivación en el formato de parse_regular, o None si w no
+    pertenece al lenguaje (o la gramática no es regular).
+    """
+    direction = detect_grammar_direction(grammar)
+    if direction in ('invalid', 'mixed'):
+        return None
+    left_linear = direction == 'left'
+    N, T = grammar.nonterminal_set, grammar.terminal_set
+    n = len(w)
+
+    # (A, i): A debe derivar w[i:] (lineal derecha) o w[:i] (lineal izquierda)
+    begin = (grammar.S, 0 if not left_linear else n)
+    parent = {begin: None}
+    queue = deque([begin])
+    while queue:
+        state = queue.popleft()
+        A, i = state
+        for p in grammar.productions_by_left(A):
+            right = p["right"]
+            step = (A, _step_text(p))
+            target = None
+            if len(right) == 0 or (len(right) == 1 and right[0] in ('ε', 'epsilon')):
+                if i == (n if not left_linear else 0):
+                    target = "fin"
+            elif len(right) == 1 and right[0] in N:
+                target = (right[0], i)
+            elif len(right) == 1 and right[0] in T:
+                if not left_linear and i == n - 1 and w[i] == right[0]:
+                    target = "fin"
+                elif left_linear and i == 1 and w[0] == right[0]:
+                    target = "fin"
+            elif len(right) == 2 and not left_linear:
+                if i < n and right[0] == w[i] and right[1] in N:
+                    target = (right[1], i + 1)
+            elif len(right) == 2 and left_linear:
+                if i > 0 and right[1] == w[i - 1] and right[0] in N:
+                    target = (right[0], i - 1)
+            if target is None:
+                continue
+            if target == "fin":
+                derivation = [step]
+                while parent[state] is not None:
+                    state, prev_step = parent[state]
+                    derivation.append(prev_step)
+                # como parse_left_linear, las izquierdas quedan del último
+                # paso al primero
+                if not left_linear:
+                    derivation.reverse()
+                return derivation
+            if target not in parent:
+                parent[target] = (state, step)
+                queue.append(target)
+    return None
+
 
 def parse_right_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
     """
@@ -94,6 +189,7 @@ def parse_right_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
     Formato: A → aB, A → a, A → ε, A → B
     """
     derivation = []
+    N, T = grammar.nonterminal_set, grammar.terminal_set
     current_symbol = grammar.S
     idx = 0
     
@@ -102,16 +198,15 @@ def parse_right_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
     unit_steps = 0
     while unit_steps < max_unit_steps:
         found_unit = False
-        for p in grammar.P:
-            if p["left"] == current_symbol:
-                right = p["right"]
-                # Unit production: A → B
-                if len(right) == 1 and right[0] in grammar.N:
-                    derivation.append((current_symbol, f"{p['left']} → {right[0]}"))
-                    current_symbol = right[0]
-                    found_unit = True
-                    unit_steps += 1
-                    break
+        for p in grammar.productions_by_left(current_symbol):
+            right = p["right"]
+            # Unit production: A → B
+            if len(right) == 1 and right[0] in N:
+                derivation.append((current_symbol, f"{p['left']} → {right[0]}"))
+                current_symbol = right[0]
+                found_unit = True
+                unit_steps += 1
+                break
         if not found_unit:
             break
     
@@ -120,56 +215,53 @@ def parse_right_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
         found = False
         
         # Buscar producción aplicable
-        for p in grammar.P:
-            if p["left"] == current_symbol:
-                right = p["right"]
+        for p in grammar.productions_by_left(current_symbol):
+            right = p["right"]
+            
+            # Caso: A → a (producción terminal)
+            if len(right) == 1 and right[0] == token and right[0] in T:
+                derivation.append((current_symbol, f"{p['left']} → {token}"))
+                idx += 1
                 
-                # Caso: A → a (producción terminal)
-                if len(right) == 1 and right[0] == token and right[0] in grammar.T:
-                    derivation.append((current_symbol, f"{p['left']} → {token}"))
-                    idx += 1
-                    
-                    # Si es el último token, verificar si alcanzamos estado final
-                    if idx == len(w):
-                        return True, derivation
-                    
-                    # Si no es el último, no deberíamos aceptar
-                    return False, derivation
+                # Si es el último token, verificar si alcanzamos estado final
+                if idx == len(w):
+                    return True, derivation
                 
-                # Caso: A → aB (terminal + no terminal)
-                elif len(right) == 2 and right[0] == token and right[0] in grammar.T:
-                    if right[1] in grammar.N:
-                        derivation.append((current_symbol, f"{p['left']} → {right[0]}{right[1]}"))
-                        current_symbol = right[1]
-                        idx += 1
-                        found = True
-                        break
-        
+                # Si no es el último, no deberíamos aceptar
+                return False, derivation
+            
+            # Caso: A → aB (terminal + no terminal)
+            elif len(right) == 2 and right[0] == token and right[0] in T:
+                if right[1] in N:
+                    derivation.append((current_symbol, f"{p['left']} → {right[0]}{right[1]}"))
+                    current_symbol = right[1]
+                    idx += 1
+                    found = True
+                    break
+    
         if not found:
             return False, derivation
     
     # Después de procesar todos los tokens, verificar si el estado actual acepta epsilon
-    for p in grammar.P:
-        if p["left"] == current_symbol:
-            right = p["right"]
-            # Verificar producción epsilon
-            if len(right) == 0 or (len(right) == 1 and right[0] in ['ε', 'epsilon']):
-                epsilon_symbol = 'ε' if len(right) == 0 else right[0]
-                derivation.append((current_symbol, f"{current_symbol} → {epsilon_symbol}"))
-                return True, derivation
-            # Verificar unit production que lleve a epsilon
-            elif len(right) == 1 and right[0] in grammar.N:
-                # Buscar epsilon transitivamente
-                next_symbol = right[0]
-                derivation.append((current_symbol, f"{current_symbol} → {next_symbol}"))
-                for p2 in grammar.P:
-                    if p2["left"] == next_symbol:
-                        r2 = p2["right"]
-                        if len(r2) == 0 or (len(r2) == 1 and r2[0] in ['ε', 'epsilon']):
-                            epsilon_symbol = 'ε' if len(r2) == 0 else r2[0]
-                            derivation.append((next_symbol, f"{next_symbol} → {epsilon_symbol}"))
-                            return True, derivation
-    
+    for p in grammar.productions_by_left(current_symbol):
+        right = p["right"]
+        # Verificar producción epsilon
+        if len(right) == 0 or (len(right) == 1 and right[0] in ['ε', 'epsilon']):
+            epsilon_symbol = 'ε' if len(right) == 0 else right[0]
+            derivation.append((current_symbol, f"{current_symbol} → {epsilon_symbol}"))
+            return True, derivation
+        # Verificar unit production que lleve a epsilon
+        elif len(right) == 1 and right[0] in N:
+            # Buscar epsilon transitivamente
+            next_symbol = right[0]
+            derivation.append((current_symbol, f"{current_symbol} → {next_symbol}"))
+            for p2 in grammar.productions_by_left(next_symbol):
+                r2 = p2["right"]
+                if len(r2) == 0 or (len(r2) == 1 and r2[0] in ['ε', 'epsilon']):
+                    epsilon_symbol = 'ε' if len(r2) == 0 else r2[0]
+                    derivation.append((next_symbol, f"{next_symbol} → {epsilon_symbol}"))
+                    return True, derivation
+
     return False, derivation
 
 def parse_left_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
@@ -188,6 +280,7 @@ def parse_left_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
         Paso 3: Token='a', buscar A → a
     """
     derivation = []
+    N, T = grammar.nonterminal_set, grammar.terminal_set
     current_symbol = grammar.S
     idx = len(w) - 1  # Empezar desde el FINAL
     
@@ -196,16 +289,15 @@ def parse_left_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
     unit_steps = 0
     while unit_steps < max_unit_steps:
         found_unit = False
-        for p in grammar.P:
-            if p["left"] == current_symbol:
-                right = p["right"]
-                # Unit production: A → B
-                if len(right) == 1 and right[0] in grammar.N:
-                    derivation.append((current_symbol, f"{p['left']} → {right[0]}"))
-                    current_symbol = right[0]
-                    found_unit = True
-                    unit_steps += 1
-                    break
+        for p in grammar.productions_by_left(current_symbol):
+            right = p["right"]
+            # Unit production: A → B
+            if len(right) == 1 and right[0] in N:
+                derivation.append((current_symbol, f"{p['left']} → {right[0]}"))
+                current_symbol = right[0]
+                found_unit = True
+                unit_steps += 1
+                break
         if not found_unit:
             break
     
@@ -214,60 +306,57 @@ def parse_left_linear(grammar: Grammar, w: List[str]) -> Tuple[bool, List]:
         found = False
         
         # Buscar producción aplicable
-        for p in grammar.P:
-            if p["left"] == current_symbol:
-                right = p["right"]
+        for p in grammar.productions_by_left(current_symbol):
+            right = p["right"]
+            
+            # Caso: A → a (producción terminal)
+            if len(right) == 1 and right[0] == token and right[0] in T:
+                derivation.append((current_symbol, f"{p['left']} → {token}"))
+                idx -= 1
                 
-                # Caso: A → a (producción terminal)
-                if len(right) == 1 and right[0] == token and right[0] in grammar.T:
-                    derivation.append((current_symbol, f"{p['left']} → {token}"))
-                    idx -= 1
-                    
-                    # Si es el primer token, verificar si alcanzamos estado final
-                    if idx < 0:
-                        derivation.reverse()
-                        return True, derivation
-                    
-                    # Si no es el primero, no deberíamos aceptar
+                # Si es el primer token, verificar si alcanzamos estado final
+                if idx < 0:
                     derivation.reverse()
-                    return False, derivation
+                    return True, derivation
                 
-                # Caso: A → Ba (no terminal + terminal)
-                elif len(right) == 2 and right[1] == token and right[1] in grammar.T:
-                    if right[0] in grammar.N:
-                        derivation.append((current_symbol, f"{p['left']} → {right[0]}{right[1]}"))
-                        current_symbol = right[0]  # Transición al no terminal
-                        idx -= 1  # Avanzar hacia la IZQUIERDA
-                        found = True
-                        break
-        
+                # Si no es el primero, no deberíamos aceptar
+                derivation.reverse()
+                return False, derivation
+            
+            # Caso: A → Ba (no terminal + terminal)
+            elif len(right) == 2 and right[1] == token and right[1] in T:
+                if right[0] in N:
+                    derivation.append((current_symbol, f"{p['left']} → {right[0]}{right[1]}"))
+                    current_symbol = right[0]  # Transición al no terminal
+                    idx -= 1  # Avanzar hacia la IZQUIERDA
+                    found = True
+                    break
+    
         if not found:
             derivation.reverse()
             return False, derivation
     
     # Después de procesar todos los tokens, verificar si el estado actual acepta epsilon
-    for p in grammar.P:
-        if p["left"] == current_symbol:
-            right = p["right"]
-            # Verificar producción epsilon
-            if len(right) == 0 or (len(right) == 1 and right[0] in ['ε', 'epsilon']):
-                epsilon_symbol = 'ε' if len(right) == 0 else right[0]
-                derivation.append((current_symbol, f"{current_symbol} → {epsilon_symbol}"))
-                derivation.reverse()
-                return True, derivation
-            # Verificar unit production que lleve a epsilon
-            elif len(right) == 1 and right[0] in grammar.N:
-                next_symbol = right[0]
-                derivation.append((current_symbol, f"{current_symbol} → {next_symbol}"))
-                for p2 in grammar.P:
-                    if p2["left"] == next_symbol:
-                        r2 = p2["right"]
-                        if len(r2) == 0 or (len(r2) == 1 and r2[0] in ['ε', 'epsilon']):
-                            epsilon_symbol = 'ε' if len(r2) == 0 else r2[0]
-                            derivation.append((next_symbol, f"{next_symbol} → {epsilon_symbol}"))
-                            derivation.reverse()
-                            return True, derivation
-    
+    for p in grammar.productions_by_left(current_symbol):
+        right = p["right"]
+        # Verificar producción epsilon
+        if len(right) == 0 or (len(right) == 1 and right[0] in ['ε', 'epsilon']):
+            epsilon_symbol = 'ε' if len(right) == 0 else right[0]
+            derivation.append((current_symbol, f"{current_symbol} → {epsilon_symbol}"))
+            derivation.reverse()
+            return True, derivation
+        # Verificar unit production que lleve a epsilon
+        elif len(right) == 1 and right[0] in N:
+            next_symbol = right[0]
+            derivation.append((current_symbol, f"{current_symbol} → {next_symbol}"))
+            for p2 in grammar.productions_by_left(next_symbol):
+                r2 = p2["right"]
+                if len(r2) == 0 or (len(r2) == 1 and r2[0] in ['ε', 'epsilon']):
+                    epsilon_symbol = 'ε' if len(r2) == 0 else r2[0]
+                    derivation.append((next_symbol, f"{next_symbol} → {epsilon_symbol}"))
+                    derivation.reverse()
+                    return True, derivation
+
     derivation.reverse()
     return False, derivation
 
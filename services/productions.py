@@ -0,0 +1,264 @@
+"""
+Almacenamiento compacto de las producciones de una gramática.
+
+En lugar de una lista de dicts {"left": A, "right": [...]}, las reglas se
+guardan en tres arreglos planos de enteros sobre una tabla de símbolos
+internados:
+
+    lefts[k]                      id del lado izquierdo de la regla k
+    rhs[offsets[k]:offsets[k+1]]  ids del lado derecho de la regla k
+
+Cada símbolo se guarda una sola vez y cada regla ocupa unos pocos enteros de
+4 bytes. Las reglas se exponen como vistas Production que se comportan como
+el dict de antes (p["left"], p["right"], p.get(...)), de modo que el resto
+del código no necesita cambiar.
+"""
+
+from array import array
+from collections.abc import Mapping, MutableSequence
+from typing import Dict, Iterable, List, Tuple
+
+
+class Production(Mapping):
+    """Vista de solo lectura de una regla de una ProductionTable.
+
+    p["right"] devuelve una lista nueva en cada acceso; p.rhs devuelve una
+    tupla. Es igual a un dict con las mismas claves "left" y "right".
+    La vista apunta a una posición de la tabla: si la tabla se modifica,
+    hay que volver a obtenerla.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ProductionTable", index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def left(self) -> str:
+        t = self._table
+        return t.symbols[t.lefts[self._index]]
+
+    @property
+    def rhs(self) -> Tuple[str, ...]:
+        t = self._table
+        i = self._index
+        symbols = t.symbols
+        return tuple(symbols[s] for s in t.rhs[t.offsets[i]:t.offsets[i + 1]])
+
+    def __getitem__(self, key):
+        t = self._table
+        i = self._index
+        if key == "left":
+            return t.symbols[t.lefts[i]]
+        if key == "right":
+            symbols = t.symbols
+            return [symbols[s] for s in t.rhs[t.offsets[i]:t.offsets[i + 1]]]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(("left", "right"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __eq__(self, other):
+        if isinstance(other, Production):
+            return self.left == other.left and self.rhs == other.rhs
+        if isinstance(other, Mapping):
+            return len(other) == 2 and other.get("left") == self.left \
+                and list(other.get("right", ())) == list(self.rhs)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.left, self.rhs))
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self) -> Dict:
+        """Dict JSON-compatible de la regla."""
+        return {"left": self.left, "right": list(self.rhs)}
+
+
+class ProductionTable(MutableSequence):
+    """Lista de producciones con símbolos internados y arreglos planos.
+
+    Acepta los mismos usos que la lista de dicts que reemplaza: indexar,
+    iterar, append/extend/insert, asignar y borrar posiciones, comparar con
+    una lista de dicts. Los elementos nuevos pueden ser dicts o Production.
+
+    Atributos:
+        symbols: id -> símbolo (los ids no se reutilizan)
+        lefts / offsets / rhs: arreglos array('i') descritos en el módulo
+        version: contador de modificaciones (para invalidar índices)
+    """
+
+    __slots__ = ("symbols", "_ids", "lefts", "offsets", "rhs", "version")
+
+    def __init__(self, productions: Iterable = ()):
+        self.symbols: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.lefts = array("i")
+        self.offsets = array("i", [0])
+        self.rhs = array("i")
+        self.version = 0
+        if isinstance(productions, ProductionTable):
+            # Copia directa de los arreglos, sin volver a internar símbolos
+            self.symbols = list(productions.symbols)
+            self._ids = dict(productions._ids)
+            self.lefts = array("i", productions.lefts)
+            self.offsets = array("i", productions.offsets)
+            self.rhs = array("i", productions.rhs)
+        else:
+            self.extend(productions)
+
+    def intern(self, symbol: str) -> int:
+        """Id del símbolo, asignándole uno nuevo si no lo tenía."""
+        sid = self._ids.get(symbol)
+        if sid is None:
+            sid = self._ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return sid
+
+    def _encode(self, production) -> Tuple[int, List[int]]:
+        if isinstance(production, Production) and production._table is self:
+            i = production._index
+            return self.lefts[i], list(self.rhs[self.offsets[i]:self.offsets[i + 1]])
+        intern = self.intern
+        return intern(production["left"]), [intern(s) for s in production.get("right", ())]
+
+    def _splice(self, start: int, stop: int, entries: List[Tuple[int, List[int]]]):
+        """Reemplaza las reglas [start, stop) por `entries` (id izquierdo, ids derechos)."""
+        offsets = self.offsets
+        lo, hi = offsets[start], offsets[stop]
+        new_rhs = array("i")
+        new_offsets = array("i")
+        pos = lo
+        for _, ids in entries:
+            new_rhs.extend(ids)
+            pos += len(ids)
+            new_offsets.append(pos)
+        delta = pos - hi
+        tail = offsets[stop + 1:]
+        if delta:
+            tail = array("i", (o + delta for o in tail))
+        self.lefts[start:stop] = array("i", (left for left, _ in entries))
+        self.rhs[lo:hi] = new_rhs
+        offsets[start + 1:] = new_offsets + tail
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self.lefts)
+
+    def _position(self, index: int) -> int:
+        n = len(self.lefts)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("índice de producción fuera de rango")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Production(self, i) for i in range(*index.indices(len(self)))]
+        return Production(self, self._position(index))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            entries = [self._encode(p) for p in value]
+            if step == 1:
+                self._splice(start, max(start, stop), entries)
+                return
+            positions = range(start, stop, step)
+            if len(positions) != len(entries):
+                raise ValueError("la cantidad de producciones no coincide con el slice")
+            for i, entry in zip(positions, entries):
+                self._splice(i, i + 1, [entry])
+            return
+        i = self._position(index)
+        self._splice(i, i + 1, [self._encode(value)])
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                if start < stop:
+                    self._splice(start, stop, [])
+                return
+            for i in sorted(range(start, stop, step), reverse=True):
+                self._splice(i, i + 1, [])
+            return
+        i = self._position(index)
+        self._splice(i, i + 1, [])
+
+    def insert(self, index: int, value):
+        n = len(self)
+        if index < 0:
+            index = max(0, index + n)
+        index = min(index, n)
+        self._splice(index, index, [self._encode(value)])
+
+    def append(self, value):
+        left, ids = self._encode(value)
+        self.lefts.append(left)
+        self.rhs.extend(ids)
+        self.offsets.append(len(self.rhs))
+        self.version += 1
+
+    def extend(self, values: Iterable):
+        if values is self:
+            values = list(values)
+        for value in values:
+            self.append(value)
+
+    def pop(self, index: int = -1) -> Dict:
+        # Se devuelve un dict: una vista apuntaría a una posición que ya no existe
+        i = self._position(index)
+        value = Production(self, i).to_dict()
+        self._splice(i, i + 1, [])
+        return value
+
+    def reverse(self):
+        entries = [self._encode(p) for p in self]
+        entries.reverse()
+        self._splice(0, len(entries), entries)
+
+    def clear(self):
+        self.lefts = array("i")
+        self.offsets = array("i", [0])
+        self.rhs = array("i")
+        self.version += 1
+
+    def __eq__(self, other):
+        if isinstance(other, (ProductionTable, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def __reduce__(self):
+        return _restore_table, (self.symbols, self.lefts, self.offsets, self.rhs)
+
+    def to_list(self) -> List[Dict]:
+        """Lista de dicts JSON-compatible con todas las reglas."""
+        symbols = self.symbols
+        lefts, offsets, rhs = self.lefts, self.offsets, self.rhs
+        return [
+            {"left": symbols[lefts[k]], "right": [symbols[s] for s in rhs[offsets[k]:offsets[k + 1]]]}
+            for k in range(len(lefts))
+        ]
+
+
+def _restore_table(symbols, lefts, offsets, rhs) -> ProductionTable:
+    table = ProductionTable()
+    table.symbols = list(symbols)
+    table._ids = {s: i for i, s in enumerate(table.symbols)}
+    table.lefts = array("i", lefts)
+    table.offsets = array("i", offsets)
+    table.rhs = array("i", rhs)
+    return table
@@ -0,0 +1,377 @@
+"""
+Búsqueda de subcadenas que pertenecen a lenguajes regulares dentro de un texto.
+
+Un Scanner combina los AFD mínimos de una o varias gramáticas tipo 3 en un
+autómata producto: cada estado es la tupla de estados de los AFD
+componentes y sabe qué gramáticas aceptan en él. El producto se construye de
+forma perezosa (solo los estados que el texto visita) y se conserva entre
+búsquedas.
+
+El texto puede ser un str (cada carácter es un token) o un objeto tipo bytes
+(bytes, bytearray, memoryview o mmap; cada byte es un token y se compara con
+los terminales de un solo carácter de código menor que 256). Las posiciones
+donde puede empezar una coincidencia se localizan con find (o una clase de
+caracteres de re), que recorren el texto en C; el autómata solo se ejecuta
+desde esas posiciones.
+
+Para no recorrer de nuevo el texto desde cada inicio candidato, cada tramo
+de caracteres del alfabeto se recorre antes de derecha a izquierda con el
+autómata inverso (ver _Liveness), que indica en cada posición desde qué
+estados todavía se puede llegar a aceptar. El recorrido desde un inicio se
+detiene en cuanto el estado deja de estar vivo: un inicio sin coincidencias
+cuesta O(1) y uno con coincidencias termina en la última. En modo "longest"
+la búsqueda sigue desde el final de la coincidencia, así que el texto se
+procesa en tiempo lineal.
+"""
+
+import mmap
+import re
+from array import array
+from collections import namedtuple
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+from services.grammar import Grammar
+from services.automaton import DFA, compile_regular
+
+# Coincidencia: [start, end) y el índice de la gramática que la reconoce
+Match = namedtuple("Match", ["start", "end", "pattern"])
+
+MODES = ("longest", "all")
+
+# Transición del producto aún no calculada
+_UNKNOWN = -2
+
+# Máximo de caracteres iniciales que se buscan con find en lugar de re
+FIND_LIMIT = 8
+
+# Posiciones por bloque en que se guarda la vivacidad de un tramo largo
+LIVE_BLOCK = 1 << 16
+
+
+class Scanner:
+    """Autómata producto de varias gramáticas regulares para buscar en textos.
+
+    Modos de búsqueda:
+        "longest": coincidencias más a la izquierda y más largas, sin
+                   solaparse (como un analizador léxico); ante empates de
+                   longitud gana la gramática de menor índice
+        "all": todas las coincidencias (start, end, gramática), incluidas las
+               solapadas y las que son prefijo de otra
+
+    Las coincidencias vacías no se reportan.
+    """
+
+    def __init__(self, grammars: Union[Grammar, DFA, Sequence[Union[Grammar, DFA]]]):
+        if isinstance(grammars, (Grammar, DFA)):
+            grammars = [grammars]
+        self.dfas: List[DFA] = [g if isinstance(g, DFA) else compile_regular(g) for g in grammars]
+        if not self.dfas:
+            raise ValueError("Se necesita al menos una gramática")
+
+        # Alfabeto común: solo terminales de un carácter pueden coincidir con el texto
+        symbols = sorted({a for dfa in self.dfas for a in dfa.alphabet if len(a) == 1})
+        self.symbols: List[str] = symbols
+        self.symbol_ids: Dict[str, int] = {a: i for i, a in enumerate(symbols)}
+        # columna del símbolo común en cada AFD (-1 si no es de su alfabeto)
+        self._columns = [[dfa.symbol_ids.get(a, -1) for a in symbols] for dfa in self.dfas]
+        # byte -> id de símbolo (-1 si ninguno)
+        self._byte_ids = [-1] * 256
+        for a, i in self.symbol_ids.items():
+            if ord(a) < 256:
+                self._byte_ids[ord(a)] = i
+
+        self._index: Dict[Tuple[int, ...], int] = {}
+        self._states: List[Tuple[int, ...]] = []
+        self._accept: List[int] = []
+        self._trans = array("i")
+        self.start = self._state(tuple(dfa.start for dfa in self.dfas))
+        self._first = {}
+        self._gaps = {}
+
+        # Autómata inverso (ver _Liveness): cada estado es la tupla, por AFD,
+        # de la máscara de sus estados vivos; también se construye perezosamente
+        self._finals = [sum(1 << s for s in range(dfa.num_states) if dfa.accepting[s])
+                        for dfa in self.dfas]
+        self._rindex: Dict[Tuple[int, ...], int] = {}
+        self._rstates: List[Tuple[int, ...]] = []
+        self._rtrans = array("i")
+        self.final = self._rstate(tuple(self._finals))
+        # (estado del producto, estado inverso) -> si el primero está vivo
+        self._live: Dict[Tuple[int, int], bool] = {}
+
+    @property
+    def num_states(self) -> int:
+        """Estados del producto construidos hasta ahora."""
+        return len(self._states)
+
+    def _state(self, components: Tuple[int, ...]) -> int:
+        q = self._index.get(components)
+        if q is None:
+            q = self._index[components] = len(self._states)
+            self._states.append(components)
+            mask = 0
+            for i, (dfa, s) in enumerate(zip(self.dfas, components)):
+                if s >= 0 and dfa.accepting[s]:
+                    mask |= 1 << i
+            self._accept.append(mask)
+            self._trans.extend(array("i", [_UNKNOWN]) * len(self.symbols))
+        return q
+
+    def _step(self, q: int, sym: int) -> int:
+        """Calcula (y guarda) la transición del producto desde q con sym."""
+        components = []
+        alive = False
+        for dfa, columns, s in zip(self.dfas, self._columns, self._states[q]):
+            c = columns[sym]
+            t = -1 if s < 0 or c < 0 else dfa.transitions[s * len(dfa.alphabet) + c]
+            components.append(t)
+            alive = alive or t >= 0
+        target = self._state(tuple(components)) if alive else -1
+        self._trans[q * len(self.symbols) + sym] = target
+        return target
+
+    def _rstate(self, masks: Tuple[int, ...]) -> int:
+        r = self._rindex.get(masks)
+        if r is None:
+            r = self._rindex[masks] = len(self._rstates)
+            self._rstates.append(masks)
+            self._rtrans.extend(array("i", [_UNKNOWN]) * len(self.symbols))
+        return r
+
+    def _rstep(self, r: int, sym: int) -> int:
+        """Estado inverso de la posición i a partir del de i+1 y el símbolo en i."""
+        masks = []
+        for dfa, columns, final, mask in zip(self.dfas, self._columns, self._finals, self._rstates[r]):
+            c = columns[sym]
+            live = final
+            if c >= 0 and mask:
+                k = len(dfa.alphabet)
+                trans = dfa.transitions
+                for s in range(dfa.num_states):
+                    t = trans[s * k + c]
+                    if t >= 0 and mask >> t & 1:
+                        live |= 1 << s
+            masks.append(live)
+        target = self._rstate(tuple(masks))
+        self._rtrans[r * len(self.symbols) + sym] = target
+        return target
+
+    def _is_live(self, q: int, r: int) -> bool:
+        """Calcula (y guarda) si el estado q del producto está vivo en el estado inverso r."""
+        live = any(s >= 0 and mask >> s & 1 for s, mask in zip(self._states[q], self._rstates[r]))
+        self._live[(q, r)] = live
+        return live
+
+    def _first_symbols(self, binary: bool) -> list:
+        """Caracteres (o bytes) con los que puede empezar una coincidencia."""
+        first = self._first.get(binary)
+        if first is None:
+            first = [a for a, i in self.symbol_ids.items()
+                     if self._step(self.start, i) >= 0 and (not binary or ord(a) < 256)]
+            if binary:
+                first = [bytes([ord(a)]) for a in first]
+            self._first[binary] = first
+        return first
+
+    def _finder(self, data, binary: bool):
+        """Función pos -> siguiente posición >= pos donde puede empezar una coincidencia (-1 si no hay).
+
+        Con pocos caracteres iniciales se usa data.find (memchr) guardando la
+        próxima aparición de cada uno, de modo que cada carácter recorre el
+        texto una sola vez; con muchos, una clase de caracteres de re.
+        """
+        first = self._first_symbols(binary)
+        if not first:
+            return None
+        if len(first) <= FIND_LIMIT and hasattr(data, "find"):
+            find = data.find
+            upcoming = [find(c) for c in first]
+
+            def next_start(pos):
+                best = -1
+                for j, q in enumerate(upcoming):
+                    if 0 <= q < pos:
+                        q = upcoming[j] = find(first[j], pos)
+                    if q >= 0 and (best < 0 or q < best):
+                        best = q
+                return best
+            return next_start
+
+        if binary:
+            pattern = re.compile(b"[" + b"".join(re.escape(c) for c in first) + b"]")
+        else:
+            pattern = re.compile("[" + "".join(re.escape(c) for c in first) + "]")
+
+        def next_start(pos):
+            found = pattern.search(data, pos)
+            return -1 if found is None else found.start()
+        return next_start
+
+    def _gap(self, binary: bool):
+        """Expresión que encuentra el siguiente carácter ajeno al alfabeto."""
+        gap = self._gaps.get(binary)
+        if gap is None:
+            if binary:
+                symbols = [bytes([ord(a)]) for a in self.symbols if ord(a) < 256]
+                gap = re.compile(b"[^" + b"".join(re.escape(c) for c in symbols) + b"]")
+            else:
+                gap = re.compile("[^" + "".join(re.escape(c) for c in self.symbols) + "]")
+            self._gaps[binary] = gap
+        return gap
+
+    def scan(self, data, mode: str = "longest") -> Iterator[Match]:
+        """Busca las coincidencias en data (str u objeto tipo bytes, incluido mmap).
+
+        Yields:
+            Match(start, end, pattern) en orden de inicio (y de fin en "all")
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo de búsqueda desconocido: {mode!r} (opciones: {', '.join(MODES)})")
+        return self._scan(data, mode == "longest")
+
+    def _scan(self, data, longest: bool) -> Iterator[Match]:
+        binary = not isinstance(data, str)
+        next_start = self._finder(data, binary)
+        if next_start is None:
+            return
+        lookup = self._byte_ids.__getitem__ if binary else \
+            (lambda ch, get=self.symbol_ids.get: get(ch, -1))
+        gap = self._gap(binary)
+
+        trans = self._trans
+        accept = self._accept
+        live = self._live
+        k = len(self.symbols)
+        n = len(data)
+        segment = None
+        pos = 0
+        while pos < n:
+            p = next_start(pos)
+            if p < 0:
+                return
+            if segment is None or p >= segment.hi:
+                found = gap.search(data, p)
+                segment = _Liveness(self, data, lookup, p, n if found is None else found.start())
+            rows, base = segment.rows(p)
+            q = self.start
+            i = p
+            best_end = p
+            best_mask = 0
+            while True:
+                # q es el estado tras leer data[p:i]; si no está vivo en i,
+                # desde aquí ya no hay coincidencias
+                j = i - base
+                if j >= len(rows):
+                    rows, base = segment.rows(i)
+                    j = i - base
+                r = rows[j]
+                ok = live.get((q, r))
+                if ok is None:
+                    ok = self._is_live(q, r)
+                if not ok:
+                    break
+                mask = accept[q]
+                if mask and i > p:
+                    if longest:
+                        best_end, best_mask = i, mask
+                    else:
+                        while mask:
+                            low = mask & -mask
+                            mask ^= low
+                            yield Match(p, i, low.bit_length() - 1)
+                if i == segment.hi:
+                    break
+                sym = lookup(data[i])
+                t = trans[q * k + sym]
+                if t == _UNKNOWN:
+                    t = self._step(q, sym)
+                if t < 0:
+                    break
+                q = t
+                i += 1
+            if longest and best_mask:
+                yield Match(p, best_end, (best_mask & -best_mask).bit_length() - 1)
+                pos = best_end
+            else:
+                pos = p + 1
+
+    def scan_file(self, path: str, mode: str = "longest") -> Iterator[Match]:
+        """Busca en un archivo mapeado en memoria (posiciones en bytes)."""
+        if mode not in MODES:
+            raise ValueError(f"Modo de búsqueda desconocido: {mode!r} (opciones: {', '.join(MODES)})")
+        return self._scan_file(path, mode == "longest")
+
+    def _scan_file(self, path: str, longest: bool) -> Iterator[Match]:
+        with open(path, "rb") as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # archivo vacío
+                return
+        with buf:
+            yield from self._scan(buf, longest)
+
+
+class _Liveness:
+    """Estados vivos en cada posición de un tramo [lo, hi] del texto.
+
+    El tramo no contiene caracteres ajenos al alfabeto y data[hi] sí lo es
+    (o hi es el final del texto). El estado inverso de la posición i guarda,
+    por AFD, la máscara de los estados desde los que se llega a aceptar
+    leyendo algún prefijo de data[i:hi]; en hi solo viven los de aceptación.
+    Se calcula de derecha a izquierda. En tramos de más de LIVE_BLOCK
+    posiciones, un primer recorrido guarda solo el estado al inicio de cada
+    bloque y cada bloque se recalcula desde su borde derecho cuando se
+    visita, de modo que la memoria no depende del largo del tramo.
+    """
+
+    def __init__(self, scanner: Scanner, data, lookup, lo: int, hi: int):
+        self.scanner = scanner
+        self.data = data
+        self.lookup = lookup
+        self.lo = lo
+        self.hi = hi
+        self._bounds: Dict[int, int] = {}
+        self._block = -1
+        self._rows = (array("i"), lo)
+        if hi - lo > LIVE_BLOCK:
+            r = scanner.final
+            for i in range(hi - 1, lo - 1, -1):
+                r = self._back(r, i)
+                if (i - lo) % LIVE_BLOCK == 0:
+                    self._bounds[(i - lo) // LIVE_BLOCK] = r
+
+    def _back(self, r: int, i: int) -> int:
+        scanner = self.scanner
+        sym = self.lookup(self.data[i])
+        t = scanner._rtrans[r * len(scanner.symbols) + sym]
+        return scanner._rstep(r, sym) if t == _UNKNOWN else t
+
+    def rows(self, i: int) -> Tuple[array, int]:
+        """Estados inversos del bloque que contiene i y la posición de su inicio."""
+        block = (i - self.lo) // LIVE_BLOCK
+        if block == self._block:
+            return self._rows
+        start = self.lo + block * LIVE_BLOCK
+        end = min(start + LIVE_BLOCK, self.hi)
+        scanner = self.scanner
+        rtrans = scanner._rtrans
+        rstep = scanner._rstep
+        lookup = self.lookup
+        data = self.data
+        k = len(scanner.symbols)
+        r = scanner.final if end == self.hi else self._bounds[block + 1]
+        rows = array("i", [r]) * (end - start + 1)
+        for j in range(end - 1, start - 1, -1):
+            sym = lookup(data[j])
+            t = rtrans[r * k + sym]
+            r = rstep(r, sym) if t == _UNKNOWN else t
+            rows[j - start] = r
+        self._block = block
+        self._rows = (rows, start)
+        return self._rows
+
+
+def scan(grammars: Union[Grammar, DFA, Sequence[Union[Grammar, DFA]]], data,
+         mode: str = "longest") -> Iterator[Match]:
+    """Atajo para Scanner(grammars).scan(data, mode)."""
+    return Scanner(grammars).scan(data, mode)
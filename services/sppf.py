@@ -0,0 +1,282 @@
+"""
+Bosque de análisis compartido (SPPF) para gramáticas ambiguas.
+
+cyk_parse guarda un solo backpointer por celda (i, l, A) y descarta las
+alternativas. parse_forest conserva, para cada nodo (i, l, A) alcanzable
+desde la raíz, todas sus empaquetaduras (s, B, C): cada forma de partir el
+segmento con una regla A -> BC. Los subárboles se comparten, así que cada
+nodo se guarda una sola vez aunque aparezca en muchos árboles.
+
+Sobre el bosque se pueden contar los árboles (enteros de precisión
+arbitraria), recorrerlos uno a uno de forma perezosa y extraer los k mejores
+según una función de peso de las reglas. Igual que en cyk_parse, los árboles
+son los de la forma CNF de la gramática.
+"""
+
+import heapq
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from services.grammar import Grammar
+from services.compiled_grammar import CompiledGrammar, compile_grammar
+from services.parser_cyk import cyk_parse
+from services.tree import TreeNode
+
+# Clave de un nodo del bosque: (inicio, longitud, no terminal)
+NodeKey = Tuple[int, int, str]
+
+# Función de peso: (lado izquierdo, lado derecho) -> puntaje de la regla
+WeightFunction = Callable[[str, Tuple[str, ...]], float]
+
+
+class SPPF(Mapping):
+    """Bosque de todas las derivaciones de una cadena.
+
+    Se usa como un dict (i, l, A) -> tupla de empaquetaduras, cada una con el
+    formato de los backpointers de cyk_parse: ("term", token) o (s, B, C).
+    Solo contiene los nodos alcanzables desde la raíz (0, n, S); si la
+    cadena no es aceptada está vacío.
+
+    Atributos:
+        compiled: gramática compilada usada
+        w: tokens analizados
+        accepted: si la cadena pertenece al lenguaje
+        root: clave del nodo raíz
+    """
+
+    def __init__(self, compiled: CompiledGrammar, w: List[str],
+                 nodes: Dict[NodeKey, Tuple], accepted: bool):
+        self.compiled = compiled
+        self.w = w
+        self.accepted = accepted
+        self.root: NodeKey = (0, len(w), compiled.start)
+        self._nodes = nodes
+        # clave -> sumas acumuladas de árboles por empaquetadura
+        self._blocks: Optional[Dict[NodeKey, List[int]]] = None
+
+    def __getitem__(self, key):
+        return self._nodes[key]
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _bottom_up(self) -> List[NodeKey]:
+        # los hijos de un nodo siempre cubren segmentos más cortos
+        return sorted(self._nodes, key=lambda key: key[1])
+
+    def _count_blocks(self) -> Dict[NodeKey, List[int]]:
+        """Cantidad de árboles bajo cada nodo, acumulada por empaquetadura."""
+        if self._blocks is None:
+            blocks: Dict[NodeKey, List[int]] = {}
+            for key in self._bottom_up():
+                i, l, _ = key
+                total = 0
+                cumulative = []
+                for packing in self._nodes[key]:
+                    if packing[0] == "term":
+                        total += 1
+                    else:
+                        s, B, C = packing
+                        total += blocks[(i, s, B)][-1] * blocks[(i + s, l - s, C)][-1]
+                    cumulative.append(total)
+                blocks[key] = cumulative
+            self._blocks = blocks
+        return self._blocks
+
+    def count_trees(self, node: Optional[NodeKey] = None) -> int:
+        """Cantidad de árboles de derivación bajo `node` (por defecto la raíz).
+
+        Programación dinámica de abajo hacia arriba sobre el bosque; el
+        resultado es exacto aunque crezca exponencialmente con la longitud.
+        """
+        blocks = self._count_blocks().get(self.root if node is None else node)
+        return blocks[-1] if blocks else 0
+
+    def tree(self, k: int, node: Optional[NodeKey] = None) -> TreeNode:
+        """El k-ésimo árbol (0 <= k < count_trees(node)) en un orden fijo.
+
+        Se construye de forma iterativa descomponiendo k nodo por nodo, sin
+        recorrer los árboles anteriores.
+        """
+        key = self.root if node is None else node
+        if not 0 <= k < self.count_trees(key):
+            raise IndexError("índice de árbol fuera de rango")
+        blocks = self._blocks
+        nodes = self._nodes
+
+        root = TreeNode(key[2])
+        stack = [(root, key, k)]
+        while stack:
+            parent, key, k = stack.pop()
+            cumulative = blocks[key]
+            j = bisect_right(cumulative, k)
+            if j:
+                k -= cumulative[j - 1]
+            packing = nodes[key][j]
+            if packing[0] == "term":
+                parent.children.append(TreeNode(packing[1]))
+                continue
+            i, l, _ = key
+            s, B, C = packing
+            left_key, right_key = (i, s, B), (i + s, l - s, C)
+            right_count = blocks[right_key][-1]
+            left, right = TreeNode(B), TreeNode(C)
+            parent.children.append(left)
+            parent.children.append(right)
+            stack.append((right, right_key, k % right_count))
+            stack.append((left, left_key, k // right_count))
+        return root
+
+    def iter_trees(self, node: Optional[NodeKey] = None) -> Iterator[TreeNode]:
+        """Generador perezoso de todos los árboles bajo `node`, uno a la vez."""
+        key = self.root if node is None else node
+        for k in range(self.count_trees(key)):
+            yield self.tree(k, key)
+
+    def k_best(self, k: int, weight: Optional[WeightFunction] = None) -> List[Tuple[float, TreeNode]]:
+        """Los k árboles de mayor puntaje, de mejor a peor.
+
+        El puntaje de un árbol es la suma de weight(A, rhs) sobre sus reglas
+        (para probabilidades, usar logaritmos). Sin weight todas las reglas
+        valen 0. Para cada nodo se calculan sus k mejores derivaciones
+        combinando las listas de los hijos con una frontera perezosa
+        (algoritmo de Huang y Chiang), sin enumerar todos los árboles.
+
+        Returns:
+            Lista de (puntaje, TreeNode) con a lo sumo k elementos
+        """
+        if k < 1 or not self._nodes:
+            return []
+        if weight is None:
+            weight = lambda left, right: 0.0
+        rule_scores: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+
+        def score_of(left, right):
+            rule = (left, right)
+            score = rule_scores.get(rule)
+            if score is None:
+                score = rule_scores[rule] = weight(left, right)
+            return score
+
+        nodes = self._nodes
+        # clave -> lista de (puntaje, empaquetadura, rango izq., rango der.)
+        best: Dict[NodeKey, List[Tuple[float, int, int, int]]] = {}
+        for key in self._bottom_up():
+            i, l, A = key
+            packings = nodes[key]
+            frontier = []
+            children = []
+            for j, packing in enumerate(packings):
+                if packing[0] == "term":
+                    right = (packing[1],) if l else ()
+                    frontier.append((-score_of(A, right), j, 0, 0))
+                    children.append(None)
+                    continue
+                s, B, C = packing
+                lefts, rights = best[(i, s, B)], best[(i + s, l - s, C)]
+                rule = score_of(A, (B, C))
+                children.append((rule, lefts, rights))
+                frontier.append((-(rule + lefts[0][0] + rights[0][0]), j, 0, 0))
+            heapq.heapify(frontier)
+            seen = set()
+            ranked = []
+            while frontier and len(ranked) < k:
+                neg, j, a, b = heapq.heappop(frontier)
+                ranked.append((-neg, j, a, b))
+                if children[j] is None:
+                    continue
+                rule, lefts, rights = children[j]
+                for a2, b2 in ((a + 1, b), (a, b + 1)):
+                    if a2 < len(lefts) and b2 < len(rights) and (j, a2, b2) not in seen:
+                        seen.add((j, a2, b2))
+                        heapq.heappush(frontier, (-(rule + lefts[a2][0] + rights[b2][0]), j, a2, b2))
+            best[key] = ranked
+
+        results = []
+        for rank, (score, _, _, _) in enumerate(best[self.root]):
+            root = TreeNode(self.root[2])
+            stack = [(root, self.root, rank)]
+            while stack:
+                parent, key, rank = stack.pop()
+                _, j, a, b = best[key][rank]
+                packing = nodes[key][j]
+                if packing[0] == "term":
+                    parent.children.append(TreeNode(packing[1]))
+                    continue
+                i, l, _ = key
+                s, B, C = packing
+                left, right = TreeNode(B), TreeNode(C)
+                parent.children.append(left)
+                parent.children.append(right)
+                stack.append((right, (i + s, l - s, C), b))
+                stack.append((left, (i, s, B), a))
+            results.append((score, root))
+        return results
+
+
+def parse_forest(grammar: Union[Grammar, CompiledGrammar], w: List[str]) -> SPPF:
+    """Analiza la cadena y devuelve el bosque con todas sus derivaciones.
+
+    La tabla de pertenencia se llena con el motor bitset de cyk_parse; luego
+    se recorre desde la raíz registrando, para cada nodo alcanzable, todas
+    las empaquetaduras (s, B, C) válidas.
+
+    grammar puede ser una Grammar (se compila usando la caché de
+    compile_grammar) o una CompiledGrammar ya construida.
+    """
+    compiled = grammar if isinstance(grammar, CompiledGrammar) else compile_grammar(grammar)
+    w = list(w)
+    n = len(w)
+    start = compiled.start
+
+    if n == 0:
+        # única derivación posible: S -> ε
+        nodes = {(0, 0, start): (("term", "ε"),)} if compiled.accepts_empty else {}
+        return SPPF(compiled, w, nodes, compiled.accepts_empty)
+
+    accepted, lazy = cyk_parse(compiled, w, engine="bitset", backpointers="lazy")
+    if not accepted:
+        return SPPF(compiled, w, {}, False)
+
+    chart = lazy.chart
+    names, ids = compiled.names, compiled.ids
+    right_mask, parents = compiled.right_mask, compiled.parents
+
+    nodes: Dict[NodeKey, Tuple] = {}
+    stack = [(0, n, start)]
+    while stack:
+        key = stack.pop()
+        if key in nodes:
+            continue
+        i, l, A = key
+        if l == 1:
+            nodes[key] = (("term", w[i]),)
+            continue
+        bit_a = 1 << ids[A]
+        packings = []
+        for s in range(1, l):
+            left = chart[i][s]
+            right = chart[i + s][l - s]
+            if not left or not right:
+                continue
+            while left:
+                low = left & -left
+                left ^= low
+                b = low.bit_length() - 1
+                hits = right & right_mask[b]
+                pb = parents[b]
+                while hits:
+                    low_c = hits & -hits
+                    hits ^= low_c
+                    c = low_c.bit_length() - 1
+                    if pb[c] & bit_a:
+                        B, C = names[b], names[c]
+                        packings.append((s, B, C))
+                        stack.append((i, s, B))
+                        stack.append((i + s, l - s, C))
+        nodes[key] = tuple(packings)
+    return SPPF(compiled, w, nodes, True)
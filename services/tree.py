@@ -1,13 +1,56 @@
+import json
+
+
 class TreeNode:
     def __init__(self, symbol, children=None):
         self.symbol = symbol
         self.children = children or []
 
 
+    @classmethod
+    def from_tuple(cls, node):
+        """Convierte un árbol (símbolo, hijos) de reconstruct_tree en TreeNode."""
+        root = cls(node[0])
+        stack = [(root, node[1])]
+        while stack:
+            parent, children = stack.pop()
+            for c in children:
+                if isinstance(c, tuple):
+                    child = cls(c[0])
+                    stack.append((child, c[1]))
+                else:
+                    child = cls(c)
+                parent.children.append(child)
+        return root
+
+
     def is_leaf(self):
         return len(self.children) == 0
 
 
+    def _lines(self, is_last=True, prefix=""):
+        """
+        Recorre el árbol en preorden sin recursión.
+        
+        Produce (prefijo + conector, símbolo con formato, es_terminal) por cada
+        línea de to_text; los hijos que no son TreeNode son terminales.
+        """
+        stack = [(self, is_last, prefix)]
+        while stack:
+            node, last, pre = stack.pop()
+            connector = "└── " if last else "├── "
+            if not isinstance(node, TreeNode):
+                yield pre + connector, f'"{node}"', True
+                continue
+            leaf = node.is_leaf()
+            yield pre + connector, f'"{node.symbol}"' if leaf else f'[{node.symbol}]', leaf
+            extension = pre + ("    " if last else "│   ")
+            children = node.children
+            last_index = len(children) - 1
+            for i in range(last_index, -1, -1):
+                stack.append((children[i], i == last_index, extension))
+
+
     def to_text(self, indent=0, is_last=True, prefix=""):
         """
         Genera una representación visual del árbol con caracteres ASCII.
@@ -17,38 +60,84 @@ class TreeNode:
         └── para el último nodo
         │   para líneas verticales
         """
-        # Caracteres para el árbol
-        connector = "└── " if is_last else "├── "
-        extension = "    " if is_last else "│   "
-        
-        # Símbolo con formato (terminales entre comillas)
-        symbol_str = f'"{self.symbol}"' if self.is_leaf() else f'[{self.symbol}]'
-        
-        result = prefix + connector + symbol_str + "\n"
-        
-        # Procesar hijos
-        for i, child in enumerate(self.children):
-            is_last_child = (i == len(self.children) - 1)
-            if isinstance(child, TreeNode):
-                result += child.to_text(indent + 1, is_last_child, prefix + extension)
-            else:
-                # Nodo terminal
-                child_connector = "└── " if is_last_child else "├── "
-                child_extension = "    " if is_last_child else "│   "
-                result += prefix + extension + child_connector + f'"{child}"\n'
+        return "".join(f"{head}{symbol}\n" for head, symbol, _ in self._lines(is_last, prefix))
+
+
+    def write_text(self, fp, is_last=True, prefix=""):
+        """Escribe to_text() en el archivo fp línea por línea, sin armar el texto completo."""
+        fp.writelines(f"{head}{symbol}\n" for head, symbol, _ in self._lines(is_last, prefix))
+
+
+    def render(self):
+        """
+        Texto de to_text() junto con los rangos a colorear, en una sola pasada.
         
-        return result
+        Returns:
+            (texto, rangos) con rangos = [(inicio, fin, tipo)] en caracteres
+            del texto; tipo es "connector", "terminal" o "nonterminal"
+        """
+        parts = []
+        ranges = []
+        add_part = parts.append
+        add_range = ranges.append
+        pos = 0
+        for head, symbol, terminal in self._lines():
+            end = pos + len(head)
+            add_range((pos, end, "connector"))
+            pos = end + len(symbol)
+            add_range((end, pos, "terminal" if terminal else "nonterminal"))
+            add_part(head)
+            add_part(symbol)
+            add_part("\n")
+            pos += 1
+        return "".join(parts), ranges
+
+
+    def _simple_lines(self, indent=0):
+        stack = [(self, indent)]
+        while stack:
+            node, ind = stack.pop()
+            if not isinstance(node, TreeNode):
+                yield " " * ind + f'"{node}"\n'
+                continue
+            yield " " * ind + f"[{node.symbol}]\n"
+            for c in reversed(node.children):
+                stack.append((c, ind + 2))
 
 
     def to_text_simple(self, indent=0):
         """Versión simple del árbol con indentación."""
-        s = " " * indent + f"[{self.symbol}]\n"
-        for c in self.children:
-            if isinstance(c, TreeNode):
-                s += c.to_text_simple(indent + 2)
+        return "".join(self._simple_lines(indent))
+
+
+    def write_text_simple(self, fp, indent=0):
+        """Escribe to_text_simple() en el archivo fp línea por línea."""
+        fp.writelines(self._simple_lines(indent))
+
+
+    def to_json(self):
+        """
+        Serializa el árbol como JSON anidado, sin recursión.
+        
+        Un nodo con hijos es [símbolo, hijo1, hijo2, ...] y una hoja es su
+        símbolo, p. ej. ["S", ["A", "a"], "b"].
+        """
+        parts = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if type(item) is tuple:  # separador o cierre pendiente
+                parts.append(item[0])
+            elif isinstance(item, TreeNode) and item.children:
+                parts.append("[" + json.dumps(str(item.symbol), ensure_ascii=False))
+                stack.append(("]",))
+                for child in reversed(item.children):
+                    stack.append(child)
+                    stack.append((", ",))
             else:
-                s += " " * (indent + 2) + f'"{c}"\n'
-        return s
+                symbol = item.symbol if isinstance(item, TreeNode) else item
+                parts.append(json.dumps(str(symbol), ensure_ascii=False))
+        return "".join(parts)
 
 
     def __repr__(self):
@@ -0,0 +1,217 @@
+"""
+Distribución de árboles de derivación para dibujarlos (tidy tree).
+
+layout_tree implementa el algoritmo de Reingold–Tilford en la versión de
+Walker con las correcciones de Buchheim, Jünger y Leipert, que corre en
+tiempo lineal: cada subárbol se arma de abajo hacia arriba y se acerca a
+sus hermanos izquierdos tanto como lo permiten sus contornos, el padre
+queda centrado sobre sus hijos y los subárboles intermedios se reparten el
+desplazamiento de forma uniforme. Ambas pasadas son iterativas, así que
+sirve para árboles de cualquier profundidad.
+
+El resultado no modifica el árbol: se entrega en listas paralelas indexadas
+por el número del nodo en preorden (la raíz es el 0) y no depende de Tk,
+así que se puede usar y medir sin interfaz gráfica.
+"""
+
+from typing import List
+
+from services.tree import TreeNode
+
+
+class TreeLayout:
+    """Posiciones de los nodos de un árbol, en listas indexadas por nodo.
+
+    Los nodos se numeran en preorden; los hijos que no son TreeNode cuentan
+    como nodos terminales.
+
+    Atributos:
+        labels: símbolo de cada nodo
+        terminal: si el nodo es una hoja (terminal)
+        parent: índice del padre (-1 para la raíz)
+        depth: nivel del nodo (0 para la raíz)
+        children: índices de los hijos, de izquierda a derecha
+        x: coordenada horizontal (la mínima es 0; nodos vecinos de un mismo
+           nivel quedan al menos a `distance`)
+        y: coordenada vertical (depth * level_distance)
+        width: máximo de x
+        height: máximo de y
+    """
+
+    def __init__(self, labels: List[str], terminal: List[bool], parent: List[int],
+                 depth: List[int], children: List[List[int]], x: List[float], y: List[float]):
+        self.labels = labels
+        self.terminal = terminal
+        self.parent = parent
+        self.depth = depth
+        self.children = children
+        self.x = x
+        self.y = y
+        self.width = max(x) if x else 0.0
+        self.height = max(y) if y else 0.0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return f"TreeLayout(nodos={len(self)}, ancho={self.width:g}, alto={self.height:g})"
+
+
+def layout_tree(root: TreeNode, distance: float = 1.0, level_distance: float = 1.0) -> TreeLayout:
+    """Calcula una distribución ordenada y compacta del árbol en O(n).
+
+    Args:
+        root: raíz del árbol (no se modifica)
+        distance: separación mínima entre nodos vecinos de un mismo nivel
+        level_distance: separación vertical entre niveles
+
+    Returns:
+        TreeLayout con las coordenadas de cada nodo
+    """
+    # Aplanar en preorden
+    labels: List[str] = []
+    terminal: List[bool] = []
+    parent: List[int] = []
+    depth: List[int] = []
+    children: List[List[int]] = []
+    stack = [(root, -1, 0)]
+    while stack:
+        node, p, d = stack.pop()
+        v = len(labels)
+        parent.append(p)
+        depth.append(d)
+        children.append([])
+        if p >= 0:
+            children[p].append(v)
+        if isinstance(node, TreeNode):
+            labels.append(str(node.symbol))
+            terminal.append(node.is_leaf())
+            for child in reversed(node.children):
+                stack.append((child, v, d + 1))
+        else:
+            labels.append(str(node))
+            terminal.append(True)
+
+    n = len(labels)
+    # posición entre hermanos y hermano izquierdo
+    number = [0] * n
+    left_sibling = [-1] * n
+    for kids in children:
+        for k, c in enumerate(kids):
+            number[c] = k
+            if k:
+                left_sibling[c] = kids[k - 1]
+
+    prelim = [0.0] * n
+    mod = [0.0] * n
+    shift = [0.0] * n
+    change = [0.0] * n
+    thread = [-1] * n
+    ancestor = list(range(n))
+    # ancestro por defecto de los hijos de cada nodo durante apportion
+    default = [kids[0] if kids else -1 for kids in children]
+
+    def next_left(v):
+        kids = children[v]
+        return kids[0] if kids else thread[v]
+
+    def next_right(v):
+        kids = children[v]
+        return kids[-1] if kids else thread[v]
+
+    def move_subtree(wm, wp, amount):
+        subtrees = number[wp] - number[wm]
+        change[wp] -= amount / subtrees
+        shift[wp] += amount
+        change[wm] += amount / subtrees
+        prelim[wp] += amount
+        mod[wp] += amount
+
+    def apportion(v, default_ancestor):
+        """Acerca el subárbol de v a los de sus hermanos izquierdos."""
+        w = left_sibling[v]
+        if w < 0:
+            return default_ancestor
+        vip = vop = v
+        vim = w
+        vom = children[parent[v]][0]
+        sip = mod[vip]
+        sop = mod[vop]
+        sim = mod[vim]
+        som = mod[vom]
+        while True:
+            right = next_right(vim)
+            left = next_left(vip)
+            if right < 0 or left < 0:
+                break
+            vim = right
+            vip = left
+            vom = next_left(vom)
+            vop = next_right(vop)
+            ancestor[vop] = v
+            amount = (prelim[vim] + sim) - (prelim[vip] + sip) + distance
+            if amount > 0:
+                a = ancestor[vim]
+                if parent[a] != parent[v]:
+                    a = default_ancestor
+                move_subtree(a, v, amount)
+                sip += amount
+                sop += amount
+            sim += mod[vim]
+            sip += mod[vip]
+            som += mod[vom]
+            sop += mod[vop]
+        right = next_right(vim)
+        if right >= 0 and next_right(vop) < 0:
+            thread[vop] = right
+            mod[vop] += sim - sop
+        left = next_left(vip)
+        if left >= 0 and next_left(vom) < 0:
+            thread[vom] = left
+            mod[vom] += sip - som
+            default_ancestor = v
+        return default_ancestor
+
+    # Primera pasada: postorden de izquierda a derecha (el preorden que
+    # visita primero los hijos derechos, invertido)
+    order = []
+    stack = [0] if n else []
+    while stack:
+        v = stack.pop()
+        order.append(v)
+        stack.extend(children[v])
+    for v in reversed(order):
+        kids = children[v]
+        w = left_sibling[v]
+        if kids:
+            # ejecutar los desplazamientos pendientes de los hijos
+            acc_shift = acc_change = 0.0
+            for c in reversed(kids):
+                prelim[c] += acc_shift
+                mod[c] += acc_shift
+                acc_change += change[c]
+                acc_shift += shift[c] + acc_change
+            midpoint = (prelim[kids[0]] + prelim[kids[-1]]) / 2
+            if w >= 0:
+                prelim[v] = prelim[w] + distance
+                mod[v] = prelim[v] - midpoint
+            else:
+                prelim[v] = midpoint
+        elif w >= 0:
+            prelim[v] = prelim[w] + distance
+        p = parent[v]
+        if p >= 0:
+            default[p] = apportion(v, default[p])
+
+    # Segunda pasada: sumar los modificadores de los ancestros (preorden)
+    x = [0.0] * n
+    mod_sum = [0.0] * n
+    for v in range(n):
+        x[v] = prelim[v] + mod_sum[v]
+        for c in children[v]:
+            mod_sum[c] = mod_sum[v] + mod[v]
+    if n:
+        left_edge = min(x)
+        x = [xi - left_edge for xi in x]
+    y = [d * level_distance for d in depth]
+    return TreeLayout(labels, terminal, parent, depth, children, x, y)
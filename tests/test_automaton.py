@@ -0,0 +1,294 @@
+"""
+Tests para la compilación de gramáticas regulares a autómatas (automaton.py).
+"""
+
+import itertools
+import os
+import random
+import tempfile
+import pytest
+from services.grammar import Grammar
+from services.automaton import build_dfa, compile_regular, minimize, save_dfa, load_dfa, StreamMatcher
+from services.generator import generate_shortest
+from services.parser_regular import parse_regular
+from services.parser_earley import earley_parse
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+def _random_regular(rng, left_linear):
+    """Gramática tipo 3 aleatoria (lineal derecha o izquierda) sobre {a, b}."""
+    N = ["S", "A", "B"]
+    P = []
+    for left in N:
+        for _ in range(rng.randint(1, 3)):
+            kind = rng.random()
+            if kind < 0.15:
+                P.append({"left": left, "right": []})
+            elif kind < 0.45:
+                P.append({"left": left, "right": [rng.choice("ab")]})
+            elif left_linear:
+                P.append({"left": left, "right": [rng.choice(N), rng.choice("ab")]})
+            else:
+                P.append({"left": left, "right": [rng.choice("ab"), rng.choice(N)]})
+    return Grammar(N=N, T=["a", "b"], P=P, S="S", gtype="type3")
+
+
+def _all_strings(alphabet, max_len):
+    for n in range(max_len + 1):
+        for w in itertools.product(alphabet, repeat=n):
+            yield list(w)
+
+
+class TestDFACompilation:
+    """Tests de construcción del AFD."""
+    
+    @pytest.mark.parametrize("name", ["example_regular.json", "example_left_linear.json"])
+    def test_dfa_matches_language(self, name):
+        """Test que el AFD acepta exactamente las cadenas generadas por la gramática."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, name))
+        language = set(generate_shortest(g, limit=10000, max_depth=7))
+        dfa = build_dfa(g)
+        
+        for w in _all_strings(g.T, 5):
+            assert dfa.accepts(w) == ("".join(w) in language), f"Error con {''.join(w)}"
+    
+    def test_dfa_nondeterministic_grammar(self):
+        """Test con gramática no determinista (el parser voraz falla)."""
+        g = Grammar(
+            N=["S", "A", "B"],
+            T=["a", "b", "c"],
+            P=[
+                {"left": "S", "right": ["a", "A"]},
+                {"left": "S", "right": ["a", "B"]},
+                {"left": "A", "right": ["b"]},
+                {"left": "B", "right": ["c"]}
+            ],
+            S="S",
+            gtype="type3"
+        )
+        
+        assert parse_regular(g, ["a", "c"], trace=False) == (True, [])
+        assert parse_regular(g, ["a", "b"], trace=False) == (True, [])
+        assert parse_regular(g, ["a"], trace=False) == (False, [])
+    
+    def test_dfa_epsilon_and_unit_rules(self):
+        """Test con producciones epsilon y unitarias."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["a", "A"]},
+                {"left": "A", "right": ["ε"]}
+            ],
+            S="S",
+            gtype="type3"
+        )
+        dfa = build_dfa(g)
+        
+        assert dfa.accepts([]) is True
+        assert dfa.accepts(["a", "a", "a"]) is True
+        assert dfa.accepts(["b"]) is False
+    
+    def test_dfa_epsilon_listed_as_terminal(self):
+        """Test que "ε" se trata como cadena vacía aunque esté en T."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "Ejercicio_sustentacion_2_fixed.json"))
+        dfa = build_dfa(g)
+        
+        assert "ε" not in dfa.alphabet
+        for s in ["aab", "abb", "aaaaab", "abbb"]:
+            assert dfa.accepts(list(s)) == parse_regular(g, list(s))[0], s
+    
+    def test_compile_regular_cached(self):
+        """Test que el AFD se reutiliza para gramáticas con el mismo contenido."""
+        path = os.path.join(EXAMPLES_DIR, "example_regular.json")
+        assert compile_regular(Grammar.load(path)) is compile_regular(Grammar.load(path))
+    
+    def test_compile_regular_invalid(self):
+        """Test que una gramática no regular produce error."""
+        g = Grammar(N=["S"], T=["a", "b"], P=[{"left": "S", "right": ["a", "b", "a"]}], S="S")
+        
+        with pytest.raises(ValueError):
+            compile_regular(g)
+        assert parse_regular(g, ["a"], trace=False)[0] is False
+
+
+class TestDFAMinimization:
+    """Tests de minimización de Hopcroft."""
+    
+    def test_minimize_merges_equivalent_states(self):
+        """Test que estados equivalentes se fusionan."""
+        # S y A generan el mismo lenguaje a*b: el AFD mínimo tiene 2 estados
+        g = Grammar(
+            N=["S", "A"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "A"]},
+                {"left": "S", "right": ["b"]},
+                {"left": "A", "right": ["a", "S"]},
+                {"left": "A", "right": ["b"]}
+            ],
+            S="S",
+            gtype="type3"
+        )
+        dfa = build_dfa(g)
+        small = minimize(dfa)
+        
+        assert small.num_states == 2
+        for w in _all_strings(g.T, 6):
+            assert small.accepts(w) == dfa.accepts(w)
+    
+    def test_minimize_removes_dead_states(self):
+        """Test que se eliminan estados desde los que no se puede aceptar."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a"]},
+                {"left": "S", "right": ["b", "A"]},
+                {"left": "A", "right": ["a", "A"]}
+            ],
+            S="S",
+            gtype="type3"
+        )
+        small = minimize(build_dfa(g))
+        
+        assert small.num_states == 2
+        assert small.accepts(["a"]) is True
+        assert small.accepts(["b", "a"]) is False
+    
+    def test_minimize_empty_language(self):
+        """Test con gramática que no genera ninguna cadena."""
+        g = Grammar(N=["S"], T=["a"], P=[{"left": "S", "right": ["a", "S"]}], S="S", gtype="type3")
+        small = minimize(build_dfa(g))
+        
+        assert small.num_states == 1
+        assert small.accepts([]) is False
+    
+    def test_minimize_keeps_accepting_states(self):
+        """Test que los bloques de estados finales siguen siendo de aceptación."""
+        g = Grammar(N=["S"], T=["a", "b"], P=[
+            {"left": "S", "right": ["a"]},
+            {"left": "S", "right": ["b", "S"]},
+            {"left": "S", "right": []}
+        ], S="S", gtype="type3")
+        dfa = compile_regular(g)
+        
+        assert dfa.accepts([]) is True
+        assert dfa.accepts(["b"]) is True
+        assert dfa.accepts(["b", "a"]) is True
+        assert dfa.accepts(["a", "a"]) is False
+    
+    @pytest.mark.parametrize("left_linear", [False, True])
+    def test_minimize_preserves_language_random(self, left_linear):
+        """Propiedad: minimize(d) acepta lo mismo que d y que el parser de Earley."""
+        rng = random.Random(11 if left_linear else 12)
+        strings = list(_all_strings(["a", "b"], 5))
+        for _ in range(60):
+            g = _random_regular(rng, left_linear)
+            dfa = build_dfa(g)
+            small = minimize(dfa)
+            for w in strings:
+                expected = earley_parse(g, w)[0]
+                assert dfa.accepts(w) == expected, (g.P, w)
+                assert small.accepts(w) == expected, (g.P, w)
+
+
+class TestStreamMatcher:
+    """Tests del reconocedor incremental."""
+
+    @pytest.mark.parametrize("name", ["example_regular.json", "example_left_linear.json"])
+    def test_chunks_match_dfa(self, name):
+        """Test que alimentar por partes da el mismo resultado que el AFD."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, name))
+        dfa = compile_regular(g)
+        matcher = StreamMatcher(g)
+        for w in _all_strings(g.T, 5):
+            matcher.reset()
+            for i in range(0, len(w), 2):
+                matcher.feed(w[i:i + 2])
+            assert matcher.is_accepting() == dfa.accepts(w)
+            assert matcher.is_dead() == (matcher.position < len(w))
+
+    def test_early_rejection(self):
+        """Test que el rechazo se detecta sin leer el resto del flujo."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_left_linear.json"))
+
+        def stream():
+            yield from "ab"
+            yield "a"
+            raise AssertionError("se leyó después del rechazo")
+
+        matcher = StreamMatcher(g)
+        assert matcher.feed(stream()) is False
+        assert matcher.is_dead()
+        assert matcher.position == 2
+        assert matcher.feed("c") is False
+
+        matcher.reset()
+        assert matcher.feed("ab") and matcher.feed("c")
+        assert matcher.is_accepting()
+
+    def test_unbounded_stream(self):
+        """Test con un flujo largo de una gramática con ciclos."""
+        g = Grammar(N=["S"], T=["a", "b"], P=[
+            {"left": "S", "right": ["a", "S"]},
+            {"left": "S", "right": ["b", "S"]},
+            {"left": "S", "right": []},
+        ], S="S", gtype="type3")
+        matcher = StreamMatcher(g)
+        for _ in range(1000):
+            assert matcher.feed("ab" * 50)
+        assert matcher.is_accepting()
+        assert matcher.position == 100000
+        assert matcher.feed("abx") is False
+        assert matcher.position == 100002
+
+    def test_empty_language_is_dead(self):
+        """Test que un lenguaje vacío está muerto desde el inicio."""
+        g = Grammar(N=["S"], T=["a"], P=[{"left": "S", "right": ["a", "S"]}], S="S", gtype="type3")
+        matcher = StreamMatcher(g)
+        assert matcher.is_dead()
+        assert not matcher.is_accepting()
+
+
+class TestDFASerialization:
+    """Tests del formato binario del AFD."""
+    
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_save_and_load(self, use_mmap):
+        """Test que el AFD cargado reconoce el mismo lenguaje."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_left_linear.json"))
+        dfa = compile_regular(g)
+        
+        with tempfile.NamedTemporaryFile(suffix=".dfa", delete=False) as f:
+            path = f.name
+        try:
+            save_dfa(dfa, path)
+            loaded = load_dfa(path, use_mmap=use_mmap)
+            
+            assert loaded.alphabet == dfa.alphabet
+            assert loaded.num_states == dfa.num_states
+            assert list(loaded.transitions) == list(dfa.transitions)
+            for w in _all_strings(g.T, 4):
+                assert loaded.accepts(w) == dfa.accepts(w)
+            del loaded
+        finally:
+            os.remove(path)
+    
+    def test_load_invalid_file(self):
+        """Test que un archivo con firma incorrecta produce error."""
+        with tempfile.NamedTemporaryFile(suffix=".dfa", delete=False) as f:
+            f.write(b"no es un automata" * 4)
+            path = f.name
+        try:
+            with pytest.raises(ValueError):
+                load_dfa(path)
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
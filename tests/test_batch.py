@@ -0,0 +1,83 @@
+"""
+Tests para el análisis por lotes (services/batch.py).
+"""
+
+import itertools
+import os
+import pytest
+from services.grammar import Grammar
+from services.batch import parse_many
+from services.parser_cyk import cyk_parse
+from services.tree import TreeNode
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+def _inputs(grammar, max_len=4):
+    return [list(w) for n in range(1, max_len + 1) for w in itertools.product(grammar.T, repeat=n)]
+
+
+class TestParseMany:
+    """Tests de parse_many."""
+    
+    def test_parse_many_matches_cyk(self):
+        """Test que los resultados coinciden con cyk_parse cadena por cadena."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        inputs = _inputs(g)
+        results = list(parse_many(g, inputs))
+        
+        assert [r[0] for r in results] == list(range(len(inputs)))
+        for (index, acept, tree), w in zip(results, inputs):
+            assert acept == cyk_parse(g, w)[0]
+            assert isinstance(tree, TreeNode) if acept else tree is None
+    
+    def test_parse_many_acceptance_only(self):
+        """Test que build_trees=False no construye árboles."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        results = list(parse_many(g, [["a", "b"], ["b"]], build_trees=False))
+        
+        assert results == [(0, True, None), (1, False, None)]
+    
+    def test_parse_many_regular(self):
+        """Test con gramática regular (devuelve la derivación)."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_regular.json"))
+        results = list(parse_many(g, [["a", "b"], ["a", "a"]]))
+        
+        assert results[0][1] is True
+        assert len(results[0][2]) == 2
+        assert results[1][1] is False
+    
+    def test_parse_many_regular_nondeterministic(self):
+        """Test que la aceptación no depende de build_trees con una gramática no determinista."""
+        g = Grammar(N=["S", "A"], T=["a", "b"], P=[
+            {"left": "S", "right": ["a", "S"]},
+            {"left": "S", "right": ["a", "A"]},
+            {"left": "A", "right": ["b"]}
+        ], S="S", gtype="type3")
+        inputs = [list(w) for w in ("ab", "aab", "b", "aaba")]
+        with_trees = list(parse_many(g, inputs))
+        acceptance = list(parse_many(g, inputs, build_trees=False))
+        
+        assert [r[1] for r in with_trees] == [r[1] for r in acceptance] == [True, True, False, False]
+        assert with_trees[1][2] == [("S", "S → aS"), ("S", "S → aA"), ("A", "A → b")]
+        assert with_trees[2][2] is None
+    
+    def test_parse_many_process_pool(self):
+        """Test que el modo multiproceso conserva orden y resultados."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        inputs = _inputs(g, max_len=3)
+        serial = list(parse_many(g, inputs, build_trees=False))
+        parallel = list(parse_many(g, iter(inputs), jobs=2, chunksize=5, build_trees=False))
+        
+        assert parallel == serial
+    
+    def test_parse_many_invalid_chunksize(self):
+        """Test que chunksize debe ser positivo."""
+        g = Grammar(N=["S"], T=["a"], P=[{"left": "S", "right": ["a"]}], S="S")
+        with pytest.raises(ValueError):
+            list(parse_many(g, [["a"]], chunksize=0))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+Tests para los subcomandos de línea de comandos de run.py (parse, generate, validate).
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import run
+from services.grammar import Grammar
+from services.generator import iter_strings
+from itertools import islice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_DIR = os.path.join(ROOT, "examples")
+CNF = os.path.join(EXAMPLES_DIR, "example_cnf_json.json")
+
+
+def run_cli(argv, text=""):
+    """Ejecuta run.run_cli y retorna (código, registros JSON)."""
+    out = io.StringIO()
+    code = run.run_cli(argv, stdin=io.StringIO(text), stdout=out)
+    return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestCLI:
+    """Tests de los subcomandos sin interfaz gráfica."""
+
+    def test_parse_trees_and_acceptance_only(self):
+        """Test que parse emite un registro por línea, con árbol solo si se acepta."""
+        code, records = run_cli(["parse", CNF], "ab\nba\naab\n")
+        assert code == 0
+        assert [(r["index"], r["input"], r["accepted"]) for r in records] == [
+            (0, "ab", True), (1, "ba", False), (2, "aab", True)]
+        assert records[0]["tree"] == ["S", ["A", "a"], ["B", "b"]]
+        assert "tree" not in records[1]
+
+        code, fast = run_cli(["parse", CNF, "-", "--acceptance-only"], "ab\nba\naab\n")
+        assert [r["accepted"] for r in fast] == [True, False, True]
+        assert all("tree" not in r for r in fast)
+
+    def test_parse_file_with_jobs_and_separator(self, tmp_path):
+        """Test que --jobs y --sep no cambian los resultados ni su orden."""
+        lines = ["a " * k + "b" for k in range(1, 40)] + ["b a"]
+        path = tmp_path / "inputs.txt"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        _, serial = run_cli(["parse", CNF, str(path), "--sep", " "])
+        _, parallel = run_cli(["parse", CNF, str(path), "--sep", " ", "--jobs", "2"])
+        assert serial == parallel
+        assert [r["accepted"] for r in serial] == [True] * 39 + [False]
+
+    def test_generate(self):
+        """Test que generate coincide con iter_strings."""
+        path = os.path.join(EXAMPLES_DIR, "example_llc_json.json")
+        code, records = run_cli(["generate", path, "--limit", "5", "--max-depth", "8"])
+        expected = list(islice(iter_strings(Grammar.load(path), max_depth=8), 5))
+        assert code == 0
+        assert [r["string"] for r in records] == expected
+
+    def test_validate_exit_codes(self):
+        """Test que validate retorna 1 si una cadena es rechazada y 2 si falta la gramática."""
+        code, records = run_cli(["validate", CNF])
+        assert code == 0
+        assert records == [{"grammar": CNF, "valid": True, "type": "type2", "cnf": True}]
+
+        code, records = run_cli(["validate", CNF, "-"], "ab\nba\n")
+        assert code == 1
+        assert [r["accepted"] for r in records[1:]] == [True, False]
+
+        assert run_cli(["validate", os.path.join(EXAMPLES_DIR, "missing.json")])[0] == 2
+
+    def test_parse_and_validate_agree_on_nondeterministic_regular(self, tmp_path):
+        """Test que parse, parse --acceptance-only y validate coinciden en una gramática regular no determinista."""
+        path = tmp_path / "nondet.json"
+        Grammar(N=["S", "A"], T=["a", "b"], P=[
+            {"left": "S", "right": ["a", "S"]},
+            {"left": "S", "right": ["a", "A"]},
+            {"left": "A", "right": ["b"]}
+        ], S="S", gtype="type3").save(str(path))
+        text = "ab\naab\nb\naaba\n"
+
+        _, parsed = run_cli(["parse", str(path)], text)
+        _, fast = run_cli(["parse", str(path), "--acceptance-only"], text)
+        _, validated = run_cli(["validate", str(path), "-"], text)
+        expected = [True, True, False, False]
+        assert [r["accepted"] for r in parsed] == expected
+        assert [r["accepted"] for r in fast] == expected
+        assert [r["accepted"] for r in validated[1:]] == expected
+        assert parsed[0]["derivation"] == [["S", "S → aA"], ["A", "A → b"]]
+
+    def test_no_gui_imports(self):
+        """Test que la línea de comandos no importa tkinter ni ttkbootstrap."""
+        script = (
+            "import sys, run\n"
+            "code = run.run_cli(['parse', sys.argv[1], '-', '--acceptance-only'])\n"
+            "assert 'tkinter' not in sys.modules and 'ttkbootstrap' not in sys.modules\n"
+            "sys.exit(code)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script, CNF], input="ab\n",
+                                capture_output=True, text=True, cwd=ROOT)
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout) == {"index": 0, "input": "ab", "accepted": True}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
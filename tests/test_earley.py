@@ -0,0 +1,184 @@
+"""
+Tests para el parser de Earley (parser_earley.py).
+"""
+
+import itertools
+import os
+import threading
+import pytest
+from services.grammar import Grammar
+from services.cancellation import Cancelled
+from services.parser_cyk import cyk_parse
+from services.parser_earley import earley_parse
+from services.tree import TreeNode
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+def _leaves(tree):
+    """Hojas del árbol de izquierda a derecha (sin ε)."""
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if not node.children:
+            if node.symbol != "ε":
+                out.append(node.symbol)
+        stack.extend(reversed(node.children))
+    return out
+
+
+def _symbols(tree):
+    out = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        out.add(node.symbol)
+        stack.extend(node.children)
+    return out
+
+
+class TestEarleyBasic:
+    """Tests básicos del parser de Earley."""
+    
+    def test_earley_matches_cyk(self):
+        """Test que Earley acepta las mismas cadenas que CYK."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        for n in range(1, 7):
+            for w in itertools.product(g.T, repeat=n):
+                acept, tree = earley_parse(g, list(w))
+                assert acept == cyk_parse(g, list(w))[0], f"Resultado distinto para {''.join(w)}"
+                if acept:
+                    assert _leaves(tree) == list(w)
+    
+    def test_earley_tree_uses_original_nonterminals(self):
+        """Test que el árbol no contiene no terminales auxiliares de CNF."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        acept, tree = earley_parse(g, list("abbab"))
+        
+        assert acept is True
+        assert isinstance(tree, TreeNode)
+        assert tree.symbol == "C"
+        assert not any(s.startswith("@") for s in _symbols(tree))
+        assert [c.symbol for c in tree.children] == ["A", "B", "A"]
+    
+    def test_earley_reject(self):
+        """Test que se rechaza una cadena fuera del lenguaje."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        
+        assert earley_parse(g, list("ba")) == (False, None)
+
+
+class TestEarleyEpsilon:
+    """Tests con producciones epsilon."""
+    
+    def _parens(self):
+        return Grammar(
+            N=["S"],
+            T=["(", ")"],
+            P=[
+                {"left": "S", "right": ["(", "S", ")", "S"]},
+                {"left": "S", "right": []}
+            ],
+            S="S"
+        )
+    
+    def test_earley_epsilon_rules(self):
+        """Test de paréntesis balanceados con S -> ε."""
+        g = self._parens()
+        
+        assert earley_parse(g, list("(()())"))[0] is True
+        assert earley_parse(g, list("(()"))[0] is False
+        assert earley_parse(g, [])[0] is True
+    
+    def test_earley_epsilon_tree(self):
+        """Test que las ε-derivaciones aparecen como hojas ε."""
+        acept, tree = earley_parse(self._parens(), list("()"))
+        
+        assert acept is True
+        assert [c.symbol for c in tree.children] == ["(", "S", ")", "S"]
+        assert tree.children[1].children[0].symbol == "ε"
+    
+    def test_earley_nullable_chain(self):
+        """Test con anulables encadenados y símbolo epsilon explícito."""
+        g = Grammar(
+            N=["S", "A", "B"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["A", "B", "a"]},
+                {"left": "A", "right": ["B"]},
+                {"left": "B", "right": ["ε"]}
+            ],
+            S="S"
+        )
+        
+        acept, tree = earley_parse(g, ["a"])
+        assert acept is True
+        assert _leaves(tree) == ["a"]
+
+
+class TestEarleyDeep:
+    """Tests con derivaciones profundas."""
+    
+    def test_earley_long_left_recursion(self):
+        """Test que una recursión izquierda larga no agota la pila."""
+        g = Grammar(
+            N=["S"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["S", "a"]},
+                {"left": "S", "right": ["a"]}
+            ],
+            S="S"
+        )
+        w = ["a"] * 3000
+        acept, tree = earley_parse(g, w)
+        
+        assert acept is True
+        assert _leaves(tree) == w
+    
+    def test_earley_unit_cycle(self):
+        """Test con ciclo de reglas unitarias S -> A -> S."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["S"]},
+                {"left": "A", "right": ["a"]},
+                {"left": "S", "right": ["S", "S"]}
+            ],
+            S="S"
+        )
+        acept, tree = earley_parse(g, list("aaa"))
+        
+        assert acept is True
+        assert _leaves(tree) == list("aaa")
+
+
+
+class TestEarleyCancellation:
+    """Tests de cancelación y progreso."""
+
+    def test_earley_cancel_and_progress(self):
+        """Test que un evento activado interrumpe el análisis y que el progreso llega a 1."""
+        g = Grammar(N=["S"], T=["a"], P=[
+            {"left": "S", "right": ["S", "a"]},
+            {"left": "S", "right": ["a"]}
+        ], S="S")
+        w = ["a"] * 50
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(Cancelled):
+            earley_parse(g, w, cancel=cancel)
+
+        seen = []
+        acept, tree = earley_parse(g, w, cancel=threading.Event(), progress=seen.append)
+        assert acept is True
+        assert _leaves(tree) == w
+        assert seen == sorted(seen) and seen[-1] == 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,8 +4,15 @@ Prueba la generación de cadenas con BFS en el espacio de derivaciones.
 """
 
 import pytest
+import threading
+import time
 from services.grammar import Grammar
-from services.generator import generate_shortest
+import itertools
+from itertools import islice
+from services import generator
+from services.generator import generate_shortest, iter_strings, LanguageCounter, sample_strings
+from services.parser_cyk import cyk_parse
+from services.cancellation import Cancelled
 
 
 class TestGeneratorBasic:
@@ -397,6 +404,289 @@ class TestGeneratorTypeVariations:
         assert "ab" in out, "Debería generar 'ab'"
 
 
+class TestIterStrings:
+    """Tests del generador perezoso iter_strings."""
+
+    def _grammar(self):
+        return Grammar(
+            N=["S"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "S", "b"]},
+                {"left": "S", "right": ["a", "S"]},
+                {"left": "S", "right": ["b"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+
+    def test_bfs_matches_generate_shortest(self):
+        """El orden "bfs" reproduce exactamente generate_shortest."""
+        g = self._grammar()
+        expected = generate_shortest(g, limit=15, max_depth=8)
+        assert list(islice(iter_strings(g, max_depth=8, order="bfs"), 15)) == expected
+
+    def test_length_order_is_non_decreasing(self):
+        """El orden "length" produce cadenas de longitud no decreciente y sin repetir."""
+        out = list(islice(iter_strings(self._grammar(), max_depth=10), 40))
+        assert out[0] == "b"
+        assert [len(s) for s in out] == sorted(len(s) for s in out)
+        assert len(out) == len(set(out))
+
+    def test_early_stop_on_huge_depth(self):
+        """Se puede pedir la primera cadena aunque el espacio sea enorme."""
+        gen = iter_strings(self._grammar(), max_depth=10**6)
+        assert next(gen) == "b"
+        assert next(gen) in ("ab", "abb")
+
+    def test_skips_non_generating_nonterminals(self):
+        """Las sentenciales con no terminales improductivos no se exploran."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["A"]},
+                {"left": "S", "right": ["a"]},
+                {"left": "A", "right": ["a", "A"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        assert list(iter_strings(g, max_depth=50)) == ["a"]
+
+    @pytest.mark.parametrize("order", ["length", "bfs"])
+    def test_derivation_cycles_terminate(self, order):
+        """Los ciclos de reglas unitarias y ε no repiten la búsqueda sin fin."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["S"]},
+                {"left": "S", "right": ["S", "S"]},
+                {"left": "S", "right": []},
+                {"left": "A", "right": ["a"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        out = list(iter_strings(g, max_depth=4, order=order))
+        assert sorted(out, key=len) == ["", "a", "aa", "aaa", "aaaa", "aaaaa"][:len(out)]
+        assert "aaaa" in out
+
+    def test_unknown_order(self):
+        """Un orden desconocido produce ValueError."""
+        with pytest.raises(ValueError):
+            iter_strings(self._grammar(), order="dfs")
+
+    @pytest.mark.parametrize("order", ["length", "bfs"])
+    def test_cancel(self, order):
+        """Un evento de cancelación activado interrumpe la generación."""
+        cancel = threading.Event()
+        gen = iter_strings(self._grammar(), max_depth=10, order=order, cancel=cancel)
+        assert next(gen) == "b"
+        cancel.set()
+        with pytest.raises(Cancelled):
+            next(gen)
+
+
+class TestLanguageCounter:
+    """Tests del conteo y desranqueo por longitud."""
+
+    def _balanced(self):
+        # Paréntesis balanceados no vacíos: S -> ( S ) | S S | ( )
+        return Grammar(
+            N=["S"],
+            T=["(", ")"],
+            P=[
+                {"left": "S", "right": ["(", "S", ")"]},
+                {"left": "S", "right": ["(", ")"]},
+                {"left": "S", "right": ["S", "S"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+
+    def test_catalan_counts(self):
+        """S -> SS | a cuenta árboles binarios: números de Catalan."""
+        g = Grammar(
+            N=["S"], T=["a"],
+            P=[{"left": "S", "right": ["S", "S"]}, {"left": "S", "right": ["a"]}],
+            S="S", gtype="type2"
+        )
+        counter = LanguageCounter(g)
+        assert [counter.count(L) for L in range(1, 9)] == [1, 1, 2, 5, 14, 42, 132, 429]
+        assert counter.count(0) == 0
+        # Los enteros de Python no se desbordan
+        assert counter.count(200) > 10 ** 100
+
+    def test_unrank_covers_language(self):
+        """Cada índice produce una cadena del lenguaje y se cubren todas."""
+        g = Grammar(
+            N=["S"], T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "S", "b"]},
+                {"left": "S", "right": ["b", "S", "a"]},
+                {"left": "S", "right": ["a", "b"]}
+            ],
+            S="S", gtype="type2"
+        )
+        counter = LanguageCounter(g)
+        for L in range(1, 9):
+            generated = [counter.unrank(L, k) for k in range(counter.count(L))]
+            expected = sorted("".join(w) for w in itertools.product("ab", repeat=L)
+                              if cyk_parse(g, list(w))[0])
+            # Gramática no ambigua: una derivación por cadena
+            assert sorted(generated) == expected
+
+    def test_ambiguous_counts_derivations(self):
+        """En gramáticas ambiguas se cuentan derivaciones, no cadenas."""
+        counter = LanguageCounter(self._balanced())
+        strings = list(counter.enumerate(6))
+        assert len(strings) == counter.count(6)
+        assert len(set(strings)) < len(strings)
+        assert "()()()" in strings
+
+    def test_derivations(self):
+        """derivations cuenta los árboles de una cadena en la forma CNF."""
+        counter = LanguageCounter(self._balanced())
+        strings = list(counter.enumerate(6))
+        for w in set(strings):
+            assert counter.derivations(list(w)) == strings.count(w)
+        assert counter.derivations(list("(()")) == 0
+        assert counter.derivations([]) == 0
+
+    def test_enumerate_pages(self):
+        """Las páginas consecutivas reconstruyen la enumeración completa."""
+        counter = LanguageCounter(self._balanced())
+        full = list(counter.enumerate(8))
+        pages = []
+        for offset in range(0, len(full), 7):
+            pages.extend(counter.enumerate(8, offset=offset, limit=7))
+        assert pages == full
+        assert list(counter.enumerate(8, offset=len(full))) == []
+
+    def test_unrank_out_of_range(self):
+        """Índices fuera de rango producen IndexError."""
+        counter = LanguageCounter(self._balanced())
+        with pytest.raises(IndexError):
+            counter.unrank(4, counter.count(4))
+        with pytest.raises(IndexError):
+            counter.unrank(3, 0)
+
+
+class TestSampleStrings:
+    """Tests del muestreo aleatorio uniforme."""
+
+    def _grammar(self):
+        # a^n b^m con n >= 1, m >= 1: todas las cadenas de longitud L son equiprobables
+        return Grammar(
+            N=["S", "A", "B"], T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["A", "B"]},
+                {"left": "A", "right": ["a", "A"]},
+                {"left": "A", "right": ["a"]},
+                {"left": "B", "right": ["b", "B"]},
+                {"left": "B", "right": ["b"]}
+            ],
+            S="S", gtype="type2"
+        )
+
+    def test_seed_is_reproducible(self):
+        """La misma semilla produce las mismas muestras."""
+        g = self._grammar()
+        assert sample_strings(g, 12, n=20, seed=7) == sample_strings(g, 12, n=20, seed=7)
+
+    def test_samples_belong_to_language(self):
+        """Las muestras tienen la longitud pedida y son aceptadas por CYK."""
+        g = self._grammar()
+        for s in sample_strings(g, 10, n=30, seed=1):
+            assert len(s) == 10
+            assert cyk_parse(g, list(s))[0]
+
+    def test_distribution_is_uniform(self):
+        """Con 5 cadenas de longitud 6, cada una sale ~1/5 de las veces."""
+        samples = sample_strings(self._grammar(), 6, n=5000, seed=3)
+        freq = {s: samples.count(s) for s in set(samples)}
+        assert len(freq) == 5
+        assert all(800 < c < 1200 for c in freq.values())
+
+    def test_ambiguous_grammar_is_uniform_over_strings(self):
+        """Con una gramática ambigua cada cadena distinta sale ~1/5 de las veces."""
+        g = Grammar(
+            N=["S"], T=["(", ")"],
+            P=[
+                {"left": "S", "right": ["(", "S", ")"]},
+                {"left": "S", "right": ["(", ")"]},
+                {"left": "S", "right": ["S", "S"]}
+            ],
+            S="S", gtype="type2"
+        )
+        # 5 cadenas y 6 derivaciones: "()()()" tiene dos árboles
+        assert generator.language_counter(g).count(6) == 6
+        samples = sample_strings(g, 6, n=5000, seed=5, over_strings=True)
+        freq = {s: samples.count(s) for s in set(samples)}
+        assert len(freq) == 5
+        assert all(800 < c < 1200 for c in freq.values())
+
+        # Por defecto el muestreo es uniforme sobre derivaciones
+        samples = sample_strings(g, 6, n=6000, seed=5)
+        assert 1700 < samples.count("()()()") < 2300
+
+    def test_ambiguous_grammar_is_fast(self):
+        """Muestrear una gramática muy ambigua no depende de su cantidad de árboles."""
+        g = Grammar(
+            N=["S"], T=["a"],
+            P=[{"left": "S", "right": ["S", "S"]}, {"left": "S", "right": ["a"]}],
+            S="S", gtype="type2"
+        )
+        t0 = time.perf_counter()
+        assert sample_strings(g, 40, n=20, seed=1) == ["a" * 40] * 20
+        assert time.perf_counter() - t0 < 2
+
+        # El muestreo uniforme sobre cadenas se corta con un error claro
+        with pytest.raises(RuntimeError):
+            sample_strings(g, 14, n=1, seed=1, over_strings=True, max_attempts=50)
+
+    def test_regular_grammar_is_uniform_over_strings(self):
+        """Una gramática regular no determinista se muestrea sobre su AFD."""
+        # S -> aS | aA | b, A -> aA | b: a^n b con varias derivaciones por cadena
+        g = Grammar(
+            N=["S", "A"], T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "S"]},
+                {"left": "S", "right": ["a", "A"]},
+                {"left": "S", "right": ["b"]},
+                {"left": "A", "right": ["a", "A"]},
+                {"left": "A", "right": ["b"]},
+                {"left": "S", "right": ["b", "S"]}
+            ],
+            S="S", gtype="type3"
+        )
+        samples = sample_strings(g, 3, n=4000, seed=2)
+        freq = {s: samples.count(s) for s in set(samples)}
+        expected = {"".join(w) for w in itertools.product("ab", repeat=3)
+                    if cyk_parse(g, list(w))[0]}
+        assert set(freq) == expected
+        share = 4000 / len(expected)
+        assert all(0.8 * share < c < 1.2 * share for c in freq.values())
+
+    def test_tables_are_cached(self, monkeypatch):
+        """Las tablas se construyen una vez por gramática."""
+        monkeypatch.setattr(generator, "_counters",
+                            generator.GrammarCache(generator._counters.factory, 4))
+        g = self._grammar()
+        sample_strings(g, 8, n=3)
+        sample_strings(g, 8, n=3)
+        info = generator._counters.info()
+        assert (info.hits, info.misses) == (1, 1)
+
+    def test_no_strings_of_length(self):
+        """Pedir una longitud sin cadenas produce ValueError."""
+        with pytest.raises(ValueError):
+            sample_strings(self._grammar(), 1)
+
+
 if __name__ == "__main__":
     # Ejecutar con pytest: pytest tests/test_generator.py -v
     pytest.main([__file__, "-v"])
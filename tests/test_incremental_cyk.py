@@ -0,0 +1,122 @@
+"""
+Tests para el análisis CYK incremental (incremental_cyk.py).
+"""
+
+import os
+import random
+
+import pytest
+from services.grammar import Grammar
+from services.compiled_grammar import compile_grammar
+from services.incremental_cyk import IncrementalCYK
+from services.parser_cyk import cyk_parse, build_tree
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+
+
+def balanced_grammar():
+    """S -> ( S ) S | ε en CNF tras la conversión automática."""
+    return Grammar(["S"], ["(", ")"], [
+        {"left": "S", "right": ["(", "S", ")", "S"]},
+        {"left": "S", "right": []},
+    ], "S")
+
+
+def assert_same_chart(parser):
+    full = IncrementalCYK(parser.compiled, parser.tokens)
+    n = len(parser.tokens)
+    for i in range(n):
+        for l in range(1, n - i + 1):
+            assert parser.chart[i][l] == full.chart[i][l], (i, l)
+    assert parser.accepted == full.accepted
+
+
+class TestIncrementalCYK:
+    """Tests de ediciones sobre la tabla CYK."""
+
+    def test_random_edits_match_full_parse(self):
+        """Test que cualquier secuencia de ediciones da la misma tabla que reanalizar."""
+        rng = random.Random(7)
+        for name in ("example_cnf_json.json", "example_llc_json.json"):
+            compiled = compile_grammar(Grammar.load(os.path.join(EXAMPLES_DIR, name)))
+            terminals = sorted(compiled.term_mask)
+            parser = IncrementalCYK(compiled, [rng.choice(terminals) for _ in range(20)])
+            for _ in range(40):
+                n = len(parser.tokens)
+                offset = rng.randint(0, n)
+                deleted = rng.randint(0, min(2, n - offset))
+                inserted = [rng.choice(terminals) for _ in range(rng.randint(0, 2))]
+                parser.edit(offset, deleted, inserted)
+                assert_same_chart(parser)
+
+    def test_typing_and_reparse(self):
+        """Test que escribir carácter a carácter y borrar coincide con cyk_parse."""
+        g = balanced_grammar()
+        parser = IncrementalCYK(g)
+        assert parser.accepted == cyk_parse(g, [])[0]
+        text = ""
+        for ch in "(()(()))()":
+            text += ch
+            assert parser.reparse(list(text)) == cyk_parse(g, list(text))[0]
+        assert parser.accepted
+        text = text[:3] + text[4:]
+        assert parser.reparse(list(text)) == cyk_parse(g, list(text))[0]
+        assert_same_chart(parser)
+
+    def test_replacement_reuses_chart(self):
+        """Test que reemplazar un token con el mismo efecto no recalcula celdas."""
+        g = Grammar(["S"], ["a", "b"], [
+            {"left": "S", "right": ["S", "S"]},
+            {"left": "S", "right": ["a"]},
+            {"left": "S", "right": ["b"]},
+        ], "S")
+        parser = IncrementalCYK(g, ["a", "b"] * 30)
+        assert parser.edit(30, 1, ["b"])
+        assert parser.recomputed == 0
+        assert parser.edit(10, 0, ["a"])
+        assert parser.recomputed < 60 * 61 // 2 // 10
+        assert_same_chart(parser)
+
+    def test_deletion_reuses_chart(self):
+        """Test que borrar tokens solo recombina los splits que cruzaban lo borrado."""
+        g = Grammar(["S"], ["a", "b"], [
+            {"left": "S", "right": ["S", "S"]},
+            {"left": "S", "right": ["a"]},
+            {"left": "S", "right": ["b"]},
+        ], "S")
+        parser = IncrementalCYK(g, ["a", "b"] * 30)
+        assert parser.edit(30, 1, [])
+        assert parser.recomputed == 0
+        assert parser.edit(10, 3, [])
+        assert parser.recomputed == 0
+        assert_same_chart(parser)
+
+    def test_deletion_falls_back_when_splits_are_lost(self):
+        """Test que una celda se recombina si lo borrado aportaba no terminales."""
+        parser = IncrementalCYK(balanced_grammar(), list("(()())"))
+        assert parser.accepted
+        parser.edit(1, 1, [])
+        assert not parser.accepted
+        assert parser.recomputed > 0
+        assert_same_chart(parser)
+
+    def test_backpointers_build_tree(self):
+        """Test que los backpointers de la tabla editada construyen un árbol válido."""
+        g = balanced_grammar()
+        parser = IncrementalCYK(g, list("(())"))
+        parser.edit(2, 0, list("()"))
+        assert parser.accepted
+        tree = build_tree(parser.backpointers(), 0, 6, parser.compiled.start)
+        assert tree.symbol == parser.compiled.start
+
+    def test_invalid_edit(self):
+        """Test que una edición fuera de rango lanza ValueError."""
+        parser = IncrementalCYK(balanced_grammar(), list("()"))
+        with pytest.raises(ValueError):
+            parser.edit(3, 0, ["("])
+        with pytest.raises(ValueError):
+            parser.edit(1, 2, [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
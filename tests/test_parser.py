@@ -7,14 +7,25 @@ Tests exhaustivos para los módulos de servicios:
 """
 
 import pytest
+import threading
 import tempfile
 import os
+import itertools
+from array import array
 from services.grammar import Grammar
 from services.tree import TreeNode
-from services.parser_cyk import cyk_parse, is_cnf, reconstruct_tree
+from services.parser_cyk import cyk_parse, is_cnf, reconstruct_tree, build_tree
+from services.cnf import convert_to_cnf, convert_to_cnf_with_origins
+from services import compiled_grammar
+from services.compiled_grammar import compile_grammar, cache_info, clear_cache
+from services.cancellation import Cancelled
+from services.incremental_cyk import IncrementalCYK
 from services.parser_regular import parse_regular, validate_regular_grammar
 
 
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
 # ============ TESTS PARA Grammar ============
 
 class TestGrammarBasic:
@@ -104,6 +115,96 @@ class TestGrammarSerialization:
                 os.remove(path)
 
 
+class TestGrammarIndexes:
+    """Tests de los índices de producciones de Grammar."""
+
+    def _grammar(self):
+        return Grammar(
+            N=["S", "A", "B"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["A", "B"]},
+                {"left": "S", "right": ["a", "A"]},
+                {"left": "A", "right": ["a"]},
+                {"left": "B", "right": ["A", "b"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+
+    def test_lookups(self):
+        """Test de búsquedas por izquierda, lado derecho, primer y último símbolo."""
+        g = self._grammar()
+        assert g.productions_by_left("S") == (g.P[0], g.P[1])
+        assert g.productions_by_left("X") == ()
+        assert g.productions_by_pair("A", "B") == (g.P[0],)
+        assert g.productions_by_rhs(["a"]) == (g.P[2],)
+        assert g.productions_by_first("A") == (g.P[0], g.P[3])
+        assert g.productions_by_last("b") == (g.P[3],)
+        assert g.nonterminal_set == frozenset(["S", "A", "B"])
+        assert g.terminal_set == frozenset(["a", "b"])
+
+    def test_indexes_follow_mutations(self):
+        """Test que los índices se actualizan al modificar o reasignar P, N y T."""
+        g = self._grammar()
+        assert g.productions_by_left("B") == (g.P[3],)
+        g.P.append({"left": "B", "right": ["b"]})
+        assert len(g.productions_by_left("B")) == 2
+        g.P[3] = {"left": "A", "right": ["b"]}
+        assert g.productions_by_left("B") == ({"left": "B", "right": ["b"]},)
+        g.P = [{"left": "S", "right": ["a"]}]
+        assert g.productions_by_left("A") == ()
+        g.N.append("C")
+        assert "C" in g.nonterminal_set
+        g.T = ["c"]
+        assert g.terminal_set == frozenset(["c"])
+
+    def test_indexes_store_rule_positions(self):
+        """Test que los índices guardan posiciones de reglas, no vistas."""
+        g = self._grammar()
+        g.productions_by_left("S")
+        indexes = g._index()
+        for index in (indexes.by_left, indexes.by_rhs, indexes.by_first, indexes.by_last):
+            assert all(isinstance(rules, array) for rules in index.values())
+        assert list(indexes.by_left[g.P.intern("S")]) == [0, 1]
+        assert g.productions_by_rhs(["a", "X"]) == ()
+        assert g.productions_by_first("X") == ()
+
+    def test_serialization_unchanged(self):
+        """Test que N, T y P siguen comparándose y serializándose como listas."""
+        g = self._grammar()
+        g.productions_by_left("S")
+        assert g.to_dict()["P"] == list(g.P)
+        assert g.N == ["S", "A", "B"]
+        g2 = Grammar.from_dict(g.to_dict())
+        assert g2.fingerprint() == g.fingerprint()
+
+    def test_fingerprint_memoized(self, monkeypatch):
+        """Test que la huella se calcula una vez y se invalida con cada cambio."""
+        import services.grammar as grammar_module
+        g = self._grammar()
+        calls = []
+        sha1 = grammar_module.hashlib.sha1
+        monkeypatch.setattr(grammar_module.hashlib, "sha1", lambda data: calls.append(1) or sha1(data))
+        first = g.fingerprint()
+        assert g.fingerprint() == first and len(calls) == 1
+        changes = [
+            lambda: g.P.append({"left": "B", "right": ["b"]}),
+            lambda: g.N.append("C"),
+            lambda: g.T.append("c"),
+            lambda: setattr(g, "S", "A"),
+            lambda: setattr(g, "type", "type3"),
+            lambda: setattr(g, "N", list(g.N)),
+        ]
+        seen = {first}
+        for change in changes:
+            change()
+            value = g.fingerprint()
+            assert value == Grammar.from_dict(g.to_dict()).fingerprint()
+            seen.add(value)
+        assert len(seen) == 6
+
+
 # ============ TESTS PARA TreeNode ============
 
 class TestTreeNode:
@@ -138,9 +239,79 @@ class TestTreeNode:
         
         assert parent.is_leaf() is False
 
+    def test_to_text_format(self):
+        """Test del formato de to_text y to_text_simple, con hijos que no son TreeNode."""
+        tree = TreeNode("S", [TreeNode("A", [TreeNode("a")]), "b"])
+        assert tree.to_text() == (
+            '└── [S]\n'
+            '    ├── [A]\n'
+            '    │   └── "a"\n'
+            '    └── "b"\n'
+        )
+        assert tree.to_text_simple() == '[S]\n  [A]\n    [a]\n  "b"\n'
+        assert tree.to_json() == '["S", ["A", "a"], "b"]'
+
+    def test_render_and_write_text(self):
+        """Test que render y write_text reproducen to_text, incluso en árboles profundos."""
+        import io
+        tree = TreeNode("a")
+        for _ in range(1200):
+            tree = TreeNode("S", [TreeNode("A", [TreeNode("a")]), tree])
+        text, ranges = tree.render()
+        assert text == tree.to_text()
+        for start, end, kind in ranges[:6]:
+            fragment = text[start:end]
+            if kind == "connector":
+                assert fragment.endswith("── ")
+            else:
+                assert fragment[0] == ('"' if kind == "terminal" else "[")
+        out = io.StringIO()
+        tree.write_text(out)
+        assert out.getvalue() == text
+        out = io.StringIO()
+        tree.write_text_simple(out)
+        assert out.getvalue() == tree.to_text_simple()
+
 
 # ============ TESTS PARA Parser CYK ============
 
+class TestTreeReconstruction:
+    """Tests de reconstrucción iterativa de árboles CYK."""
+
+    def _chain(self, n):
+        # Derivación derecha S -> A S de profundidad n
+        back = {}
+        for i in range(n - 1):
+            back[(i, n - i, "S")] = (1, "A", "S")
+            back[(i, 1, "A")] = ("term", "a")
+        back[(n - 1, 1, "S")] = ("term", "a")
+        return back
+
+    def test_deep_derivation(self):
+        """Test que derivaciones más profundas que el límite de recursión se reconstruyen."""
+        n = 5000
+        back = self._chain(n)
+        tree = build_tree(back, 0, n, "S")
+        depth = 0
+        node = tree
+        while node.children:
+            node = node.children[-1]
+            depth += 1
+        assert depth == n
+        assert reconstruct_tree(back, 0, n, "S")[0] == "S"
+
+    def test_build_tree_matches_tuples(self):
+        """Test que build_tree produce el mismo árbol que from_tuple(reconstruct_tree)."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        for w in ("ab", "aabb", "abab", "aab"):
+            acept, back = cyk_parse(g, list(w))
+            if not acept:
+                continue
+            t1 = build_tree(back, 0, len(w), g.S)
+            t2 = TreeNode.from_tuple(reconstruct_tree(back, 0, len(w), g.S))
+            assert t1.to_text() == t2.to_text()
+
+
 class TestCYKBasic:
     """Tests básicos del parser CYK."""
     
@@ -222,6 +393,256 @@ class TestCYKBasic:
         assert len(back) > 0
 
 
+class TestCYKBitset:
+    """Tests del motor CYK basado en máscaras de bits."""
+    
+    def _leaves(self, node):
+        symbol, children = node
+        out = []
+        for c in children:
+            out.extend(self._leaves(c) if isinstance(c, tuple) else [c])
+        return out
+    
+    def test_bitset_matches_sets_engine(self):
+        """Test que ambos motores aceptan exactamente las mismas cadenas."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        for n in range(1, 7):
+            for w in itertools.product(g.T, repeat=n):
+                acept_sets, _ = cyk_parse(g, list(w))
+                acept_bits, _ = cyk_parse(g, list(w), engine="bitset")
+                assert acept_sets == acept_bits, f"Resultado distinto para {''.join(w)}"
+    
+    def test_bitset_backpointers_rebuild_input(self):
+        """Test que los backpointers del motor bitset reconstruyen la entrada."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        w = list("aaab")
+        acept, back = cyk_parse(g, w, engine="bitset")
+        assert acept is True
+        assert back[(0, len(w), "S")][0] in range(1, len(w))
+        assert self._leaves(reconstruct_tree(back, 0, len(w), "S")) == w
+    
+    def test_unknown_engine(self):
+        """Test que un motor desconocido produce ValueError."""
+        g = Grammar(N=["S"], T=["a"], P=[{"left": "S", "right": ["a"]}], S="S")
+        with pytest.raises(ValueError):
+            cyk_parse(g, ["a"], engine="otro")
+
+
+class TestCYKBackpointerModes:
+    """Tests de los modos de backpointers y acceptance_only."""
+
+    def _grammar(self):
+        return Grammar(
+            N=["S", "A", "B"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["S", "S"]},
+                {"left": "S", "right": ["A", "B"]},
+                {"left": "A", "right": ["a"]},
+                {"left": "B", "right": ["b"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+
+    def _leaves(self, tree):
+        A, children = tree
+        out = []
+        for child in children:
+            out.extend([child] if isinstance(child, str) else self._leaves(child))
+        return out
+
+    def test_acceptance_only(self):
+        """Test que acceptance_only no construye backpointers en ningún motor."""
+        g = self._grammar()
+        for engine in ("auto", "sets", "bitset"):
+            assert cyk_parse(g, list("abab"), engine=engine, acceptance_only=True) == (True, None)
+            assert cyk_parse(g, list("abba"), engine=engine, acceptance_only=True) == (False, None)
+
+    @pytest.mark.parametrize("mode", ["array", "lazy"])
+    def test_modes_match_dict(self, mode):
+        """Test que los modos array y lazy contienen las mismas celdas que el dict."""
+        g = self._grammar()
+        for w in ["ab", "abab", "ababab", "aabb", "abba"]:
+            acept, back = cyk_parse(g, list(w), engine="bitset")
+            acept_m, back_m = cyk_parse(g, list(w), backpointers=mode)
+            assert acept_m == acept
+            assert set(back_m) == set(back)
+            assert len(back_m) == len(back)
+            if acept:
+                tree = reconstruct_tree(back_m, 0, len(w), "S")
+                assert self._leaves(tree) == list(w)
+
+    def test_array_mode_same_entries(self):
+        """Test que el modo array guarda exactamente los backpointers del motor bitset."""
+        g = self._grammar()
+        w = list("ababab")
+        _, back = cyk_parse(g, w, engine="bitset")
+        _, packed = cyk_parse(g, w, backpointers="array")
+        assert all(packed[key] == value for key, value in back.items())
+        assert (0, 6, "X") not in packed
+        with pytest.raises(KeyError):
+            packed[(0, 5, "S")]
+
+    def test_invalid_combinations(self):
+        """Test de modos desconocidos o incompatibles con el motor."""
+        g = self._grammar()
+        with pytest.raises(ValueError):
+            cyk_parse(g, list("ab"), backpointers="tuple")
+        with pytest.raises(ValueError):
+            cyk_parse(g, list("ab"), engine="sets", backpointers="lazy")
+
+
+class TestCYKNumpy:
+    """Tests del motor CYK vectorizado (requiere numpy)."""
+    
+    def test_numpy_matches_sets_engine(self):
+        """Test que el motor numpy coincide con el motor de conjuntos."""
+        pytest.importorskip("numpy")
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        for n in range(1, 7):
+            for w in itertools.product(g.T, repeat=n):
+                acept_sets, _ = cyk_parse(g, list(w), engine="sets")
+                acept_np, back = cyk_parse(g, list(w), engine="numpy")
+                assert acept_sets == acept_np, f"Resultado distinto para {''.join(w)}"
+                if acept_np:
+                    assert (0, n, g.S) in back
+    
+    def test_auto_engine_threshold(self):
+        """Test que engine='auto' usa numpy por encima del umbral."""
+        pytest.importorskip("numpy")
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        w = list("aaab")
+        acept, back = cyk_parse(g, w, numpy_threshold=2)
+        assert acept is True
+        # el motor numpy solo guarda la derivación desde S
+        assert len(back) == 2 * len(w) - 1
+
+    def test_auto_engine_considers_grammar_size(self, monkeypatch):
+        """Test que engine='auto' usa bitset por defecto y con gramáticas grandes."""
+        pytest.importorskip("numpy")
+        from services import parser_cyk
+        used = []
+        for name in ("_cyk_numpy", "_cyk_bitset"):
+            original = getattr(parser_cyk, name)
+            monkeypatch.setattr(parser_cyk, name,
+                                lambda *a, _name=name, _f=original, **k: used.append(_name) or _f(*a, **k))
+        small = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        # S -> Xi Xi, Xi -> a: más no terminales que NUMPY_MAX_NONTERMINALS
+        xs = [f"X{i}" for i in range(parser_cyk.NUMPY_MAX_NONTERMINALS)]
+        large = Grammar(["S"] + xs, ["a"], [{"left": "S", "right": [X, X]} for X in xs]
+                        + [{"left": X, "right": ["a"]} for X in xs], "S")
+
+        assert cyk_parse(small, list("aaab"))[0] is True
+        assert cyk_parse(small, list("aaab"), numpy_threshold=2)[0] is True
+        assert cyk_parse(large, ["a", "a"], numpy_threshold=2)[0] is True
+        assert used == ["_cyk_bitset", "_cyk_numpy", "_cyk_bitset"]
+
+
+class TestCYKCancellation:
+    """Tests de cancelación y progreso del análisis CYK."""
+
+    @pytest.mark.parametrize("engine", ["sets", "bitset", "numpy"])
+    def test_cancel_and_progress(self, engine):
+        """Test que un evento activado cancela y que el progreso llega a 1."""
+        if engine == "numpy":
+            pytest.importorskip("numpy")
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        w = list("aaab")
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(Cancelled):
+            cyk_parse(g, w, engine=engine, cancel=cancel)
+
+        seen = []
+        acept, _ = cyk_parse(g, w, engine=engine, cancel=threading.Event(), progress=seen.append)
+        assert acept is True
+        assert seen == sorted(seen) and seen[-1] == 1.0
+
+    def test_cancelled_edit_keeps_previous_parse(self):
+        """Test que una edición cancelada deja intacto el análisis incremental."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_cnf_json.json"))
+        parser = IncrementalCYK(g, list("aaab"))
+        chart = [row[:] for row in parser.chart]
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(Cancelled):
+            parser.reparse(list("aabab"), cancel=cancel)
+        assert parser.tokens == list("aaab")
+        assert parser.chart == chart
+        assert parser.accepted is True
+
+
+class TestCompiledGrammarCache:
+    """Tests de la caché de gramáticas compiladas."""
+    
+    def setup_method(self):
+        clear_cache()
+    
+    def _grammar(self):
+        return Grammar(
+            N=["S", "A"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["A", "b"]},
+                {"left": "A", "right": ["a"]}
+            ],
+            S="S"
+        )
+    
+    def test_cache_hit_for_equal_content(self):
+        """Test que gramáticas con el mismo contenido reutilizan la compilación."""
+        c1 = compile_grammar(self._grammar())
+        c2 = compile_grammar(self._grammar())
+        
+        assert c1 is c2
+        info = cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+    
+    def test_cache_miss_after_change(self):
+        """Test que modificar la gramática produce una nueva compilación."""
+        g = self._grammar()
+        c1 = compile_grammar(g)
+        g.P.append({"left": "A", "right": ["b"]})
+        c2 = compile_grammar(g)
+        
+        assert c1 is not c2
+        assert cache_info().misses == 2
+    
+    def test_cache_lru_eviction(self, monkeypatch):
+        """Test que se descarta la gramática usada hace más tiempo."""
+        monkeypatch.setattr(compiled_grammar._cache, "maxsize", 2)
+        grammars = [
+            Grammar(N=["S"], T=[t], P=[{"left": "S", "right": [t]}], S="S")
+            for t in ["a", "b", "c"]
+        ]
+        for g in grammars:
+            compile_grammar(g)
+        
+        assert cache_info().currsize == 2
+        compile_grammar(grammars[2])
+        assert cache_info().hits == 1
+        compile_grammar(grammars[0])
+        assert cache_info().misses == 4
+    
+    def test_cyk_parse_uses_cache(self):
+        """Test que cyk_parse compila la gramática una sola vez."""
+        g = self._grammar()
+        for w in (["a", "b"], ["b"], ["a", "a"]):
+            cyk_parse(g, w)
+        
+        assert cache_info().misses == 1
+        assert cache_info().hits == 2
+    
+    def test_cyk_parse_accepts_compiled(self):
+        """Test que cyk_parse acepta una CompiledGrammar directamente."""
+        compiled = compile_grammar(self._grammar())
+        acept, _ = cyk_parse(compiled, ["a", "b"], engine="bitset")
+        
+        assert acept is True
+
+
 class TestCNFCheck:
     """Tests para verificación de CNF."""
     
@@ -273,6 +694,159 @@ class TestCNFCheck:
         assert is_cnf(g) is False
 
 
+class TestCNFConversion:
+    """Tests de la conversión completa a CNF."""
+
+    def _rhs_symbols(self, g):
+        return {sym for p in g.P for sym in p["right"]}
+
+    def test_epsilon_rules(self):
+        """Test que las reglas ε se eliminan y la vacía se acepta por el inicial."""
+        g = Grammar(
+            N=["S"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "S", "b"]},
+                {"left": "S", "right": ["ε"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        cnf = convert_to_cnf(g)
+        assert is_cnf(cnf)
+        # S es anulable y aparece a la derecha: se aísla un inicial nuevo
+        assert cnf.S != "S"
+        assert cnf.S not in self._rhs_symbols(cnf)
+        assert {"left": cnf.S, "right": []} in list(cnf.P)
+
+        assert cyk_parse(g, [])[0] is True
+        assert cyk_parse(g, list("ab"))[0] is True
+        assert cyk_parse(g, list("aabb"))[0] is True
+        assert cyk_parse(g, list("aab"))[0] is False
+
+    def test_nullable_chain(self):
+        """Test con anulables encadenados que no son el inicial."""
+        g = Grammar(
+            N=["S", "A", "B"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["A", "b", "B"]},
+                {"left": "A", "right": ["a", "A"]},
+                {"left": "A", "right": []},
+                {"left": "B", "right": ["A", "A"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        cnf = convert_to_cnf(g)
+        assert is_cnf(cnf)
+        assert cnf.S == "S"
+        for w, expected in [("b", True), ("ab", True), ("ba", True), ("aabaa", True), ("", False), ("bb", False)]:
+            assert cyk_parse(g, list(w))[0] is expected, w
+
+    def test_useless_symbols_pruned(self):
+        """Test que se eliminan no terminales inalcanzables y no generadores."""
+        g = Grammar(
+            N=["S", "A", "U", "L"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "A"]},
+                {"left": "S", "right": ["L", "b"]},
+                {"left": "A", "right": ["b"]},
+                {"left": "U", "right": ["a", "U", "b"]},   # inalcanzable
+                {"left": "U", "right": ["a"]},
+                {"left": "L", "right": ["a", "L"]}         # no genera cadenas
+            ],
+            S="S",
+            gtype="type2"
+        )
+        cnf = convert_to_cnf(g)
+        assert "U" not in cnf.N
+        assert "L" not in cnf.N
+        assert all(p["left"] not in ("U", "L") for p in cnf.P)
+        assert cyk_parse(g, list("ab"))[0] is True
+
+    def test_unit_rules_and_pruning(self):
+        """Test que tras eliminar unitarias se descartan los no terminales que quedan sueltos."""
+        g = Grammar(
+            N=["S", "A", "B"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["B"]},
+                {"left": "B", "right": ["a"]},
+                {"left": "B", "right": ["b"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        cnf = convert_to_cnf(g)
+        assert list(cnf.N) == ["S"]
+        assert list(cnf.P) == [{"left": "S", "right": ["a"]}, {"left": "S", "right": ["b"]}]
+
+    def test_unit_cycles_share_rules(self):
+        """Test que los no terminales de un ciclo unitario reciben las mismas reglas."""
+        g = Grammar(
+            N=["S", "A", "B"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["B"]},
+                {"left": "B", "right": ["S"]},
+                {"left": "A", "right": ["a", "S"]},
+                {"left": "B", "right": ["b"]},
+                {"left": "B", "right": ["A", "B"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        cnf = convert_to_cnf(g)
+        rights = {A: sorted(tuple(p["right"]) for p in cnf.productions_by_left(A)) for A in ("S", "A", "B")}
+        assert rights["S"] == rights["A"] == rights["B"]
+        assert len(rights["S"]) == 3
+        assert cyk_parse(g, list("aab"))[0] is True
+
+    def test_long_unit_chain(self):
+        """Test con una cadena larga de reglas unitarias A0 -> A1 -> ... -> A399."""
+        n = 400
+        P = [{"left": f"A{i}", "right": [f"A{i + 1}"]} for i in range(n - 1)]
+        P += [{"left": f"A{i}", "right": ["a", f"A{i}"]} for i in range(0, n, 50)]
+        P.append({"left": f"A{n - 1}", "right": ["b"]})
+        g = Grammar(N=[f"A{i}" for i in range(n)], T=["a", "b"], P=P, S="A0", gtype="type2")
+        cnf = convert_to_cnf(g)
+        assert is_cnf(cnf)
+        # A0 alcanza todas las reglas propias de la cadena
+        assert sorted(tuple(p["right"]) for p in cnf.productions_by_left("A0"))[-1] == ("b",)
+        assert len(cnf.productions_by_left("A0")) == 1 + n // 50
+        assert cyk_parse(g, list("aab"))[0] is True
+
+    def test_origins(self):
+        """Test que cada regla CNF registra las producciones originales de las que proviene."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "A", "b"]},
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["b"]}
+            ],
+            S="S",
+            gtype="type2"
+        )
+        cnf, origins = convert_to_cnf_with_origins(g)
+        assert len(origins) == len(cnf.P)
+        by_rule = {(p["left"], tuple(p["right"])): o for p, o in zip(cnf.P, origins)}
+        # S -> b proviene de A -> b a través de S -> A
+        assert by_rule[("S", ("b",))] == (2,)
+        assert by_rule[("A", ("b",))] == (2,)
+        assert all(0 in o for (left, _), o in by_rule.items() if left.startswith("@X"))
+
+    def test_deterministic(self):
+        """Test que la conversión produce siempre el mismo resultado."""
+        g = Grammar.load(os.path.join(EXAMPLES_DIR, "example_llc_json.json"))
+        assert convert_to_cnf(g).to_dict() == convert_to_cnf(g).to_dict()
+
+
 # ============ TESTS PARA Parser Regular ============
 
 class TestRegularParserBasic:
@@ -312,6 +886,24 @@ class TestRegularParserBasic:
         acept, deriv = parse_regular(g, ["a", "b"])
         assert acept is True
     
+    def test_parse_regular_nondeterministic(self):
+        """Test que se acepta aunque la primera producción aplicable no lleve a una derivación."""
+        g = Grammar(
+            N=["S", "A"],
+            T=["a", "b"],
+            P=[
+                {"left": "S", "right": ["a", "S"]},
+                {"left": "S", "right": ["a", "A"]},
+                {"left": "A", "right": ["b"]}
+            ],
+            S="S",
+            gtype="type3"
+        )
+        
+        acept, deriv = parse_regular(g, ["a", "b"])
+        assert acept is True
+        assert deriv == [("S", "S → aA"), ("A", "A → b")]
+    
     def test_parse_regular_reject(self):
         """Test parser regular rechaza cadena."""
         g = Grammar(
@@ -351,6 +943,26 @@ class TestRegularParserBasic:
         acept, _ = parse_regular(g, [])
         assert acept is False
 
+    def test_parse_regular_empty_through_chain(self):
+        """Test que ε alcanzado por producciones unitarias se acepta con y sin traza."""
+        g = Grammar(
+            N=["S", "A", "B"],
+            T=["a"],
+            P=[
+                {"left": "S", "right": ["a"]},
+                {"left": "S", "right": ["A"]},
+                {"left": "A", "right": ["B"]},
+                {"left": "B", "right": ["ε"]}
+            ],
+            S="S",
+            gtype="type3"
+        )
+        
+        acept, deriv = parse_regular(g, [])
+        assert acept is True
+        assert deriv == [("S", "S → A"), ("A", "A → B"), ("B", "B → ε")]
+        assert parse_regular(g, [], trace=False)[0] is True
+
 
 class TestRegularGrammarValidation:
     """Tests de validación de gramáticas regulares."""
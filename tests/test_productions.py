@@ -0,0 +1,104 @@
+"""
+Tests para el almacenamiento compacto de producciones (productions.py).
+"""
+
+import json
+import pickle
+
+import pytest
+from services.grammar import Grammar
+from services.productions import Production, ProductionTable
+
+
+RULES = [
+    {"left": "S", "right": ["a", "S", "b"]},
+    {"left": "S", "right": []},
+    {"left": "A", "right": ["a"]},
+]
+
+
+class TestProductionView:
+    """Tests de la vista Production."""
+
+    def test_behaves_like_dict(self):
+        """Una Production se lee y compara como el dict original."""
+        table = ProductionTable(RULES)
+        p = table[0]
+        assert isinstance(p, Production)
+        assert p["left"] == "S"
+        assert p["right"] == ["a", "S", "b"]
+        assert p.get("right") == ["a", "S", "b"]
+        assert p.get("otro", 1) == 1
+        assert p == RULES[0] and RULES[0] == p
+        assert p != RULES[1]
+        assert table[1]["right"] == []
+        assert p.rhs == ("a", "S", "b")
+        with pytest.raises(KeyError):
+            p["otro"]
+
+    def test_symbols_are_interned(self):
+        """Cada símbolo se guarda una sola vez."""
+        table = ProductionTable(RULES)
+        assert sorted(table.symbols) == ["A", "S", "a", "b"]
+        assert list(table.offsets) == [0, 3, 3, 4]
+
+
+class TestProductionTable:
+    """Tests de la tabla como lista mutable de producciones."""
+
+    def test_list_operations(self):
+        """append, insert, asignación, borrado y pop se comportan como en una lista."""
+        table = ProductionTable(RULES)
+        ref = list(RULES)
+        new = {"left": "B", "right": ["b", "B"]}
+        for target in (table, ref):
+            target.append(new)
+            target.insert(1, {"left": "A", "right": ["A", "A", "A"]})
+            target[0] = {"left": "S", "right": ["b"]}
+            del target[2]
+            target[1:3] = [new]
+        assert table == ref
+        assert table.pop() == ref.pop()
+        assert table.pop(0) == ref.pop(0)
+        assert table == ref
+        table.reverse()
+        ref.reverse()
+        assert table == ref
+
+    def test_equality_between_tables(self):
+        """Dos tablas con las mismas reglas son iguales aunque internen distinto."""
+        t1 = ProductionTable(RULES)
+        t2 = ProductionTable(list(reversed(RULES)))
+        t2.reverse()
+        assert t1 == t2
+        assert t1 != ProductionTable(RULES[:2])
+
+    def test_pickle_roundtrip(self):
+        """La tabla se serializa con pickle conservando las reglas."""
+        table = ProductionTable(RULES)
+        assert pickle.loads(pickle.dumps(table)) == RULES
+
+
+class TestGrammarProductions:
+    """Tests de Grammar usando ProductionTable."""
+
+    def test_grammar_stores_table(self):
+        """Grammar guarda P como ProductionTable y to_dict sigue siendo JSON."""
+        g = Grammar(N=["S", "A"], T=["a", "b"], P=RULES, S="S")
+        assert isinstance(g.P, ProductionTable)
+        assert g.P == RULES
+        d = json.loads(json.dumps(g.to_dict()))
+        assert d["P"] == RULES
+        assert Grammar.from_dict(d).fingerprint() == g.fingerprint()
+
+    def test_grammar_copy_shares_nothing(self):
+        """Crear una gramática desde otra copia la tabla."""
+        g = Grammar(N=["S", "A"], T=["a", "b"], P=RULES, S="S")
+        g2 = Grammar(g.N, g.T, g.P, g.S)
+        g2.P.append({"left": "A", "right": ["b"]})
+        assert len(g.P) == 3
+        assert len(g2.productions_by_left("A")) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,130 @@
+"""
+Tests para la búsqueda de coincidencias en textos (scanner.py).
+"""
+
+import mmap
+import os
+import random
+import tempfile
+
+import pytest
+from services.grammar import Grammar
+from services.automaton import compile_regular
+from services import scanner
+from services.scanner import Match, Scanner, scan
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+def _grammars():
+    return [Grammar.load(os.path.join(EXAMPLES_DIR, "example_regular.json")),
+            Grammar.load(os.path.join(EXAMPLES_DIR, "example_left_linear.json"))]
+
+
+def _brute_all(grammars, text):
+    dfas = [compile_regular(g) for g in grammars]
+    return {(i, j, k) for i in range(len(text)) for j in range(i + 1, len(text) + 1)
+            for k, dfa in enumerate(dfas) if dfa.accepts(list(text[i:j]))}
+
+
+def _brute_longest(grammars, text):
+    dfas = [compile_regular(g) for g in grammars]
+    matches, pos = [], 0
+    while pos < len(text):
+        best = None
+        for j in range(pos + 1, len(text) + 1):
+            for k, dfa in enumerate(dfas):
+                if dfa.accepts(list(text[pos:j])):
+                    best = Match(pos, j, k)
+                    break
+        if best is None:
+            pos += 1
+        else:
+            matches.append(best)
+            pos = best.end
+    return matches
+
+
+class _CountingStr(str):
+    """Texto que cuenta los caracteres leídos uno a uno."""
+
+    reads = 0
+
+    def __getitem__(self, index):
+        _CountingStr.reads += 1
+        return str.__getitem__(self, index)
+
+
+class TestScanner:
+    """Tests de búsqueda con el autómata producto."""
+
+    @pytest.mark.parametrize("find_limit", [8, 0])
+    def test_all_matches_brute_force(self, find_limit, monkeypatch):
+        """Test que el modo "all" encuentra exactamente las subcadenas del lenguaje."""
+        monkeypatch.setattr(scanner, "FIND_LIMIT", find_limit)
+        grammars = _grammars()
+        sc = Scanner(grammars)
+        rng = random.Random(3)
+        for _ in range(100):
+            text = "".join(rng.choice("abcx") for _ in range(rng.randint(0, 20)))
+            found = list(sc.scan(text, mode="all"))
+            assert set(found) == _brute_all(grammars, text)
+            assert [m.start for m in found] == sorted(m.start for m in found)
+
+    def test_longest_matches(self):
+        """Test de coincidencias más a la izquierda y más largas, sin solaparse."""
+        matches = list(scan(_grammars(), "xaab abc bbbbax"))
+        assert matches == [Match(1, 4, 0), Match(5, 8, 1), Match(9, 14, 0)]
+
+    @pytest.mark.parametrize("live_block", [1 << 16, 3])
+    def test_longest_brute_force(self, live_block, monkeypatch):
+        """Test del modo "longest" con textos densos en terminales, también con bloques pequeños."""
+        monkeypatch.setattr(scanner, "LIVE_BLOCK", live_block)
+        grammars = _grammars()
+        sc = Scanner(grammars)
+        rng = random.Random(5)
+        for _ in range(100):
+            text = "".join(rng.choice("aabbc x") for _ in range(rng.randint(0, 30)))
+            assert list(sc.scan(text)) == _brute_longest(grammars, text)
+            assert set(sc.scan(text, mode="all")) == _brute_all(grammars, text)
+
+    @pytest.mark.parametrize("mode", ["longest", "all"])
+    def test_linear_reads(self, mode):
+        """Test que un tramo sin coincidencias no se vuelve a leer desde cada inicio."""
+        sc = Scanner(_grammars())
+        n = 3000
+        _CountingStr.reads = 0
+        assert list(sc.scan(_CountingStr("a" * n), mode=mode)) == []
+        assert _CountingStr.reads <= 4 * n
+        _CountingStr.reads = 0
+        assert list(sc.scan(_CountingStr("ab" * n + "x" + "a" * n), mode=mode))[-1] == Match(2 * n - 2, 2 * n, 0)
+        assert _CountingStr.reads <= 12 * n
+
+    def test_bytes_and_mmap(self):
+        """Test que bytes, memoryview y mmap dan los mismos resultados que str."""
+        sc = Scanner(_grammars())
+        text = "zz aab -- abc\nbba" * 50
+        expected = list(sc.scan(text))
+        assert list(sc.scan(text.encode())) == expected
+        assert list(sc.scan(memoryview(text.encode()))) == expected
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log.txt")
+            with open(path, "wb") as f:
+                f.write(text.encode())
+            assert list(sc.scan_file(path)) == expected
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                assert list(sc.scan(mm, mode="all")) == list(sc.scan(text, mode="all"))
+
+            empty = os.path.join(tmp, "empty.txt")
+            open(empty, "wb").close()
+            assert list(sc.scan_file(empty)) == []
+
+    def test_invalid_mode(self):
+        """Test que un modo desconocido lanza ValueError."""
+        with pytest.raises(ValueError):
+            Scanner(_grammars()).scan("abc", mode="shortest")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,147 @@
+"""
+Tests para el bosque de análisis compartido (sppf.py).
+"""
+
+import pytest
+from services.grammar import Grammar
+from services.parser_cyk import cyk_parse
+from services.sppf import parse_forest
+
+
+def catalan(n):
+    c = 1
+    for k in range(n):
+        c = c * 2 * (2 * k + 1) // (k + 2)
+    return c
+
+
+def ambiguous_grammar():
+    """S -> S S | a: a^n tiene Catalan(n-1) árboles."""
+    return Grammar(["S"], ["a"], [
+        {"left": "S", "right": ["S", "S"]},
+        {"left": "S", "right": ["a"]},
+    ], "S")
+
+
+def leaves(tree):
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.is_leaf():
+            out.append(node.symbol)
+        stack.extend(reversed(node.children))
+    return out
+
+
+def rules(tree):
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            out.append((node.symbol, tuple(c.symbol for c in node.children)))
+            stack.extend(node.children)
+    return out
+
+
+class TestCountTrees:
+    """Tests del conteo de árboles."""
+
+    def test_catalan_counts(self):
+        """Test que el conteo coincide con los números de Catalan."""
+        g = ambiguous_grammar()
+        for n in range(1, 9):
+            assert parse_forest(g, ["a"] * n).count_trees() == catalan(n - 1)
+
+    def test_big_counts(self):
+        """Test que conteos enormes son exactos (enteros de precisión arbitraria)."""
+        forest = parse_forest(ambiguous_grammar(), ["a"] * 60)
+        assert forest.count_trees() == catalan(59)
+        assert forest.count_trees() > 2 ** 64
+
+    def test_rejected_and_empty(self):
+        """Test de cadenas rechazadas y de la cadena vacía."""
+        g = ambiguous_grammar()
+        forest = parse_forest(g, ["a", "b"])
+        assert not forest.accepted
+        assert forest.count_trees() == 0
+        assert list(forest.iter_trees()) == []
+        assert forest.k_best(3) == []
+        assert parse_forest(g, []).count_trees() == 0
+
+        g_eps = Grammar(["S"], ["a"], [
+            {"left": "S", "right": ["a"]},
+            {"left": "S", "right": []},
+        ], "S")
+        forest = parse_forest(g_eps, [])
+        assert forest.count_trees() == 1
+        assert [c.symbol for c in next(forest.iter_trees()).children] == ["ε"]
+
+    def test_agrees_with_cyk(self):
+        """Test que la aceptación coincide con cyk_parse."""
+        g = ambiguous_grammar()
+        for w in (["a"], ["a", "a", "a"], ["b"], ["a", "b", "a"]):
+            assert parse_forest(g, w).accepted == cyk_parse(g, w)[0]
+
+
+class TestIterTrees:
+    """Tests de la enumeración perezosa de árboles."""
+
+    def test_all_distinct_and_valid(self):
+        """Test que se producen todos los árboles, distintos y con el rendimiento correcto."""
+        w = ["a"] * 6
+        forest = parse_forest(ambiguous_grammar(), w)
+        texts = set()
+        for tree in forest.iter_trees():
+            assert tree.symbol == "S"
+            assert leaves(tree) == w
+            texts.add(tree.to_text_simple())
+        assert len(texts) == catalan(5)
+
+    def test_lazy(self):
+        """Test que se puede tomar el primer árbol de un bosque enorme."""
+        forest = parse_forest(ambiguous_grammar(), ["a"] * 80)
+        tree = next(forest.iter_trees())
+        assert len(leaves(tree)) == 80
+        with pytest.raises(IndexError):
+            forest.tree(forest.count_trees())
+
+
+class TestKBest:
+    """Tests de los k mejores árboles."""
+
+    def test_matches_brute_force(self):
+        """Test que k_best coincide con ordenar todos los árboles por puntaje."""
+        g = Grammar(["S", "A"], ["a"], [
+            {"left": "S", "right": ["S", "S"]},
+            {"left": "S", "right": ["S", "A"]},
+            {"left": "S", "right": ["a"]},
+            {"left": "A", "right": ["a"]},
+        ], "S")
+        weights = {("S", ("S", "S")): 1.0, ("S", ("S", "A")): 0.25, ("S", ("a",)): -0.5}
+
+        def weight(left, right):
+            return weights.get((left, right), 0.0)
+
+        w = ["a"] * 6
+        forest = parse_forest(g, w)
+        scores = sorted((sum(weight(*r) for r in rules(t)) for t in forest.iter_trees()),
+                        reverse=True)
+        best = forest.k_best(7, weight)
+        assert len(best) == 7
+        assert [s for s, _ in best] == pytest.approx(scores[:7])
+        for score, tree in best:
+            assert leaves(tree) == w
+            assert sum(weight(*r) for r in rules(tree)) == pytest.approx(score)
+
+    def test_k_larger_than_count(self):
+        """Test que con k mayor que la cantidad de árboles se devuelven todos."""
+        forest = parse_forest(ambiguous_grammar(), ["a"] * 4)
+        best = forest.k_best(100)
+        assert len(best) == catalan(3)
+        assert len({t.to_text_simple() for _, t in best}) == catalan(3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+"""
+Tests para la distribución de árboles (tree_layout.py).
+"""
+
+import random
+
+import pytest
+from services.tree import TreeNode
+from services.tree_layout import layout_tree
+
+
+def random_tree(rng, n):
+    root = TreeNode("S")
+    nodes = [root]
+    for _ in range(n - 1):
+        child = TreeNode(rng.choice("ab"))
+        rng.choice(nodes).children.append(child)
+        nodes.append(child)
+    return root
+
+
+def assert_tidy(layout, distance=1.0):
+    """Nodos de un nivel en orden y separados, padres centrados sobre sus hijos."""
+    last_x = {}
+    for v in range(len(layout)):
+        d = layout.depth[v]
+        if d in last_x:
+            assert layout.x[v] - last_x[d] >= distance - 1e-9
+        last_x[d] = layout.x[v]
+        kids = layout.children[v]
+        if kids:
+            assert layout.x[v] == pytest.approx((layout.x[kids[0]] + layout.x[kids[-1]]) / 2)
+
+
+class TestTreeLayout:
+    """Tests de layout_tree."""
+
+    def test_small_tree(self):
+        """Test de coordenadas de un árbol pequeño con un hijo que no es TreeNode."""
+        tree = TreeNode("S", [TreeNode("A", [TreeNode("a")]), "b", TreeNode("B", [TreeNode("c"), TreeNode("d")])])
+        layout = layout_tree(tree, level_distance=2)
+        assert layout.labels == ["S", "A", "a", "b", "B", "c", "d"]
+        assert layout.terminal == [False, False, True, True, False, True, True]
+        assert layout.parent == [-1, 0, 1, 0, 0, 4, 4]
+        assert layout.x == [1.0, 0.0, 0.0, 1.0, 2.0, 1.5, 2.5]
+        assert layout.y == [0, 2, 4, 2, 2, 4, 4]
+        assert layout.width == 2.5
+
+    def test_random_trees_are_tidy(self):
+        """Test que en árboles aleatorios no hay solapamientos y el padre queda centrado."""
+        rng = random.Random(5)
+        for _ in range(200):
+            assert_tidy(layout_tree(random_tree(rng, rng.randint(1, 60)), distance=1.0))
+        assert_tidy(layout_tree(random_tree(rng, 300), distance=2.5), distance=2.5)
+
+    def test_compact_width(self):
+        """Test que un árbol binario completo ocupa exactamente sus hojas."""
+        leaves = [TreeNode("a") for _ in range(64)]
+        level = leaves
+        while len(level) > 1:
+            level = [TreeNode("S", level[i:i + 2]) for i in range(0, len(level), 2)]
+        layout = layout_tree(level[0])
+        assert layout.width == 63
+        assert layout.x[0] == 31.5
+
+    def test_deep_tree_is_not_mutated(self):
+        """Test que un árbol muy profundo se distribuye sin recursión ni modificarlo."""
+        tree = TreeNode("a")
+        for _ in range(5000):
+            tree = TreeNode("S", [TreeNode("A", [TreeNode("a")]), tree])
+        layout = layout_tree(tree)
+        assert len(layout) == 15001
+        assert layout.height == 5001
+        assert_tidy(layout)
+        assert set(vars(tree)) == {"symbol", "children"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
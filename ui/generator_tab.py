@@ -20,12 +20,28 @@ def build_generator_tab(app, parent):
     app.gen_depth.set(12)
     app.gen_depth.grid(row=0, column=3, padx=5)
 
-    ttk.Button(
+    app.gen_btn = ttk.Button(
         control_frame,
         text="Generar Cadenas",
         command=app.generate_strings,
         bootstyle="primary"
-    ).grid(row=0, column=4, padx=10)
+    )
+    app.gen_btn.grid(row=0, column=4, padx=10)
+
+    # La generación corre en segundo plano y se puede cancelar
+    app.cancel_gen_btn = ttk.Button(
+        control_frame,
+        text="✖ Cancelar",
+        command=app.cancel_generation,
+        bootstyle="danger",
+        state="disabled"
+    )
+    app.cancel_gen_btn.grid(row=0, column=5)
+
+    app.gen_progress = ttk.Progressbar(control_frame, mode="determinate", maximum=1.0)
+    app.gen_progress.grid(row=1, column=0, columnspan=4, padx=5, pady=(8, 0), sticky="ew")
+    app.gen_status = ttk.Label(control_frame, text="")
+    app.gen_status.grid(row=1, column=4, columnspan=2, pady=(8, 0), sticky="w")
 
     result_frame_outer = ttk.Frame(parent)
     result_frame_outer.pack(fill="both", expand=True)
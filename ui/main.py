@@ -1,15 +1,20 @@
+from itertools import islice
 import ttkbootstrap as ttk
 from .grammar_tab import build_grammar_tab
 from .parser_tab import build_parser_tab
 from .generator_tab import build_generator_tab
-from .utils import save_text_to_file
+from .utils import save_text_to_file, insert_tagged_text
 from .tree_visualizer import TreeVisualizer
+from .worker import BackgroundJob
 
 # services import (usados por la lógica)
 from services.grammar import Grammar
-from services.parser_cyk import cyk_parse, reconstruct_tree, is_cnf
+from services.parser_cyk import build_tree, is_cnf
+from services.compiled_grammar import compile_grammar
+from services.incremental_cyk import IncrementalCYK
 from services.parser_regular import parse_regular, validate_regular_grammar
-from services.generator import generate_shortest
+from services.parser_earley import earley_parse
+from services.generator import iter_strings
 from services.tree import TreeNode
 
 class App(ttk.Window):
@@ -19,8 +24,14 @@ class App(ttk.Window):
         self.geometry("1000x550")
         self.grammar = None
         self.current_tree = None
+        # análisis CYK anterior, reutilizado al editar la cadena
+        self.incremental_cyk = None
+        # trabajos en segundo plano (ui/worker.py)
+        self.parse_job = None
+        self.gen_job = None
         # variables que se crearán en cada tab
         self.entry_parse = None
+        self.parse_algorithm = None
         self.export_tree_btn = None
         self.visualize_tree_btn = None
         self.result_text = None
@@ -28,6 +39,14 @@ class App(ttk.Window):
         self.gen_limit = None
         self.gen_depth = None
         self.gen_text = None
+        self.parse_btn = None
+        self.cancel_parse_btn = None
+        self.parse_progress = None
+        self.parse_status = None
+        self.gen_btn = None
+        self.cancel_gen_btn = None
+        self.gen_progress = None
+        self.gen_status = None
 
         self._build_ui()
 
@@ -214,6 +233,8 @@ class App(ttk.Window):
         if not self.grammar:
             messagebox.showwarning("Advertencia", "Cargue una gramática primero.")
             return
+        if self.parse_job is not None and self.parse_job.running:
+            return
 
         text = self.entry_parse.get().strip()
         if not text:
@@ -230,42 +251,108 @@ class App(ttk.Window):
         if self.result_text:
             self.result_text.delete("1.0", "end")
 
-        try:
-            # Auto-detectar el algoritmo según el tipo de gramática
-            parser_type = "regular" if self.grammar.type == "type3" else "cyk"
+        # Auto-detectar el algoritmo según el tipo de gramática
+        grammar = self.grammar
+        if grammar.type == "type3":
+            parser_type = "regular"
+        elif self.parse_algorithm and self.parse_algorithm.get() == "Earley":
+            parser_type = "earley"
+        else:
+            parser_type = "cyk"
 
-            self._insert_with_tag("Algoritmo: ", "info")
-            self.result_text.insert("end", f"{parser_type.upper()}\n \n", "info")
+        self._insert_with_tag("Algoritmo: ", "info")
+        self.result_text.insert("end", f"{parser_type.upper()}\n \n", "info")
 
-            if parser_type == "cyk":
-                self._parse_cyk(tokens)
-            else:
-                self._parse_regular(tokens)
+        # El análisis corre en un hilo; el resultado se muestra en el hilo de Tk
+        if parser_type == "cyk":
+            work, show = self._cyk_work(tokens), self._show_cyk
+        elif parser_type == "earley":
+            work = lambda cancel, progress: earley_parse(grammar, tokens, cancel=cancel, progress=progress)
+            show = self._show_earley
+        else:
+            work = lambda cancel, progress: parse_regular(grammar, tokens)
+            show = lambda result: self._show_regular(result, tokens)
+        self._start_parse_job(work, show)
 
-        except NotImplementedError as e:
-            messagebox.showerror("Error", str(e))
-        except Exception as e:
+    def _start_parse_job(self, work, show):
+        from tkinter import messagebox
+
+        def done(result):
+            self._set_parse_running(False, f"✓ {self.parse_job.elapsed:.2f} s")
+            show(result)
+
+        def failed(e):
+            self._set_parse_running(False, "✗ Error")
             messagebox.showerror("Error", f"Error durante el parsing:\n{str(e)}")
 
-    def _parse_cyk(self, tokens):
-        acept, back = cyk_parse(self.grammar, tokens)
+        def cancelled():
+            # El hilo cancelado puede seguir usando el parser incremental un
+            # momento: el próximo análisis empieza con uno nuevo
+            self.incremental_cyk = None
+            self._set_parse_running(False, "Cancelado")
+            self._insert_with_tag("⏹ Análisis cancelado.\n", "info")
+
+        self._set_parse_running(True)
+        self.parse_job = BackgroundJob(
+            self, work, done, failed, cancelled,
+            lambda fraction, elapsed: self._show_progress(self.parse_progress, self.parse_status,
+                                                          fraction, elapsed))
+
+    def _set_parse_running(self, running, status=""):
+        if self.parse_btn:
+            self.parse_btn.config(state="disabled" if running else "normal")
+        if self.cancel_parse_btn:
+            self.cancel_parse_btn.config(state="normal" if running else "disabled")
+        if self.parse_progress and running:
+            self.parse_progress.config(value=0)
+        if self.parse_status:
+            self.parse_status.config(text=status)
+
+    def _show_progress(self, bar, label, fraction, elapsed):
+        if bar and fraction is not None:
+            bar.config(value=fraction)
+        if label:
+            if fraction is None:
+                label.config(text=f"{elapsed:.1f} s")
+            else:
+                label.config(text=f"{fraction:.0%} · {elapsed:.1f} s")
+
+    def cancel_parse(self):
+        if self.parse_job is not None:
+            self.parse_job.cancel()
+
+    def _cyk_work(self, tokens):
+        grammar = self.grammar
+        previous = self.incremental_cyk
+
+        def work(cancel, progress):
+            # La caché de compile_grammar devuelve el mismo objeto mientras la
+            # gramática no cambie: en ese caso se reanaliza solo lo editado
+            compiled = compile_grammar(grammar)
+            parser = previous
+            if parser is None or parser.compiled is not compiled:
+                parser = IncrementalCYK(compiled)
+            acept = parser.reparse(tokens, cancel=cancel, progress=progress)
+            tree = error = None
+            if acept:
+                try:
+                    tree = build_tree(parser.backpointers(), 0, len(tokens), compiled.start)
+                except Exception as e:
+                    import traceback
+                    traceback.print_exc()
+                    error = e
+            return parser, acept, tree, error
 
-        if acept:
-            self._insert_with_tag("Resultado: ✓ CADENA ACEPTADA\n\n", "success")
-            try:
-                tree_struct = reconstruct_tree(back, 0, len(tokens), self.grammar.S)
+        return work
 
-                def build(node):
-                    symbol, children = node
-                    child_nodes = []
-                    for c in children:
-                        if isinstance(c, tuple):
-                            child_nodes.append(build(c))
-                        else:
-                            child_nodes.append(TreeNode(c))
-                    return TreeNode(symbol, child_nodes)
+    def _show_cyk(self, result):
+        parser, acept, tree, error = result
+        self.incremental_cyk = parser
 
-                self.current_tree = build(tree_struct)
+        if acept:
+            self._insert_with_tag("Resultado: ✓ CADENA ACEPTADA\n\n", "success")
+            if error is None:
+                self.current_tree = tree
 
                 if self.export_tree_btn:
                     self.export_tree_btn.config(state="normal")
@@ -274,10 +361,8 @@ class App(ttk.Window):
 
                 self._insert_with_tag("Árbol de derivación:\n", "header")
                 self._insert_tree_colored(self.current_tree)
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                self._insert_with_tag(f"\n⚠️ Error al construir el árbol: {e}\n", "error")
+            else:
+                self._insert_with_tag(f"\n⚠️ Error al construir el árbol: {error}\n", "error")
                 self.current_tree = None
                 if self.export_tree_btn:
                     self.export_tree_btn.config(state="disabled")
@@ -293,27 +378,33 @@ class App(ttk.Window):
             if self.visualize_tree_btn:
                 self.visualize_tree_btn.config(state="disabled")
 
-    def _insert_tree_colored(self, node, indent=0, is_last=True, prefix=""):
-        connector = "└── " if is_last else "├── "
-        extension = "    " if is_last else "│   "
-        self._insert_with_tag(prefix + connector, "separator")
-        if node.is_leaf():
-            self._insert_with_tag(f'"{node.symbol}"', "tree_terminal")
+    def _show_earley(self, result):
+        acept, tree = result
+
+        if acept:
+            self._insert_with_tag("Resultado: ✓ CADENA ACEPTADA\n\n", "success")
+            self.current_tree = tree
+            if self.export_tree_btn:
+                self.export_tree_btn.config(state="normal")
+            if self.visualize_tree_btn:
+                self.visualize_tree_btn.config(state="normal")
+            self._insert_with_tag("Árbol de derivación:\n", "header")
+            self._insert_tree_colored(self.current_tree)
         else:
-            self._insert_with_tag(f'[{node.symbol}]', "tree_node")
-        self.result_text.insert("end", "\n")
-        for i, child in enumerate(node.children):
-            is_last_child = (i == len(node.children) - 1)
-            if isinstance(child, TreeNode):
-                self._insert_tree_colored(child, indent + 1, is_last_child, prefix + extension)
-            else:
-                child_connector = "└── " if is_last_child else "├── "
-                self._insert_with_tag(prefix + extension + child_connector, "separator")
-                self._insert_with_tag(f'"{child}"', "tree_terminal")
-                self.result_text.insert("end", "\n")
+            self._insert_with_tag("Resultado: ✗ CADENA RECHAZADA\n\n", "error")
+            self._insert_with_tag("❌ La cadena no pertenece al lenguaje generado por la gramática.\n", "info")
+            self.current_tree = None
+            if self.export_tree_btn:
+                self.export_tree_btn.config(state="disabled")
+            if self.visualize_tree_btn:
+                self.visualize_tree_btn.config(state="disabled")
+
+    def _insert_tree_colored(self, node):
+        text, ranges = node.render()
+        insert_tagged_text(self.result_text, text, ranges)
 
-    def _parse_regular(self, tokens):
-        acept, derivation = parse_regular(self.grammar, tokens)
+    def _show_regular(self, result, tokens):
+        acept, derivation = result
         if acept:
             self._insert_with_tag("✓ CADENA ACEPTADA\n\n", "success")
             if derivation:
@@ -372,11 +463,11 @@ class App(ttk.Window):
                 next_nonterminal = None
                 while i < len(right):
                     char = right[i]
-                    if char in self.grammar.T:
+                    if char in self.grammar.terminal_set:
                         if token_index < len(tokens):
                             children.append(TreeNode(tokens[token_index]))
                             token_index += 1
-                    elif char in self.grammar.N:
+                    elif char in self.grammar.nonterminal_set:
                         next_nonterminal = TreeNode(char)
                         children.append(next_nonterminal)
                     i += 1
@@ -390,8 +481,8 @@ class App(ttk.Window):
         if self.current_tree is None:
             messagebox.showwarning("Advertencia", "No hay árbol para exportar.\nPrimero debe parsear una cadena aceptada con CYK o Regular.")
             return
-        content = self.current_tree.to_text()
-        path, err = save_text_to_file(self, default_ext=".txt", title="Guardar Árbol", content=content)
+        path, err = save_text_to_file(self, default_ext=".txt", title="Guardar Árbol",
+                                      write=self.current_tree.write_text)
         if err:
             messagebox.showerror("Error", f"No se pudo exportar:\n{err}")
             return
@@ -413,18 +504,60 @@ class App(ttk.Window):
         if not self.grammar:
             messagebox.showwarning("Advertencia", "Cargue una gramática primero.")
             return
+        if self.gen_job is not None and self.gen_job.running:
+            return
         try:
             limit = int(self.gen_limit.get())
             depth = int(self.gen_depth.get())
-            self.gen_text.delete("1.0", "end")
-            strings = generate_shortest(self.grammar, limit=limit, max_depth=depth)
-            for i, s in enumerate(strings, 1):
-                self.gen_text.insert("end", f"{i:2d}. \"{s}\" (longitud: {len(s)})\n")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al generar cadenas:\n{str(e)}")
+            return
+        self.gen_text.delete("1.0", "end")
+        grammar = self.grammar
+
+        def work(cancel, progress):
+            # Se consumen solo las cadenas que se muestran, de menor a mayor longitud
+            strings = []
+            for s in islice(iter_strings(grammar, max_depth=depth, order="length", cancel=cancel), limit):
+                strings.append(s)
+                progress(len(strings) / limit)
+            return strings
+
+        def done(strings):
+            self._set_gen_running(False, f"✓ {self.gen_job.elapsed:.2f} s")
+            for total, s in enumerate(strings, 1):
+                self.gen_text.insert("end", f"{total:2d}. \"{s}\" (longitud: {len(s)})\n")
             if len(strings) < limit:
                 self.gen_text.insert("end", f"\n⚠ Solo se generaron {len(strings)} cadenas (puede aumentar profundidad).\n")
-        except Exception as e:
+
+        def failed(e):
+            self._set_gen_running(False, "✗ Error")
             messagebox.showerror("Error", f"Error al generar cadenas:\n{str(e)}")
 
+        def cancelled():
+            self._set_gen_running(False, "Cancelado")
+            self.gen_text.insert("end", "⏹ Generación cancelada.\n")
+
+        self._set_gen_running(True)
+        self.gen_job = BackgroundJob(
+            self, work, done, failed, cancelled,
+            lambda fraction, elapsed: self._show_progress(self.gen_progress, self.gen_status,
+                                                          fraction, elapsed))
+
+    def _set_gen_running(self, running, status=""):
+        if self.gen_btn:
+            self.gen_btn.config(state="disabled" if running else "normal")
+        if self.cancel_gen_btn:
+            self.cancel_gen_btn.config(state="normal" if running else "disabled")
+        if self.gen_progress and running:
+            self.gen_progress.config(value=0)
+        if self.gen_status:
+            self.gen_status.config(text=status)
+
+    def cancel_generation(self):
+        if self.gen_job is not None:
+            self.gen_job.cancel()
+
     def export_strings(self):
         from tkinter import messagebox
         content = self.gen_text.get("1.0", "end").strip()
@@ -17,12 +17,38 @@ def build_parser_tab(app, parent):
     app.entry_parse = ttk.Entry(input_frame, width=60)
     app.entry_parse.grid(row=0, column=1, padx=10, sticky="ew")
 
-    ttk.Button(
+    # Algoritmo para gramáticas Tipo 2 (las Tipo 3 siempre usan el parser regular)
+    app.parse_algorithm = ttk.Combobox(
+        input_frame,
+        values=["CYK", "Earley"],
+        state="readonly",
+        width=8
+    )
+    app.parse_algorithm.set("CYK")
+    app.parse_algorithm.grid(row=0, column=2, padx=(0, 10))
+
+    app.parse_btn = ttk.Button(
         input_frame,
         text="🔍 Parsear",
         command=app.parse_string,
         bootstyle="info"
-    ).grid(row=0, column=2)
+    )
+    app.parse_btn.grid(row=0, column=3)
+
+    # El análisis corre en segundo plano y se puede cancelar
+    app.cancel_parse_btn = ttk.Button(
+        input_frame,
+        text="✖ Cancelar",
+        command=app.cancel_parse,
+        bootstyle="danger",
+        state="disabled"
+    )
+    app.cancel_parse_btn.grid(row=0, column=4, padx=(5, 0))
+
+    app.parse_progress = ttk.Progressbar(input_frame, mode="determinate", maximum=1.0)
+    app.parse_progress.grid(row=1, column=1, columnspan=2, padx=10, pady=(8, 0), sticky="ew")
+    app.parse_status = ttk.Label(input_frame, text="")
+    app.parse_status.grid(row=1, column=3, columnspan=2, pady=(8, 0), sticky="w")
 
     input_frame.columnconfigure(1, weight=1)
 
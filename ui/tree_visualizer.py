@@ -1,77 +1,112 @@
+import math
 import tkinter as tk
+from bisect import bisect_left, bisect_right
 from tkinter import ttk
 
+from services.tree_layout import layout_tree
+
+
+# Límites del zoom (factor sobre el tamaño base)
+MIN_ZOOM = 0.02
+MAX_ZOOM = 4.0
+ZOOM_STEP = 1.25
+# Espera antes de redibujar tras desplazar o hacer zoom (ms)
+REDRAW_MS = 15
+# Por debajo de este radio en pantalla los nodos se resumen en glifos
+MIN_RADIUS_PX = 4
+# Radio mínimo en pantalla para dibujar la etiqueta del nodo
+MIN_TEXT_RADIUS_PX = 9
+# Máximo de nodos dibujados uno a uno en cada redibujado
+MAX_DRAWN_NODES = 1500
+# Ancho (y alto mínimo) en pantalla de cada glifo resumen
+SUMMARY_PX = 12
+
 
 class TreeVisualizer(tk.Toplevel):
-    """Ventana para visualizar gráficamente el árbol de derivación."""
-    
+    """Ventana para visualizar gráficamente el árbol de derivación.
+
+    El árbol se distribuye una sola vez en coordenadas base con
+    services.tree_layout y se guarda, nivel por nivel, en listas ordenadas
+    por x que sirven de índice espacial. En cada redibujado solo se crean
+    los elementos que caen en la zona visible; los niveles con demasiados
+    nodos (o nodos demasiado pequeños para el zoom actual) se resumen en
+    glifos que marcan dónde hay nodos. El zoom escala los elementos
+    existentes con canvas.scale y luego redibuja solo la zona visible, sin
+    recalcular la distribución.
+    """
+
     def __init__(self, parent, tree_root, title="Visualización del Árbol"):
         super().__init__(parent)
         self.title(title)
         self.geometry("900x700")
         self.tree_root = tree_root
-        
+
         # Configuración de colores
         self.node_color = "#8e44ad"
         self.terminal_color = "#16a085"
         self.edge_color = "#7f8c8d"
         self.node_border = "#2c3e50"
-        
-        # Parámetros de dibujo
+        self.summary_color = "#95a5a6"
+
+        # Parámetros de dibujo (con zoom 1)
         self.node_radius = 20
         self.level_height = 100
-        self.min_horizontal_gap = 20
         self.node_padding = 20  # Espacio mínimo entre bordes de nodos
-        
+        self.margin = 50
+        self.zoom = 1.0
+
+        self._redraw_id = None
         self._build_ui()
         self._calculate_positions()
-        self._draw_tree()
-        
+        self._build_index()
+        self._update_scrollregion()
+        self.after_idle(self._show_root)
+
     def _build_ui(self):
         """Construye la interfaz de la ventana."""
         # Frame para controles
         control_frame = ttk.Frame(self, padding=10)
         control_frame.pack(fill="x")
-        
+
         ttk.Label(
             control_frame,
             text="Árbol de Derivación",
             font=("Arial", 12, "bold")
         ).pack(side="left", padx=5)
-        
+
         # Botones de control
         button_frame = ttk.Frame(control_frame)
         button_frame.pack(side="right")
-        
+
         ttk.Button(
             button_frame,
             text="🔍 Zoom +",
             command=self._zoom_in
         ).pack(side="left", padx=2)
-        
+
         ttk.Button(
             button_frame,
             text="🔍 Zoom -",
             command=self._zoom_out
         ).pack(side="left", padx=2)
-        
+
         ttk.Button(
             button_frame,
             text="🔄 Reiniciar Vista",
             command=self._reset_view
         ).pack(side="left", padx=2)
-        
+
         # Frame para el canvas con scrollbars
         canvas_frame = ttk.Frame(self)
         canvas_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
+
         # Scrollbars - usar tkinter estándar
         v_scrollbar = tk.Scrollbar(canvas_frame, orient="vertical")
         v_scrollbar.pack(side="right", fill="y")
-        
+
         h_scrollbar = tk.Scrollbar(canvas_frame, orient="horizontal")
         h_scrollbar.pack(side="bottom", fill="x")
-        
+
         # Canvas
         self.canvas = tk.Canvas(
             canvas_frame,
@@ -80,235 +115,297 @@ class TreeVisualizer(tk.Toplevel):
             xscrollcommand=h_scrollbar.set
         )
         self.canvas.pack(side="left", fill="both", expand=True)
-        
-        v_scrollbar.config(command=self.canvas.yview)
-        h_scrollbar.config(command=self.canvas.xview)
-        
+
+        v_scrollbar.config(command=self._yview)
+        h_scrollbar.config(command=self._xview)
+
         # Bind para drag con el mouse
         self.canvas.bind("<ButtonPress-1>", self._on_drag_start)
         self.canvas.bind("<B1-Motion>", self._on_drag_motion)
-        
+        # El área visible cambia al redimensionar la ventana
+        self.canvas.bind("<Configure>", lambda event: self._schedule_redraw())
+
         self._drag_data = {"x": 0, "y": 0}
-        
+
     def _calculate_positions(self):
-        """Calcula las posiciones de todos los nodos del árbol."""
-        if not self.tree_root:
-            return
-        
-        # Primero, calcular el ancho necesario para cada nodo
-        self._calculate_widths(self.tree_root)
-        
-        # Luego, asignar posiciones x, y
-        tree_width = self.tree_root._width * self.min_horizontal_gap
-        start_x = max(tree_width / 2, 450)  # Centrar en el canvas
-        start_y = 50
-        
-        self._assign_positions(self.tree_root, start_x, start_y, tree_width)
-        
-    def _calculate_widths(self, node):
-        """Calcula recursivamente el ancho de cada subárbol."""
-        if node.is_leaf():
-            node._width = 1
-            return 1
-        
-        if not node.children:
-            node._width = 1
-            return 1
-        
-        total_width = 0
-        for child in node.children:
-            if isinstance(child, type(node)):  # TreeNode
-                total_width += self._calculate_widths(child)
-            else:
-                total_width += 1  # Terminal como string
-        
-        # Asegurar un ancho mínimo basado en el número de hijos
-        node._width = max(total_width, len(node.children) * 1.5)
-        return node._width
-    
-    def _assign_positions(self, node, x, y, width):
-        """Asigna posiciones x, y a cada nodo."""
-        node._x = x
-        node._y = y
-        
-        if node.is_leaf() or not node.children:
-            return
-        
-        # Calcular el ancho total necesario para todos los hijos
-        children_info = []
-        for child in node.children:
-            if isinstance(child, type(node)):  # TreeNode
-                child_width = child._width if hasattr(child, '_width') else 1
-                children_info.append(('node', child, child_width))
-            else:
-                children_info.append(('terminal', child, 1))
-        
-        total_child_width = sum(info[2] for info in children_info)
-        
-        # Calcular el espacio total incluyendo padding entre nodos
-        spacing = self.min_horizontal_gap + self.node_padding
-        available_space = total_child_width * spacing
-        start_x = x - available_space / 2
-        
-        current_x = start_x
-        
-        for child_type, child, child_width in children_info:
-            child_space = child_width * spacing
-            child_x = current_x + child_space / 2
-            child_y = y + self.level_height
-            
-            if child_type == 'node':
-                self._assign_positions(child, child_x, child_y, child_space)
-            else:
-                # Terminal como string - guardar posición
-                if not hasattr(node, '_terminal_positions'):
-                    node._terminal_positions = []
-                node._terminal_positions.append((child, child_x, child_y))
-            
-            current_x += child_space
-    
-    def _draw_tree(self):
-        """Dibuja el árbol en el canvas."""
+        """Calcula las posiciones base (zoom 1) de todos los nodos del árbol.
+
+        Usa services.tree_layout, que no modifica el árbol; aquí solo se
+        pasan sus coordenadas a píxeles.
+        """
         if not self.tree_root:
+            self._labels, self._terminal, self._parent, self._depth = [], [], [], []
+            self._xs, self._ys = [], []
             return
-        
-        # Limpiar canvas
+        spacing = 2 * self.node_radius + self.node_padding
+        layout = layout_tree(self.tree_root, distance=spacing, level_distance=self.level_height)
+        self._labels = layout.labels
+        self._terminal = layout.terminal
+        self._parent = layout.parent
+        self._depth = layout.depth
+        self._xs = [self.margin + x for x in layout.x]
+        self._ys = [self.margin + y for y in layout.y]
+
+    def _build_index(self):
+        """Construye el índice espacial: nodos y aristas de cada nivel ordenados por x.
+
+        Para las aristas entre los niveles d y d+1 se guardan, en el orden de
+        sus hijos, el máximo acumulado de su extremo derecho y el mínimo
+        acumulado (desde el final) de su extremo izquierdo; así las aristas
+        que cruzan un intervalo [x0, x1] forman un tramo contiguo que se
+        obtiene con bisect.
+        """
+        levels = []
+        for i, d in enumerate(self._depth):
+            if d == len(levels):
+                levels.append([])
+            levels[d].append(i)
+        xs = self._xs
+        self._levels = [sorted(level, key=xs.__getitem__) for level in levels]
+        self._level_xs = [[xs[i] for i in level] for level in self._levels]
+        self._level_ys = [self._ys[level[0]] for level in self._levels]
+
+        self._edge_children = []
+        self._edge_hi = []
+        self._edge_lo = []
+        for level in self._levels[1:]:
+            hi, lo = [], []
+            best = -math.inf
+            for c in level:
+                best = max(best, xs[c], xs[self._parent[c]])
+                hi.append(best)
+            best = math.inf
+            for c in reversed(level):
+                best = min(best, xs[c], xs[self._parent[c]])
+                lo.append(best)
+            lo.reverse()
+            self._edge_children.append(level)
+            self._edge_hi.append(hi)
+            self._edge_lo.append(lo)
+
+        if xs:
+            r = self.node_radius
+            self._bounds = (min(xs) - r, min(self._ys) - r, max(xs) + r, max(self._ys) + r)
+        else:
+            self._bounds = (0, 0, 0, 0)
+
+    def _update_scrollregion(self):
+        z = self.zoom
+        x0, y0, x1, y1 = self._bounds
+        margin = 20
+        self.canvas.configure(scrollregion=(x0 * z - margin, y0 * z - margin,
+                                            x1 * z + margin, y1 * z + margin))
+
+    def _visible_area(self):
+        """Zona visible en coordenadas base (x0, y0, x1, y1)."""
+        c = self.canvas
+        width = c.winfo_width() if c.winfo_width() > 1 else c.winfo_reqwidth()
+        height = c.winfo_height() if c.winfo_height() > 1 else c.winfo_reqheight()
+        z = self.zoom
+        return (c.canvasx(0) / z, c.canvasy(0) / z,
+                c.canvasx(width) / z, c.canvasy(height) / z)
+
+    def _schedule_redraw(self):
+        if self._redraw_id is None:
+            self._redraw_id = self.after(REDRAW_MS, self._redraw)
+
+    def _redraw(self):
+        """Dibuja solo los nodos y aristas que intersecan la zona visible."""
+        self._redraw_id = None
         self.canvas.delete("all")
-        
-        # Dibujar aristas primero (para que queden debajo)
-        self._draw_edges(self.tree_root)
-        
-        # Dibujar nodos
-        self._draw_nodes(self.tree_root)
-        
-        # Configurar región scrollable
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        
-    def _draw_edges(self, node):
-        """Dibuja las aristas del árbol."""
-        if not hasattr(node, '_x'):
-            return
-        
-        x1, y1 = node._x, node._y
-        
-        # Dibujar líneas a hijos TreeNode
-        for child in node.children:
-            if isinstance(child, type(node)) and hasattr(child, '_x'):
-                x2, y2 = child._x, child._y
-                self.canvas.create_line(
-                    x1, y1 + self.node_radius,
-                    x2, y2 - self.node_radius,
-                    fill=self.edge_color,
-                    width=2,
-                    tags="edge"
-                )
-                self._draw_edges(child)
-        
-        # Dibujar líneas a terminales
-        if hasattr(node, '_terminal_positions'):
-            for terminal, x2, y2 in node._terminal_positions:
-                self.canvas.create_line(
-                    x1, y1 + self.node_radius,
-                    x2, y2 - self.node_radius,
-                    fill=self.edge_color,
-                    width=2,
-                    tags="edge"
-                )
-    
-    def _draw_nodes(self, node):
-        """Dibuja los nodos del árbol."""
-        if not hasattr(node, '_x'):
+        if not self._labels:
             return
-        
-        x, y = node._x, node._y
+        x0, y0, x1, y1 = self._visible_area()
+        z = self.zoom
         r = self.node_radius
-        
-        if node.is_leaf():
-            # Nodo terminal (hoja)
-            self.canvas.create_oval(
-                x - r, y - r, x + r, y + r,
-                fill=self.terminal_color,
-                outline=self.node_border,
-                width=2,
-                tags="node"
-            )
-            self.canvas.create_text(
-                x, y,
-                text=node.symbol,
-                font=("Courier", 10, "bold"),
-                fill="white",
-                tags="node"
+        r_px = r * z
+
+        # Niveles visibles (con margen de un radio arriba y abajo)
+        first = bisect_left(self._level_ys, y0 - r)
+        last = bisect_right(self._level_ys, y1 + r)
+
+        # Se decide qué niveles se dibujan nodo a nodo, de arriba hacia abajo
+        budget = MAX_DRAWN_NODES
+        detailed = {}
+        for d in range(first, last):
+            xs = self._level_xs[d]
+            lo = bisect_left(xs, x0 - r)
+            hi = bisect_right(xs, x1 + r)
+            if r_px >= MIN_RADIUS_PX and hi - lo <= budget:
+                budget -= hi - lo
+                detailed[d] = (lo, hi)
+
+        # Aristas entre niveles detallados (debajo de los nodos). Se incluyen
+        # las del nivel anterior al primero visible y las que bajan al nivel
+        # siguiente al último, que pueden cruzar la zona.
+        for d in range(max(first, 1), min(last + 1, len(self._levels))):
+            if (d in detailed or d == last) and (d - 1 in detailed or d - 1 < first):
+                self._draw_edges(d, x0, x1, z)
+
+        summary = []
+        for d in range(first, last):
+            if d in detailed:
+                lo, hi = detailed[d]
+                self._draw_nodes(self._levels[d][lo:hi], z, r_px)
+            else:
+                summary.append(d)
+        self._draw_summary(summary, x0, x1, z)
+
+    def _draw_edges(self, d, x0, x1, z):
+        """Dibuja las aristas que llegan al nivel d y cruzan [x0, x1]."""
+        hi = self._edge_hi[d - 1]
+        lo = self._edge_lo[d - 1]
+        start = bisect_left(hi, x0)
+        end = bisect_right(lo, x1)
+        if start >= end:
+            return
+        width = max(1, round(2 * z))
+        offset = self.node_radius * z
+        xs, ys, parent = self._xs, self._ys, self._parent
+        create_line = self.canvas.create_line
+        for c in self._edge_children[d - 1][start:end]:
+            p = parent[c]
+            create_line(
+                xs[p] * z, ys[p] * z + offset,
+                xs[c] * z, ys[c] * z - offset,
+                fill=self.edge_color,
+                width=width,
+                tags="edge"
             )
-        else:
-            # Nodo no terminal
-            self.canvas.create_oval(
-                x - r, y - r, x + r, y + r,
-                fill=self.node_color,
+
+    def _draw_nodes(self, nodes, z, r_px):
+        """Dibuja los nodos dados; las etiquetas solo si caben en el círculo."""
+        create_oval = self.canvas.create_oval
+        create_text = self.canvas.create_text
+        with_text = r_px >= MIN_TEXT_RADIUS_PX
+        outline = max(1, round(2 * z))
+        terminal_font = ("Courier", max(6, round(10 * z)), "bold")
+        node_font = ("Arial", max(6, round(11 * z)), "bold")
+        for i in nodes:
+            x = self._xs[i] * z
+            y = self._ys[i] * z
+            terminal = self._terminal[i]
+            create_oval(
+                x - r_px, y - r_px, x + r_px, y + r_px,
+                fill=self.terminal_color if terminal else self.node_color,
                 outline=self.node_border,
-                width=2,
+                width=outline,
                 tags="node"
             )
-            self.canvas.create_text(
-                x, y,
-                text=node.symbol,
-                font=("Arial", 11, "bold"),
-                fill="white",
-                tags="node"
-            )
-            
-            # Dibujar hijos TreeNode
-            for child in node.children:
-                if isinstance(child, type(node)):
-                    self._draw_nodes(child)
-            
-            # Dibujar terminales
-            if hasattr(node, '_terminal_positions'):
-                for terminal, tx, ty in node._terminal_positions:
-                    self.canvas.create_oval(
-                        tx - r, ty - r, tx + r, ty + r,
-                        fill=self.terminal_color,
-                        outline=self.node_border,
-                        width=2,
-                        tags="node"
-                    )
-                    self.canvas.create_text(
-                        tx, ty,
-                        text=terminal,
-                        font=("Courier", 10, "bold"),
-                        fill="white",
-                        tags="node"
-                    )
-    
+            if with_text:
+                create_text(
+                    x, y,
+                    text=self._labels[i],
+                    font=terminal_font if terminal else node_font,
+                    fill="white",
+                    tags="node"
+                )
+
+    def _draw_summary(self, levels, x0, x1, z):
+        """Resume los niveles dados en glifos de SUMMARY_PX píxeles de ancho.
+
+        Los niveles consecutivos que quedan a menos de SUMMARY_PX en pantalla
+        se agrupan en una misma banda. Cada celda (banda, columna) que
+        contiene algún nodo se dibuja como un rectángulo; las columnas se
+        recorren saltando con bisect, sin visitar cada nodo.
+        """
+        if not levels:
+            return
+        step = SUMMARY_PX / z  # ancho de una columna en coordenadas base
+        band_levels = max(1, math.ceil(SUMMARY_PX / (self.level_height * z)))
+        half = max(2, min(self.node_radius * z, SUMMARY_PX / 2))
+        create_rectangle = self.canvas.create_rectangle
+
+        bands = {}
+        for d in levels:
+            bands.setdefault(d // band_levels, []).append(d)
+        for band, band_ds in bands.items():
+            columns = set()
+            for d in band_ds:
+                xs = self._level_xs[d]
+                pos = bisect_left(xs, x0 - step)
+                end = bisect_right(xs, x1 + step)
+                while pos < end:
+                    column = math.floor(xs[pos] / step)
+                    columns.add(column)
+                    pos = max(pos + 1, bisect_left(xs, (column + 1) * step, pos, end))
+            top = self._level_ys[band_ds[0]] * z - half
+            bottom = self._level_ys[band_ds[-1]] * z + half
+            for column in columns:
+                create_rectangle(
+                    column * SUMMARY_PX + 1, top,
+                    (column + 1) * SUMMARY_PX - 1, bottom,
+                    fill=self.summary_color,
+                    outline="",
+                    tags="summary"
+                )
+
+    def _show_root(self):
+        """Centra la vista horizontalmente en la raíz, arriba del todo."""
+        if self._xs:
+            self._center_on(self._xs[0] * self.zoom, None)
+        self.canvas.yview_moveto(0)
+        self._schedule_redraw()
+
+    def _center_on(self, x, y):
+        """Desplaza la vista para que (x, y) del canvas quede en el centro."""
+        c = self.canvas
+        sx0, sy0, sx1, sy1 = (float(v) for v in c.cget("scrollregion").split())
+        width = c.winfo_width() if c.winfo_width() > 1 else c.winfo_reqwidth()
+        height = c.winfo_height() if c.winfo_height() > 1 else c.winfo_reqheight()
+        if x is not None and sx1 > sx0:
+            c.xview_moveto((x - width / 2 - sx0) / (sx1 - sx0))
+        if y is not None and sy1 > sy0:
+            c.yview_moveto((y - height / 2 - sy0) / (sy1 - sy0))
+
+    def _set_zoom(self, zoom):
+        """Cambia el zoom manteniendo el centro de la vista.
+
+        Los elementos ya dibujados se escalan con canvas.scale (respuesta
+        inmediata) y luego se redibuja la zona visible con el nivel de
+        detalle que corresponde.
+        """
+        zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+        factor = zoom / self.zoom
+        if factor == 1:
+            return
+        c = self.canvas
+        width = c.winfo_width() if c.winfo_width() > 1 else c.winfo_reqwidth()
+        height = c.winfo_height() if c.winfo_height() > 1 else c.winfo_reqheight()
+        cx = c.canvasx(width / 2)
+        cy = c.canvasy(height / 2)
+        self.zoom = zoom
+        c.scale("all", 0, 0, factor, factor)
+        self._update_scrollregion()
+        self._center_on(cx * factor, cy * factor)
+        self._schedule_redraw()
+
     def _zoom_in(self):
         """Aumenta el zoom del árbol."""
-        self.node_radius = min(self.node_radius + 5, 50)
-        self.level_height = min(self.level_height + 10, 150)
-        self.min_horizontal_gap = min(self.min_horizontal_gap + 15, 150)
-        self.node_padding = min(self.node_padding + 5, 60)
-        self._calculate_positions()
-        self._draw_tree()
-    
+        self._set_zoom(self.zoom * ZOOM_STEP)
+
     def _zoom_out(self):
         """Reduce el zoom del árbol."""
-        self.node_radius = max(self.node_radius - 5, 15)
-        self.level_height = max(self.level_height - 10, 40)
-        self.min_horizontal_gap = max(self.min_horizontal_gap - 15, 50)
-        self.node_padding = max(self.node_padding - 5, 20)
-        self._calculate_positions()
-        self._draw_tree()
-    
+        self._set_zoom(self.zoom / ZOOM_STEP)
+
     def _reset_view(self):
-        """Reinicia los valores de zoom."""
-        self.node_radius = 30
-        self.level_height = 100
-        self.min_horizontal_gap = 80
-        self._calculate_positions()
-        self._draw_tree()
-    
+        """Reinicia el zoom y vuelve a la raíz."""
+        self._set_zoom(1.0)
+        self._show_root()
+
+    def _xview(self, *args):
+        self.canvas.xview(*args)
+        self._schedule_redraw()
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_redraw()
+
     def _on_drag_start(self, event):
         """Inicia el arrastre del canvas."""
         self.canvas.scan_mark(event.x, event.y)
-    
+
     def _on_drag_motion(self, event):
         """Mueve el canvas al arrastrar."""
-        self.canvas.scan_dragto(event.x, event.y, gain=1)
\ No newline at end of file
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        self._schedule_redraw()
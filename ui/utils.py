@@ -1,7 +1,13 @@
+from bisect import bisect_right
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
-def save_text_to_file(parent, default_ext=".txt", title="Guardar archivo", content=""):
+# Tag de color para cada tipo de rango de TreeNode.render()
+TREE_TAGS = {"connector": "separator", "terminal": "tree_terminal", "nonterminal": "tree_node"}
+
+
+def save_text_to_file(parent, default_ext=".txt", title="Guardar archivo", content="", write=None):
+    """Pide una ruta y guarda content; si se da write, write(f) escribe el archivo abierto."""
     path = filedialog.asksaveasfilename(
         title=title,
         defaultextension=default_ext,
@@ -11,7 +17,10 @@ def save_text_to_file(parent, default_ext=".txt", title="Guardar archivo", conte
         return None, "cancelled"
     try:
         with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+            if write is not None:
+                write(f)
+            else:
+                f.write(content)
         return path, None
     except Exception as e:
         return None, str(e)
@@ -27,3 +36,31 @@ def configure_result_text_tags(text_widget):
     text_widget.tag_config("tree_node", foreground="#8e44ad", font=("Courier", 10, "bold"))
     text_widget.tag_config("tree_terminal", foreground="#16a085", font=("Courier", 10))
     text_widget.tag_config("derivation", foreground="#2980b9", font=("Courier", 10))
+
+
+def insert_tagged_text(text_widget, text, ranges, tags=TREE_TAGS):
+    """Inserta text al final con un solo insert y aplica los rangos en bloque.
+
+    ranges = [(inicio, fin, tipo)] en caracteres de text; tags traduce cada
+    tipo al tag del widget. Se hace un tag_add por tag con todos sus rangos.
+    """
+    line, col = map(int, text_widget.index("end-1c").split("."))
+    text_widget.insert("end", text)
+
+    # Inicio de cada línea de text, para pasar los desplazamientos a "línea.columna"
+    starts = [0]
+    i = text.find("\n")
+    while i >= 0:
+        starts.append(i + 1)
+        i = text.find("\n", i + 1)
+
+    def index(offset):
+        k = bisect_right(starts, offset) - 1
+        c = offset - starts[k]
+        return f"{line + k}.{c + col if k == 0 else c}"
+
+    by_tag = {}
+    for start, end, kind in ranges:
+        by_tag.setdefault(tags[kind], []).extend((index(start), index(end)))
+    for tag, indices in by_tag.items():
+        text_widget.tag_add(tag, *indices)
@@ -0,0 +1,99 @@
+"""
+Ejecución de trabajos largos fuera del hilo de Tk.
+
+Un BackgroundJob corre una función en un hilo aparte y entrega su resultado
+a la interfaz consultando una cola con widget.after(), de modo que los
+widgets solo se tocan desde el hilo de Tk. La cancelación es cooperativa:
+la función recibe un threading.Event que los servicios consultan en sus
+ciclos principales (ver services/cancellation.py).
+"""
+
+import queue
+import threading
+import time
+
+from services.cancellation import Cancelled
+
+
+class BackgroundJob:
+    """Trabajo en segundo plano con progreso, tiempo transcurrido y cancelación.
+
+    work(cancel, progress) se ejecuta en otro hilo; cancel es un
+    threading.Event y progress(fracción) informa el avance entre 0 y 1.
+    Los callbacks se llaman siempre en el hilo de Tk:
+        on_done(resultado), on_error(excepción), on_cancel(),
+        on_progress(fracción o None, segundos transcurridos) en cada consulta
+    Al cancelar, la interfaz se libera de inmediato y el resultado que el
+    hilo llegue a producir se descarta.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, widget, work, on_done, on_error=None, on_cancel=None, on_progress=None):
+        self.widget = widget
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+        self.started = time.perf_counter()
+        # El hilo solo asigna la última fracción; la cola lleva el resultado
+        self._progress = None
+        self._results = queue.Queue()
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._after_id = widget.after(self.POLL_MS, self._poll)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def running(self) -> bool:
+        return not self._finished
+
+    def _report(self, fraction: float):
+        self._progress = fraction
+
+    def _run(self):
+        try:
+            result = self.work(self.cancel_event, self._report)
+        except Cancelled:
+            self._results.put(("cancelled", None))
+        except Exception as e:
+            self._results.put(("error", e))
+        else:
+            self._results.put(("done", result))
+
+    def _poll(self):
+        if self._finished:
+            return
+        try:
+            kind, value = self._results.get_nowait()
+        except queue.Empty:
+            if self.on_progress:
+                self.on_progress(self._progress, self.elapsed)
+            self._after_id = self.widget.after(self.POLL_MS, self._poll)
+            return
+
+        self._finished = True
+        if kind == "done":
+            self.on_done(value)
+        elif kind == "error" and self.on_error:
+            self.on_error(value)
+        elif kind == "cancelled" and self.on_cancel:
+            self.on_cancel()
+
+    def cancel(self):
+        """Pide al trabajo que se detenga y notifica on_cancel sin esperarlo."""
+        if self._finished:
+            return
+        self._finished = True
+        self.cancel_event.set()
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self.on_cancel:
+            self.on_cancel()